@@ -0,0 +1,196 @@
+"""
+Durable, batched analytics event pipeline.
+
+``/analytics`` hands events to ``AnalyticsPipeline.offer``, which places them on
+a bounded in-process queue and returns immediately; when the queue cannot take
+the whole batch it is refused so memory stays bounded and the endpoint can
+shed load. A background writer drains the queue in batches (by size or after
+ANALYTICS_FLUSH_SECONDS, whichever comes first) and appends them as NDJSON to
+segment files on local disk, rotating by size and age. File I/O runs in a
+worker thread so the event loop never blocks on disk.
+
+Each worker process writes its own segments (the pid is in the file name), so
+no cross-process locking is needed. ``replay_analytics.py`` reads them back.
+
+Settings:
+    ANALYTICS_DIR             segment directory (default ./analytics_data)
+    ANALYTICS_QUEUE_MAX       events buffered in memory per worker (default 100000)
+    ANALYTICS_BATCH_SIZE      events per write (default 1000)
+    ANALYTICS_FLUSH_SECONDS   max time an event waits before being written (default 1.0)
+    ANALYTICS_SEGMENT_BYTES   rotate after this many bytes (default 64 MiB)
+    ANALYTICS_SEGMENT_SECONDS rotate after this many seconds (default 3600)
+    ANALYTICS_FSYNC           "batch" (fsync every write), "rotate" (on segment
+                              close only) or "never" (default batch)
+    ANALYTICS_COMPRESS        "gzip" to write .ndjson.gz segments, one gzip member
+                              per batch (default off)
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+SEGMENT_SUFFIXES = (".ndjson", ".ndjson.gz")
+
+logger = logging.getLogger("loan_api.analytics")
+
+
+class AnalyticsPipeline:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        queue_max: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        segment_bytes: Optional[int] = None,
+        segment_seconds: Optional[float] = None,
+        fsync: Optional[str] = None,
+        compress: Optional[str] = None,
+    ):
+        self.directory = directory or os.getenv('ANALYTICS_DIR', 'analytics_data')
+        self.queue_max = queue_max or int(os.getenv('ANALYTICS_QUEUE_MAX', '100000'))
+        self.batch_size = batch_size or int(os.getenv('ANALYTICS_BATCH_SIZE', '1000'))
+        self.flush_seconds = flush_seconds or float(os.getenv('ANALYTICS_FLUSH_SECONDS', '1.0'))
+        self.segment_bytes = segment_bytes or int(os.getenv('ANALYTICS_SEGMENT_BYTES', str(64 * 1024 * 1024)))
+        self.segment_seconds = segment_seconds or float(os.getenv('ANALYTICS_SEGMENT_SECONDS', '3600'))
+        self.fsync = (fsync or os.getenv('ANALYTICS_FSYNC', 'batch')).lower()
+        self.compress = (compress or os.getenv('ANALYTICS_COMPRESS', '')).lower() == 'gzip'
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._file = None
+        self._segment_path: Optional[str] = None
+        self._segment_opened = 0.0
+        self._segment_seq = 0
+
+        self.accepted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.segments = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_max)
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then close the open segment."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await asyncio.to_thread(self._close_segment)
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def offer(self, events: List[dict], request_id: str = "-") -> bool:
+        """Queue ``events`` without waiting. All-or-nothing: returns False
+        (and counts them as dropped) if the queue cannot take the batch."""
+        queue = self._queue
+        if queue is None or self._closing or self.queue_max - queue.qsize() < len(events):
+            self.dropped += len(events)
+            return False
+        received = time.time()
+        for event in events:
+            queue.put_nowait((received, request_id, event))
+        self.accepted += len(events)
+        if queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_max": self.queue_max,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "segments": self.segments,
+        }
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+    async def _run(self):
+        queue = self._queue
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while not queue.empty():
+                batch = [queue.get_nowait() for _ in range(min(self.batch_size, queue.qsize()))]
+                try:
+                    await asyncio.to_thread(self._write_batch, batch)
+                except Exception as e:
+                    # Events are lost but the writer keeps going, whatever
+                    # the error; surfaced in stats and the log
+                    self.write_errors += 1
+                    self.dropped += len(batch)
+                    logger.error({"event": "analytics_write_failed", "events": len(batch), "error": repr(e)})
+                    continue
+                self.flushed += len(batch)
+                self.batches += 1
+            if self._closing:
+                return
+
+    def _write_batch(self, batch):
+        data = "".join(
+            json.dumps({"received_at": received, "request_id": rid, "event": event}, separators=(",", ":"), default=str) + "\n"
+            for received, rid, event in batch
+        ).encode()
+        if self.compress:
+            data = gzip.compress(data)
+        if self._file is None or self._should_rotate(len(data)):
+            self._close_segment()
+            self._open_segment()
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync == 'batch':
+            os.fsync(self._file.fileno())
+
+    def _should_rotate(self, incoming: int) -> bool:
+        return (
+            self._file.tell() + incoming > self.segment_bytes
+            or time.time() - self._segment_opened > self.segment_seconds
+        )
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        suffix = SEGMENT_SUFFIXES[1] if self.compress else SEGMENT_SUFFIXES[0]
+        name = f"analytics-{stamp}-{os.getpid()}-{self._segment_seq:05d}{suffix}"
+        self._segment_path = os.path.join(self.directory, name)
+        self._file = open(self._segment_path, "ab")
+        self._segment_opened = time.time()
+        self.segments += 1
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync in ('batch', 'rotate'):
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+
+analytics = AnalyticsPipeline()
@@ -1,53 +1,97 @@
 """Production-hardened FastAPI application.
 Features:
-- Structured logging
+- Structured JSON logging through a non-blocking queue (sampling, drop counter)
 - Security & CORS middleware
 - Central error handling
-- Real Postgres integration via database.py
-- Basic rate-limit placeholder (in-memory token bucket scaffold)
-- Analytics ingestion endpoint (batch)
-- Health & readiness probes
+- Real Postgres integration via database.py (async sessions: asyncpg / aiosqlite)
+- Token-bucket rate limiting shared across workers (see rate_limit.py)
+- Analytics ingestion endpoint (batch) with a durable queued writer
+- Cached health probes (/health/live, /health/ready), per-worker pool statistics
+- Prometheus /metrics (multiprocess-aware latency histograms and gauges)
 - Request ID propagation
+- Server-Timing phases (db / ser / app) and a structured log line per request
 - Basic loan CRUD (list/create/get) with DB persistence
+- Keyset (cursor) pagination and filtering on the loan listing
+- Conditional GET (ETag / Last-Modified, 304) on loan resources
+- Read-through loan detail cache (per-worker LRU + optional shared tier)
+- Bulk loan ingestion (JSON array / NDJSON, chunked multi-row writes)
+- Underwriter work queue (claim-next with SKIP LOCKED, leases, heartbeats)
+- Workflow steps per application with SLA due dates (see workflow_engine.py)
 
 NOTE: Further enhancements (authN/Z, encryption, audit trails) to be added.
 """
-from fastapi import FastAPI, Request, Response, Depends, HTTPException, status
+from fastapi import FastAPI, Request, Response, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationError, validator
 from typing import Optional, List
-import time, uuid, os, logging, json
-from contextvars import ContextVar
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+import time, uuid, os
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, select
 from dotenv import load_dotenv
 
-from database import SessionLocal, LoanApplication as LoanORM, User as UserORM, EmploymentStatus, LoanStatus
-
+# Before the local imports: several modules read settings at import time
 load_dotenv()
 
+from database import get_engine, get_async_engine, get_async_db, LoanApplication as LoanORM, EmploymentStatus, LoanStatus, User
+from db_pool import pool_snapshot
+from health_monitor import HealthMonitor
+from applicants import applicant_cache, applicant_email, remember_applicants, resolve_applicants
+from loan_numbers import loan_numbers
+from bulk_ingest import BULK_CHUNK_SIZE, BulkPayloadError, insert_loans, iter_records
+from rate_limit import RateLimitMiddleware
+from metrics import MetricsMiddleware, add_refresh_hook, record_analytics, record_cache, record_logging, record_pool, render as render_metrics
+from analytics_pipeline import analytics
+from fast_json import dumps
+from loan_cache import CachedLoan, loan_cache
+from financial_summary import dti_ratio, install_hooks
+from work_queue import claim_next, may_claim, release_claim, renew_claim
+from workflow_engine import WorkflowError, advance, start_workflows
+from loan_views import applicant_name, full_loan_select, loan_list_select, loan_row_to_dict, parse_include, render_full_loan, render_loan_list
+from sql_stats import TimedJSONResponse, serializing, track_statements
+from conditional import is_not_modified, make_etag, not_modified_response, validator_headers
+from log_pipeline import configure_logging, log_stats, request_id_ctx, start_listener, stop_listener
+from pagination import (DEFAULT_PAGE_SIZE, LISTED_AT, MAX_PAGE_SIZE, InvalidCursor, apply_keyset, encode_cursor,
+                        next_page_headers, split_page, window_position)
+
 # ----------------------------------------------------------------------------
 # Logging setup
 # ----------------------------------------------------------------------------
-logger = logging.getLogger("loan_api")
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+# JSON lines written by a background listener thread; request_id is added
+# to every record from request_id_ctx (see log_pipeline.py)
+logger = configure_logging("loan_api")
 
-request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
+# SQL statements allowed per request for routes that must not regress into
+# N+1 patterns. Over-budget requests are logged; with SQL_BUDGET_ENFORCE set
+# (tests, CI) they fail with 500 instead.
+QUERY_BUDGETS = {
+    # validator aggregate + page
+    ("GET", "/api/v1/loans"): 2,
+    # cache miss: row with applicant and updated_at
+    ("GET", "/api/v1/loans/{loan_id}"): 1,
+    ("GET", "/api/v1/loans/{loan_id}/full"): 7,
+    # one UPDATE ... RETURNING; an empty queue adds the role check
+    ("POST", "/api/v1/underwriting/claim-next"): 2,
+    ("POST", "/api/v1/underwriting/claims/{loan_id}/heartbeat"): 1,
+    ("POST", "/api/v1/underwriting/claims/{loan_id}/release"): 1,
+    # complete current step, find next, start it
+    ("POST", "/api/v1/loans/{loan_id}/workflow/advance"): 3,
+}
+SQL_BUDGET_ENFORCE = os.getenv("SQL_BUDGET_ENFORCE", "").lower() in ("1", "true", "yes")
 
 # ----------------------------------------------------------------------------
 # FastAPI app
 # ----------------------------------------------------------------------------
-app = FastAPI(title="Loan Origination API", version="2.0.0")
+app = FastAPI(title="Loan Origination API", version="2.0.0", default_response_class=TimedJSONResponse)
 
 # ----------------------------------------------------------------------------
-# Middleware: CORS & Security Headers & Request timing
+# Middleware: Rate limiting & CORS & Security Headers & Request timing
 # ----------------------------------------------------------------------------
+# Added first so it runs inside CORS: 429s still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -55,37 +99,69 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Last-Modified", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"],
 )
 
 @app.middleware("http")
 async def security_headers(request: Request, call_next):
     rid = request.headers.get("x-request-id", str(uuid.uuid4()))
     request_id_ctx.set(rid)
-    start = time.time()
-    try:
-        response: Response = await call_next(request)
-    except Exception as e:
-        logger.exception("unhandled_exception")
-        raise
-    duration = (time.time() - start) * 1000
+    start = time.perf_counter()
+    with track_statements() as sql:
+        try:
+            response: Response = await call_next(request)
+        except Exception as e:
+            logger.exception("unhandled_exception")
+            raise
+    duration = (time.perf_counter() - start) * 1000
+    db_ms, ser_ms = sql.db_time * 1000, sql.serialize_time * 1000
+    app_ms = max(0.0, duration - db_ms - ser_ms)
+    route = request.scope.get("route")
+    budget = QUERY_BUDGETS.get((request.method, getattr(route, "path", None)))
+    if budget is not None and sql.count > budget:
+        logger.warning({"event": "query_budget_exceeded", "route": route.path, "statements": sql.count, "budget": budget})
+        if SQL_BUDGET_ENFORCE:
+            response = JSONResponse(status_code=500, content={"error": "query_budget_exceeded", "request_id": rid})
     response.headers["X-Request-ID"] = rid
     response.headers["X-Content-Type-Options"] = "nosniff"
     response.headers["X-Frame-Options"] = "DENY"
     response.headers["Referrer-Policy"] = "no-referrer"
     response.headers["X-XSS-Protection"] = "1; mode=block"
     response.headers["Permissions-Policy"] = "interest-cohort=()"
-    response.headers["Server-Timing"] = f"total;dur={duration:.2f}"
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.2f};desc="{sql.count} queries", ser;dur={ser_ms:.2f}, '
+        f'app;dur={app_ms:.2f}, total;dur={duration:.2f}'
+    )
+    logger.info({
+        "event": "request", "method": request.method, "route": getattr(route, "path", request.url.path),
+        "status": response.status_code, "total_ms": round(duration, 2), "db_ms": round(db_ms, 2),
+        "db_statements": sql.count, "serialize_ms": round(ser_ms, 2), "app_ms": round(app_ms, 2),
+    })
     return response
 
+# Registered last so it wraps everything above, including 429s and CORS preflights
+app.add_middleware(MetricsMiddleware)
+
+def _refresh_metrics():
+    record_pool("async", pool_snapshot(get_async_engine()))
+    sync_engine = get_engine(create=False)
+    if sync_engine is not None:
+        record_pool("sync", pool_snapshot(sync_engine))
+    record_analytics(analytics.stats())
+    record_logging(log_stats())
+    record_cache("applicants", applicant_cache.stats())
+    record_cache("loans", loan_cache.local.stats())
+    shared = loan_cache.stats()["shared"]
+    if shared is not None:
+        record_cache("loans_shared", shared)
+
+add_refresh_hook(_refresh_metrics)
+
 # ----------------------------------------------------------------------------
 # DB Dependency
 # ----------------------------------------------------------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Async session: queries await the driver instead of blocking the event loop
+get_db = get_async_db
 
 # ----------------------------------------------------------------------------
 # Schemas
@@ -98,6 +174,7 @@ class LoanCreate(BaseModel):
     annual_income: float = Field(..., gt=0)
     employment_status: EmploymentStatus
     credit_score: Optional[int] = Field(None, ge=300, le=850)
+    priority: int = Field(0, ge=0, le=100)
 
     @validator('loan_purpose')
     def strip_purpose(cls, v):
@@ -114,6 +191,51 @@ class LoanOut(BaseModel):
     status: str
     created_at: Optional[str]
 
+class BulkLoanResult(BaseModel):
+    index: int
+    id: uuid.UUID
+    loan_number: str
+
+class BulkLoanError(BaseModel):
+    index: int
+    errors: List[dict]
+
+class BulkIngestOut(BaseModel):
+    received: int
+    succeeded: int
+    failed: int
+    loans: List[BulkLoanResult]
+    errors: List[BulkLoanError]
+
+class ClaimRequest(BaseModel):
+    underwriter_id: uuid.UUID
+
+class ClaimOut(BaseModel):
+    loan_id: uuid.UUID
+    loan_number: str
+    priority: int
+    submitted_at: Optional[datetime]
+    claimed_at: datetime
+    lease_expires_at: datetime
+
+class WorkflowAdvanceRequest(BaseModel):
+    user_id: Optional[uuid.UUID] = None
+    comments: Optional[str] = Field(None, max_length=2000)
+
+class WorkflowStepOut(BaseModel):
+    id: uuid.UUID
+    step_name: str
+    due_date: Optional[datetime] = None
+
+class WorkflowCompletedOut(WorkflowStepOut):
+    step_order: int
+    completed_at: datetime
+    late: bool
+
+class WorkflowAdvanceOut(BaseModel):
+    completed: WorkflowCompletedOut
+    started: Optional[WorkflowStepOut] = None
+
 class HealthOut(BaseModel):
     status: str
     service: str
@@ -126,21 +248,39 @@ class HealthOut(BaseModel):
 # ----------------------------------------------------------------------------
 START_TIME = time.time()
 
+health_monitor = HealthMonitor(
+    get_async_engine,
+    queue_stats=lambda: {"analytics": analytics.stats(), "logging": log_stats()},
+)
+
 @app.on_event("startup")
 async def on_startup():
+    install_hooks()
+    # The listener thread does not survive a fork (gunicorn --preload)
+    start_listener()
+    await analytics.start()
+    await health_monitor.start()
     logger.info("startup event")
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await health_monitor.stop()
+    # Drain queued analytics events to disk before the worker exits
+    await analytics.stop()
+    logger.info("shutdown event")
+    stop_listener()
+
 # ----------------------------------------------------------------------------
 # Error handlers
 # ----------------------------------------------------------------------------
 @app.exception_handler(HTTPException)
 async def http_exc_handler(request: Request, exc: HTTPException):
-    logger.warning(json.dumps({"event": "http_error", "status": exc.status_code, "detail": exc.detail, "rid": request_id_ctx.get()}))
-    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail, "request_id": request_id_ctx.get()})
+    logger.warning({"event": "http_error", "status": exc.status_code, "detail": exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail, "request_id": request_id_ctx.get()}, headers=getattr(exc, "headers", None))
 
 @app.exception_handler(Exception)
 async def unhandled_exc_handler(request: Request, exc: Exception):
-    logger.error(json.dumps({"event": "unhandled_error", "error": str(exc), "rid": request_id_ctx.get()}))
+    logger.error({"event": "unhandled_error", "error": str(exc)})
     return JSONResponse(status_code=500, content={"error": "internal_server_error", "request_id": request_id_ctx.get()})
 
 # ----------------------------------------------------------------------------
@@ -151,78 +291,165 @@ class AnalyticsBatch(BaseModel):
 
 @app.post("/analytics", status_code=202)
 async def ingest_analytics(batch: AnalyticsBatch, request: Request):
-    # Placeholder: in production push to queue or analytics pipeline
-    logger.info(json.dumps({"event": "analytics_ingest", "count": len(batch.events), "rid": request_id_ctx.get()}))
+    # Queued for the background writer; refused outright when the queue is full
+    if not analytics.offer(batch.events, request_id_ctx.get()):
+        raise HTTPException(status_code=503, detail="analytics_queue_full", headers={"Retry-After": "1"})
     return {"accepted": len(batch.events)}
 
+@app.get("/analytics/stats")
+async def analytics_stats():
+    """Accepted / dropped / flushed counters for this worker's pipeline."""
+    return {"pid": os.getpid(), **analytics.stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus exposition; aggregates every worker when PROMETHEUS_MULTIPROC_DIR is set."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit / miss / eviction counters for this worker's caches."""
+    return {"pid": os.getpid(), "loans": loan_cache.stats(), "applicants": applicant_cache.stats()}
+
 # ----------------------------------------------------------------------------
 # Health & readiness
 # ----------------------------------------------------------------------------
 @app.get("/health", response_model=HealthOut)
-async def health(db: Session = Depends(get_db)):
-    try:
-        db.execute(select(1))
-        db_state = "up"
-    except Exception:
-        db_state = "down"
+async def health():
+    # Cached DB state from the health monitor; no session per probe
     return HealthOut(
         status="ok",
         service="loan-origination-api",
         version="2.0.0",
-        db=db_state,
+        db="up" if health_monitor.db_up else "down",
         uptime_seconds=time.time() - START_TIME,
     )
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the worker's event loop is serving requests."""
+    return Response(content=health_monitor.live_body, media_type="application/json")
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness from the monitor's last refresh; 503 on sustained DB failure
+    or pool exhaustion."""
+    return Response(
+        content=health_monitor.ready_body,
+        status_code=200 if health_monitor.ready else 503,
+        media_type="application/json",
+    )
+
+@app.get("/health/pool")
+async def pool_stats():
+    """Connection pool occupancy and wait counters for this worker process."""
+    # The sync engine only exists if something in this worker used it
+    sync_engine = get_engine(create=False)
+    return {
+        "pid": os.getpid(),
+        "async": pool_snapshot(get_async_engine()),
+        "sync": pool_snapshot(sync_engine) if sync_engine is not None else None,
+    }
+
 # ----------------------------------------------------------------------------
 # Loan Endpoints
 # ----------------------------------------------------------------------------
 @app.get("/api/v1/loans", response_model=List[LoanOut])
-async def list_loans(db: Session = Depends(get_db)):
-    stmt = select(LoanORM).limit(200)
-    rows = db.execute(stmt).scalars().all()
-    out: List[LoanOut] = []
-    for r in rows:
-        out.append(LoanOut(
-            id=r.id,
-            loan_number=r.loan_number,
-            applicant_name=f"{getattr(r, 'applicant_first_name', '')} {getattr(r, 'applicant_last_name', '')}".strip() or "Applicant",
-            loan_amount=float(r.loan_amount) if r.loan_amount is not None else 0,
-            loan_purpose=r.loan_purpose,
-            annual_income=float(r.monthly_income or 0) * 12 if hasattr(r, 'monthly_income') and r.monthly_income else float(getattr(r, 'annual_income', 0) or 0),
-            employment_status=r.employment_status.value if r.employment_status else 'unknown',
-            status=r.status.value if r.status else LoanStatus.DRAFT.value,
-            created_at=r.created_at.isoformat() if r.created_at else None
-        ))
-    return out
+async def list_loans(
+    request: Request,
+    status: Optional[LoanStatus] = None,
+    assigned_underwriter_id: Optional[uuid.UUID] = None,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Keyset-paginated listing, newest first: by submission time, drafts by
+    creation time.
+
+    The next page's cursor is returned in ``X-Next-Cursor`` (and as a
+    ``Link: rel="next"`` header) so the body stays a plain list. Responses
+    carry ETag / Last-Modified; a matching If-None-Match gets a 304 after
+    one aggregate query, without the page being loaded or rendered.
+    """
+    filters = []
+    if status is not None:
+        filters.append(LoanORM.status == status)
+    if assigned_underwriter_id is not None:
+        filters.append(LoanORM.assigned_underwriter_id == assigned_underwriter_id)
+    if submitted_from is not None:
+        filters.append(LoanORM.submitted_at >= submitted_from)
+    if submitted_to is not None:
+        filters.append(LoanORM.submitted_at < submitted_to)
+    try:
+        # Validator over exactly the rows this page would hold (plus the
+        # look-ahead row): an insert, update, delete or status change inside
+        # the window moves the count, newest updated_at or oldest key; an
+        # applicant rename moves the newest users.updated_at. The key of row
+        # ``limit`` is the next cursor, which a 304 also carries
+        window = apply_keyset(
+            select(LoanORM.updated_at, User.updated_at.label("applicant_updated_at"), LoanORM.claimed_at,
+                   LISTED_AT.label("listed_at"), LoanORM.id, window_position().label("position"))
+            .join(User, LoanORM.applicant_id == User.id)
+            .where(*filters), cursor, limit,
+        ).subquery()
+        # Projected columns only: no ORM entities or per-row Pydantic models
+        stmt = apply_keyset(loan_list_select().where(*filters), cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    page_end = window.c.position == limit
+    count, loan_modified, applicant_modified, oldest, end_at, end_id, last_claimed = (await db.execute(select(
+        func.count(), func.max(window.c.updated_at), func.max(window.c.applicant_updated_at),
+        func.min(window.c.listed_at), func.max(case((page_end, window.c.listed_at))),
+        func.max(case((page_end, window.c.id))), func.max(window.c.claimed_at),
+    ))).one()
+    last_modified = max(filter(None, (loan_modified, applicant_modified)), default=None)
+    # Claims leave updated_at alone (work_queue.py), but they move loans in
+    # and out of an underwriter's listing
+    claim_version = last_claimed if assigned_underwriter_id is not None else None
+    etag = make_etag(request.url.query, count, loan_modified, applicant_modified, oldest, claim_version)
+    headers = validator_headers(etag, last_modified)
+    # ETag only: a delete, or a row leaving the window, can leave the newest
+    # updated_at where it was, so If-Modified-Since alone cannot tell
+    if is_not_modified(request, etag, None):
+        next_cursor = encode_cursor(end_at, end_id) if count > limit else None
+        return not_modified_response({**headers, **next_page_headers(request.url, next_cursor)})
+    rows, next_cursor = split_page((await db.execute(stmt)).all(), limit)
+    headers.update(next_page_headers(request.url, next_cursor))
+    with serializing():
+        body = render_loan_list(rows)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/api/v1/loans", response_model=LoanOut, status_code=201)
-async def create_loan(payload: LoanCreate, db: Session = Depends(get_db)):
-    # Ensure applicant user exists (simplified)
-    user = db.execute(select(UserORM).where(UserORM.email == f"{payload.applicant_first_name.lower()}.{payload.applicant_last_name.lower()}@example.com")).scalar_one_or_none()
-    if not user:
-        user = UserORM(
-            id=uuid.uuid4(),
-            email=f"{payload.applicant_first_name.lower()}.{payload.applicant_last_name.lower()}@example.com",
-            password_hash="!",  # placeholder
-            first_name=payload.applicant_first_name,
-            last_name=payload.applicant_last_name,
-        )
-        db.add(user)
-        db.flush()
+async def create_loan(payload: LoanCreate, db: AsyncSession = Depends(get_db)):
+    # Reserve the number first: on SQLite the allocator commits on its own
+    # connection and must not wait behind this request's write lock
+    loan_number = await loan_numbers.next()
+    # Resolve the applicant from cache or a single upsert statement
+    email = applicant_email(payload.applicant_first_name, payload.applicant_last_name)
+    applicant_ids = await resolve_applicants(db, [(email, payload.applicant_first_name, payload.applicant_last_name)])
 
     loan = LoanORM(
         id=uuid.uuid4(),
-        applicant_id=user.id,
-        loan_number=f"LN-{int(time.time())}-{str(uuid.uuid4())[:6]}",
+        applicant_id=applicant_ids[email],
+        loan_number=loan_number,
         loan_amount=payload.loan_amount,
         loan_purpose=payload.loan_purpose,
         monthly_income=payload.annual_income / 12,
         employment_status=payload.employment_status,
+        priority=payload.priority,
         status=LoanStatus.SUBMITTED,
+        submitted_at=datetime.utcnow(),
     )
     db.add(loan)
-    db.commit()
-    db.refresh(loan)
+    # The workflow insert is Core: flush the loan first for its foreign key
+    await db.flush()
+    await start_workflows(db, [loan.id])
+    await db.commit()
+    remember_applicants(applicant_ids)
+    await loan_cache.invalidate([loan.id])
     return LoanOut(
         id=loan.id,
         loan_number=loan.loan_number,
@@ -235,22 +462,192 @@ async def create_loan(payload: LoanCreate, db: Session = Depends(get_db)):
         created_at=loan.created_at.isoformat() if loan.created_at else None
     )
 
+def _validation_errors(exc: ValidationError) -> List[dict]:
+    return [{"loc": list(err["loc"]), "msg": err["msg"]} for err in exc.errors()]
+
+async def _write_loan_chunk(db: AsyncSession, chunk, results: List[BulkLoanResult], errors: List[BulkLoanError]):
+    """Upsert the chunk's applicants and insert its loans in one transaction."""
+    try:
+        numbers = await loan_numbers.take(len(chunk))
+        applicant_ids = await resolve_applicants(db, (
+            (applicant_email(p.applicant_first_name, p.applicant_last_name), p.applicant_first_name, p.applicant_last_name)
+            for _, p in chunk
+        ))
+        now = datetime.utcnow()
+        rows = []
+        for (index, p), loan_number in zip(chunk, numbers):
+            monthly_income = round(Decimal(str(p.annual_income)) / 12, 2)
+            rows.append({
+                "id": uuid.uuid4(),
+                "applicant_id": applicant_ids[applicant_email(p.applicant_first_name, p.applicant_last_name)],
+                "loan_number": loan_number,
+                "loan_amount": Decimal(str(p.loan_amount)),
+                "loan_purpose": p.loan_purpose,
+                "monthly_income": monthly_income,
+                # Core insert: no ORM hook fills these in on SQLite
+                "monthly_debt": Decimal(0),
+                "dti_ratio": dti_ratio(0, monthly_income),
+                "employment_status": p.employment_status,
+                "credit_score": p.credit_score,
+                "priority": p.priority,
+                "status": LoanStatus.SUBMITTED,
+                "submitted_at": now,
+                "down_payment": Decimal(0),
+                "dependents": 0,
+                "created_at": now,
+                "updated_at": now,
+            })
+        await insert_loans(db, rows)
+        await start_workflows(db, [row["id"] for row in rows], now)
+        await db.commit()
+        remember_applicants(applicant_ids)
+        await loan_cache.invalidate(row["id"] for row in rows)
+    except Exception as e:
+        await db.rollback()
+        logger.warning({"event": "bulk_chunk_failed", "rows": len(chunk), "error": str(e)})
+        errors.extend(BulkLoanError(index=index, errors=[{"loc": [], "msg": "write_failed"}]) for index, _ in chunk)
+        return
+    results.extend(
+        BulkLoanResult(index=index, id=row["id"], loan_number=row["loan_number"])
+        for (index, _), row in zip(chunk, rows)
+    )
+
+@app.post("/api/v1/loans/bulk", response_model=BulkIngestOut)
+async def bulk_create_loans(
+    request: Request,
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ingest a JSON array or NDJSON stream (application/x-ndjson) of LoanCreate records.
+
+    The whole batch is validated first; valid rows are then written in chunks
+    of ``chunk_size``, each chunk in its own transaction with one applicant
+    upsert and one multi-row INSERT (COPY on asyncpg). Failures are reported
+    per row by their position in the submitted batch.
+    """
+    valid = []
+    errors: List[BulkLoanError] = []
+    received = 0
+    try:
+        async for record, parse_error in iter_records(request):
+            index = received
+            received += 1
+            if parse_error:
+                errors.append(BulkLoanError(index=index, errors=[{"loc": [], "msg": parse_error}]))
+            elif not isinstance(record, dict):
+                errors.append(BulkLoanError(index=index, errors=[{"loc": [], "msg": "expected_object"}]))
+            else:
+                try:
+                    valid.append((index, LoanCreate(**record)))
+                except ValidationError as e:
+                    errors.append(BulkLoanError(index=index, errors=_validation_errors(e)))
+    except BulkPayloadError as e:
+        code = 413 if str(e).startswith("too_many_rows") else 400
+        raise HTTPException(status_code=code, detail=str(e))
+
+    results: List[BulkLoanResult] = []
+    for start in range(0, len(valid), chunk_size):
+        await _write_loan_chunk(db, valid[start:start + chunk_size], results, errors)
+    errors.sort(key=lambda err: err.index)
+    logger.info({"event": "bulk_ingest", "received": received, "succeeded": len(results), "failed": len(errors)})
+    return BulkIngestOut(received=received, succeeded=len(results), failed=len(errors), loans=results, errors=errors)
+
 @app.get("/api/v1/loans/{loan_id}", response_model=LoanOut)
-async def get_loan(loan_id: uuid.UUID, db: Session = Depends(get_db)):
-    loan = db.get(LoanORM, loan_id)
+async def get_loan(loan_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """Served from the read-through loan cache when possible; the cached entry
+    carries its validators, so hits answer conditional requests too."""
+    cached = await loan_cache.get(loan_id)
+    if cached is None:
+        # Not cached if an invalidation lands while this loads (see loan_cache)
+        generation = loan_cache.generation
+        # Applicant joined into the same SELECT; updated_at is the row version
+        row = (await db.execute(
+            loan_list_select().add_columns(LoanORM.updated_at).where(LoanORM.id == loan_id)
+        )).one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="loan_not_found")
+        last_modified = row[-1]
+        with serializing():
+            body = dumps(loan_row_to_dict(row))
+        cached = CachedLoan(make_etag(loan_id, last_modified), last_modified, body)
+        await loan_cache.set(loan_id, cached, generation)
+    headers = validator_headers(cached.etag, cached.last_modified)
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/loans/{loan_id}/full")
+async def get_loan_full(loan_id: uuid.UUID, include: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """Application with its income, assets, liabilities, documents,
+    underwriting decisions and workflow steps, plus server-side totals.
+
+    ``?include=assets,liabilities`` limits the collections loaded; each
+    included collection costs one selectin query regardless of its size.
+    """
+    try:
+        names = parse_include(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"unknown_include: {e}")
+    loan = (await db.execute(full_loan_select(loan_id, names))).scalar_one_or_none()
     if not loan:
         raise HTTPException(status_code=404, detail="loan_not_found")
-    return LoanOut(
-        id=loan.id,
-        loan_number=loan.loan_number,
-        applicant_name="Applicant",  # placeholder until join logic improved
-        loan_amount=float(loan.loan_amount),
-        loan_purpose=loan.loan_purpose,
-        annual_income=float(getattr(loan, 'monthly_income', 0) or 0) * 12,
-        employment_status=loan.employment_status.value if loan.employment_status else 'unknown',
-        status=loan.status.value if loan.status else LoanStatus.DRAFT.value,
-        created_at=loan.created_at.isoformat() if loan.created_at else None
-    )
+    with serializing():
+        body = render_full_loan(loan, names)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/api/v1/loans/{loan_id}/workflow/advance", response_model=WorkflowAdvanceOut)
+async def advance_workflow(loan_id: uuid.UUID, payload: WorkflowAdvanceRequest, db: AsyncSession = Depends(get_db)):
+    """Complete the application's current workflow step and start the next,
+    in one transaction; 409 when no step is open."""
+    try:
+        result = await advance(db, loan_id, payload.user_id, payload.comments)
+    except WorkflowError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    await db.commit()
+    completed = result["completed"]
+    logger.info({"event": "workflow_advanced", "loan_id": str(loan_id), "step": completed["step_name"],
+                 "late": completed["late"]})
+    return WorkflowAdvanceOut(**result)
+
+# ----------------------------------------------------------------------------
+# Underwriting queue
+# ----------------------------------------------------------------------------
+def _claim_out(row) -> ClaimOut:
+    loan_id, loan_number, priority, submitted_at, claimed_at, claim_expires_at = row
+    return ClaimOut(loan_id=loan_id, loan_number=loan_number, priority=priority, submitted_at=submitted_at,
+                    claimed_at=claimed_at, lease_expires_at=claim_expires_at)
+
+@app.post("/api/v1/underwriting/claim-next", response_model=ClaimOut)
+async def claim_next_application(payload: ClaimRequest, db: AsyncSession = Depends(get_db)):
+    """Claim the highest-priority, oldest submitted application not held by
+    anyone. Concurrent callers always get different applications; 204 when
+    the queue is empty. Keep the claim with .../heartbeat before the lease
+    (``lease_expires_at``) runs out."""
+    row = await claim_next(db, payload.underwriter_id)
+    if row is None:
+        if not await may_claim(db, payload.underwriter_id):
+            raise HTTPException(status_code=403, detail="not_an_underwriter")
+        return Response(status_code=204)
+    await loan_cache.invalidate([row[0]])
+    logger.info({"event": "loan_claimed", "loan_id": str(row[0]), "underwriter_id": str(payload.underwriter_id)})
+    return _claim_out(row)
+
+@app.post("/api/v1/underwriting/claims/{loan_id}/heartbeat", response_model=ClaimOut)
+async def renew_application_claim(loan_id: uuid.UUID, payload: ClaimRequest, db: AsyncSession = Depends(get_db)):
+    """Extend the caller's lease; 409 once the claim has been lost."""
+    row = await renew_claim(db, loan_id, payload.underwriter_id)
+    if row is None:
+        raise HTTPException(status_code=409, detail="claim_not_held")
+    return _claim_out(row)
+
+@app.post("/api/v1/underwriting/claims/{loan_id}/release", status_code=204)
+async def release_application_claim(loan_id: uuid.UUID, payload: ClaimRequest, db: AsyncSession = Depends(get_db)):
+    """Hand a claimed application back to the queue."""
+    if not await release_claim(db, loan_id, payload.underwriter_id):
+        raise HTTPException(status_code=409, detail="claim_not_held")
+    await loan_cache.invalidate([loan_id])
+    return Response(status_code=204)
 
 # ----------------------------------------------------------------------------
 # Root
@@ -0,0 +1,98 @@
+"""
+Applicant (User) resolution for loan intake.
+
+Applicants are keyed by email. ``upsert_applicants`` creates any that are
+missing and returns every id with INSERT ... ON CONFLICT (email) ... RETURNING
+statements, which work on Postgres and SQLite >= 3.35. Each statement carries
+at most UPSERT_BATCH rows: every row binds one parameter per column, and
+asyncpg (like SQLite) caps a statement at 32767 parameters.
+
+``resolve_applicants`` puts a per-worker email -> user_id cache in front of
+that upsert. Ids are only cached via ``remember_applicants`` once the caller's
+transaction has committed, so a rolled-back insert never leaves a dangling id
+behind.
+"""
+import importlib
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from database import User, UserRole
+from ttl_cache import TTLCache
+
+applicant_cache = TTLCache(
+    maxsize=int(os.getenv('APPLICANT_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('APPLICANT_CACHE_TTL', '300')),
+)
+# 3000 rows x 10 columns stays under the 32767 bind parameter limit
+UPSERT_BATCH = 3000
+
+
+def applicant_email(first_name: str, last_name: str) -> str:
+    # Placeholder identity until applicants register themselves
+    return f"{first_name.lower()}.{last_name.lower()}@example.com"
+
+
+async def upsert_applicants(db, applicants: Iterable[Tuple[str, str, str]]) -> Dict[str, uuid.UUID]:
+    """Ensure a user exists for each ``(email, first_name, last_name)`` and
+    return ``{email: user_id}``. Duplicate emails are collapsed first since a
+    single ON CONFLICT statement may not touch the same row twice."""
+    rows = {}
+    now = datetime.utcnow()
+    for email, first_name, last_name in applicants:
+        if email not in rows:
+            rows[email] = {
+                "id": uuid.uuid4(),
+                "email": email,
+                "password_hash": "!",  # placeholder
+                "first_name": first_name,
+                "last_name": last_name,
+                "role": UserRole.APPLICANT,
+                "is_active": True,
+                "email_verified": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+    if not rows:
+        return {}
+    # postgresql.insert / sqlite.insert; the dialect module is already loaded
+    # by the engine, so this does not import anything new
+    insert = importlib.import_module(f"sqlalchemy.dialects.{db.get_bind().dialect.name}").insert
+    values = list(rows.values())
+    ids = {}
+    for start in range(0, len(values), UPSERT_BATCH):
+        stmt = insert(User).values(values[start:start + UPSERT_BATCH])
+        # A no-op DO UPDATE (rather than DO NOTHING) makes RETURNING include
+        # rows that already existed
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={"email": stmt.excluded.email},
+        ).returning(User.email, User.id)
+        result = await db.execute(stmt)
+        ids.update(result.all())
+    return ids
+
+
+async def resolve_applicants(db, applicants: Iterable[Tuple[str, str, str]]) -> Dict[str, uuid.UUID]:
+    """Like ``upsert_applicants`` but answers cached emails without a query."""
+    resolved = {}
+    missing = []
+    for applicant in applicants:
+        email = applicant[0]
+        if email in resolved:
+            continue
+        user_id = applicant_cache.get(email)
+        if user_id is None:
+            missing.append(applicant)
+        else:
+            resolved[email] = user_id
+    if missing:
+        resolved.update(await upsert_applicants(db, missing))
+    return resolved
+
+
+def remember_applicants(ids: Dict[str, uuid.UUID]):
+    """Cache ``{email: user_id}`` after the transaction that used them committed."""
+    for email, user_id in ids.items():
+        applicant_cache.set(email, user_id)
@@ -0,0 +1,183 @@
+"""
+Load-balanced auto-assignment of submitted applications to underwriters.
+
+``AutoAssigner`` keeps the open workload of every active UNDERWRITER (the
+applications assigned to them, i.e. ``User.assigned_loans``, that are still
+submitted or under review) in a min-heap built from one GROUP BY query.
+Each unassigned submission goes to the least-loaded underwriter: a heap
+pop/push, O(log n) per application, instead of a COUNT per underwriter per
+application. Applications are taken in work-queue order (priority, then
+oldest submission) and written with one executemany UPDATE per batch.
+
+Only unassigned applications are touched: the UPDATE re-checks
+assigned_underwriter_id IS NULL, so a row claimed meanwhile through
+work_queue.py keeps its claimer. When the batch's rowcount falls short (or
+the driver reports none for executemany, as the Postgres drivers do) one
+SELECT over the batch's ids settles the heap against what was stored.
+
+Workload also falls when applications are decided, outside this process:
+``release`` accounts for it in-process, ``rebuild`` re-reads the aggregate.
+``python db_utils.py assign`` builds the heap once and drains the queue;
+with --watch it keeps the heap, polling for new submissions and rebuilding
+every ASSIGN_REFRESH_SECONDS.
+
+Settings:
+    ASSIGN_BATCH_SIZE        applications per UPDATE (default 1000)
+    ASSIGN_REFRESH_SECONDS   --watch: re-read workloads this often (default 300)
+"""
+import heapq
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, select, update
+
+from database import LoanApplication, LoanStatus, User, UserRole
+
+# Statuses that count towards an underwriter's workload
+OPEN_STATUSES = (LoanStatus.SUBMITTED, LoanStatus.UNDER_REVIEW)
+
+la = LoanApplication.__table__
+users = User.__table__
+
+
+def load_select():
+    """Open workload per active underwriter, zero included: one query."""
+    open_loans = and_(la.c.assigned_underwriter_id == users.c.id, la.c.status.in_(OPEN_STATUSES))
+    return (
+        select(users.c.id, func.count(la.c.id))
+        .select_from(users.outerjoin(la, open_loans))
+        .where(users.c.role == UserRole.UNDERWRITER, users.c.is_active.is_(True))
+        .group_by(users.c.id)
+    )
+
+
+def pending_select(batch_size: int):
+    """Next unassigned submissions in claim order (the work-queue index)."""
+    return (
+        select(la.c.id)
+        .where(la.c.status == LoanStatus.SUBMITTED, la.c.assigned_underwriter_id.is_(None))
+        .order_by(la.c.priority.desc(), la.c.submitted_at, la.c.id)
+        .limit(batch_size)
+    )
+
+
+def assign_statement():
+    return (
+        update(la)
+        .where(la.c.id == bindparam("loan_id"), la.c.assigned_underwriter_id.is_(None),
+               la.c.status == LoanStatus.SUBMITTED)
+        .values(assigned_underwriter_id=bindparam("underwriter_id"))
+    )
+
+
+class LoadHeap:
+    """Min-heap of (load, underwriter id) with lazy invalidation.
+
+    ``loads`` is the source of truth; changing a load pushes a fresh entry
+    and stale entries are dropped when they surface, so every operation is
+    O(log n) and nothing is searched for.
+    """
+
+    def __init__(self, loads: Dict[uuid.UUID, int]):
+        self.loads = dict(loads)
+        self._heap: List[Tuple[int, uuid.UUID]] = [(load, uid) for uid, load in self.loads.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self.loads)
+
+    def _top(self) -> Tuple[int, uuid.UUID]:
+        while self._heap:
+            load, uid = self._heap[0]
+            if self.loads.get(uid) == load:
+                return load, uid
+            heapq.heappop(self._heap)
+        raise IndexError("no underwriters")
+
+    def take(self) -> uuid.UUID:
+        """Least-loaded underwriter, whose load goes up by one."""
+        load, uid = self._top()
+        self.loads[uid] = load + 1
+        heapq.heapreplace(self._heap, (load + 1, uid))
+        return uid
+
+    def adjust(self, uid: uuid.UUID, delta: int):
+        if uid in self.loads:
+            self.loads[uid] = max(0, self.loads[uid] + delta)
+            heapq.heappush(self._heap, (self.loads[uid], uid))
+            # Keep stale entries from piling up between takes
+            if len(self._heap) > 2 * len(self.loads) + 64:
+                self._heap = [(load, u) for u, load in self.loads.items()]
+                heapq.heapify(self._heap)
+
+
+class AutoAssigner:
+    def __init__(self, engine, batch_size: Optional[int] = None):
+        self.engine = engine
+        self.batch_size = batch_size or int(os.getenv('ASSIGN_BATCH_SIZE', '1000'))
+        self.heap: Optional[LoadHeap] = None
+        self.rebuilt_at = 0.0
+        self.rebuilds = 0
+
+    def rebuild(self) -> int:
+        """Reload every active underwriter's workload; returns how many."""
+        with self.engine.connect() as conn:
+            self.heap = LoadHeap(dict(conn.execute(load_select()).all()))
+        self.rebuilt_at = time.monotonic()
+        self.rebuilds += 1
+        return len(self.heap)
+
+    def release(self, underwriter_id: uuid.UUID, count: int = 1):
+        """``count`` of the underwriter's applications left the open statuses."""
+        if self.heap is not None:
+            self.heap.adjust(underwriter_id, -count)
+
+    def assign_pending(self, limit: Optional[int] = None) -> dict:
+        """Assign unassigned submissions until none are left (or ``limit``);
+        one transaction per batch. Returns counts and timings."""
+        if self.heap is None:
+            self.rebuild()
+        stats = {"assigned": 0, "lost": 0, "batches": 0, "underwriters": len(self.heap),
+                 "plan_seconds": 0.0, "seconds": 0.0}
+        started = time.perf_counter()
+        stmt = assign_statement()
+        while self.heap and (limit is None or stats["assigned"] < limit):
+            size = self.batch_size if limit is None else min(self.batch_size, limit - stats["assigned"])
+            with self.engine.begin() as conn:
+                ids = conn.execute(pending_select(size)).scalars().all()
+                if not ids:
+                    break
+                t0 = time.perf_counter()
+                plan = [{"loan_id": loan_id, "underwriter_id": self.heap.take()} for loan_id in ids]
+                stats["plan_seconds"] += time.perf_counter() - t0
+                written = conn.execute(stmt, plan).rowcount
+                lost = 0
+                if not (conn.dialect.supports_sane_multi_rowcount and written == len(plan)):
+                    held = dict(conn.execute(select(la.c.id, la.c.assigned_underwriter_id).where(la.c.id.in_(ids))).all())
+                    lost = self._settle(plan, held)
+            stats["batches"] += 1
+            stats["assigned"] += len(plan) - lost
+            stats["lost"] += lost
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["plan_seconds"] = round(stats["plan_seconds"], 4)
+        return stats
+
+    def _settle(self, plan: List[dict], held: Dict[uuid.UUID, uuid.UUID]) -> int:
+        """Move planned load to whoever actually holds each application."""
+        lost = 0
+        for row in plan:
+            holder = held.get(row["loan_id"])
+            if holder != row["underwriter_id"]:
+                lost += 1
+                self.heap.adjust(row["underwriter_id"], -1)
+                if holder is not None:
+                    self.heap.adjust(holder, 1)
+        return lost
+
+    def workload(self) -> dict:
+        """Spread of open workload across underwriters, as the heap sees it."""
+        loads = list(self.heap.loads.values()) if self.heap else []
+        return {"underwriters": len(loads), "open": sum(loads),
+                "min": min(loads, default=0), "max": max(loads, default=0)}
@@ -0,0 +1,88 @@
+"""
+Concurrent-request benchmark: sync SessionLocal vs async sessions inside async handlers.
+
+Mounts two otherwise identical endpoints on a throwaway FastAPI app -- one that
+calls the synchronous SessionLocal from an ``async def`` handler (the pattern
+app_hardened.py used before), and one that awaits an AsyncSession -- and fires
+concurrent requests at each through an in-process ASGI transport.
+
+Each request runs a query that waits QUERY_MS inside the database (pg_sleep on
+Postgres, an equivalent registered as a SQL function on SQLite) so the
+difference is dominated by whether the event loop is blocked while the
+database works.
+
+Usage: python bench_async_db.py [concurrency] [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+
+from database import SessionLocal, AsyncSessionLocal, DATABASE_URL, engine, get_async_engine
+
+QUERY_MS = 20
+SLOW_QUERY = text(f"SELECT pg_sleep({QUERY_MS / 1000})")
+
+if 'sqlite' in DATABASE_URL.lower():
+    def _register_sleep(dbapi_conn, _record):
+        dbapi_conn.create_function("pg_sleep", 1, time.sleep)
+    event.listen(engine, "connect", _register_sleep)
+    event.listen(get_async_engine().sync_engine, "connect", _register_sleep)
+
+app = FastAPI()
+
+@app.get("/sync")
+async def sync_handler():
+    db = SessionLocal()
+    try:
+        db.execute(SLOW_QUERY)
+    finally:
+        db.close()
+    return {"ok": True}
+
+@app.get("/async")
+async def async_handler():
+    async with AsyncSessionLocal() as db:
+        await db.execute(SLOW_QUERY)
+    return {"ok": True}
+
+async def run(path: str, concurrency: int, total: int):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+        await client.get(path)  # warm the pool
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return total / elapsed, p50, p99
+
+async def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"Database: {DATABASE_URL.split('@')[-1]}")
+    print(f"Concurrency: {concurrency}, requests: {total}")
+    print("=" * 60)
+    for label, path in (("sync session (before)", "/sync"), ("async session (after)", "/async")):
+        rps, p50, p99 = await run(path, concurrency, total)
+        print(f"{label:<24} {rps:8.1f} req/s   p50 {p50:7.1f} ms   p99 {p99:7.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Auto-assignment: COUNT per underwriter per loan vs the workload min-heap.
+
+1. Heap only: ``LoadHeap.take`` for 10 to 100,000 underwriters -- the cost
+   per assignment should grow with log n, not n.
+2. Database: UNDERWRITERS active underwriters (default 200) with uneven
+   existing workloads and PENDING unassigned submissions (default 50,000) in
+   a throwaway SQLite database (or BENCH_DATABASE_URL), assigned
+     per-loan   a COUNT of open applications per underwriter, then an UPDATE,
+                for every application (on a SAMPLE, default 100, extrapolated)
+     heap       ``AutoAssigner.assign_pending`` over the whole queue
+   then checks that the heap agrees with a fresh aggregate and that the
+   workloads end up level.
+
+Usage: python bench_auto_assign.py [underwriters] [pending] [sample]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_auto_assign.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+from sqlalchemy import func, insert, select, update
+
+from assignment_scheduler import OPEN_STATUSES, AutoAssigner, LoadHeap, load_select, pending_select
+from database import Base, get_engine, LoanApplication, LoanStatus, User, UserRole
+
+la = LoanApplication.__table__
+LOAD_CHUNK = 20000
+
+
+def bench_heap():
+    print("LoadHeap.take")
+    print("=" * 60)
+    rng = random.Random(1)
+    for n in (10, 1_000, 100_000):
+        heap = LoadHeap({uuid.uuid4(): rng.randrange(50) for _ in range(n)})
+        takes = 200_000
+        start = time.perf_counter()
+        for _ in range(takes):
+            heap.take()
+        per = (time.perf_counter() - start) / takes
+        print(f"{n:>8,} underwriters  {per * 1e6:6.2f} us/assignment")
+
+
+def seed(engine, underwriters: int, pending: int):
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    rng = random.Random(9)
+    now = datetime.utcnow()
+    applicant = uuid.uuid4()
+    staff = [uuid.uuid4() for _ in range(underwriters)]
+    users = [{"id": applicant, "email": f"assign-{applicant}@example.com", "password_hash": "!",
+              "first_name": "Bench", "last_name": "Applicant", "role": UserRole.APPLICANT}]
+    users += [{"id": uw, "email": f"uw-{uw}@example.com", "password_hash": "!", "first_name": "Bench",
+               "last_name": "Underwriter", "role": UserRole.UNDERWRITER} for uw in staff]
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), users)
+
+    def loan(i, status, underwriter=None):
+        loan_id = uuid.uuid4()
+        return {"id": loan_id, "applicant_id": applicant, "loan_number": f"AA-{loan_id.hex[:14]}",
+                "loan_amount": Decimal("250000.00"), "loan_purpose": "home_purchase", "status": status,
+                "assigned_underwriter_id": underwriter, "priority": rng.choice((0, 0, 1, 5)),
+                "submitted_at": now - timedelta(seconds=i), "created_at": now, "updated_at": now}
+
+    # Existing workloads: open and closed applications, unevenly spread
+    existing = [loan(i, rng.choice(OPEN_STATUSES + (LoanStatus.APPROVED,)), uw)
+                for i, uw in enumerate(uw for uw in staff for _ in range(rng.randrange(40)))]
+    queue = [loan(i, LoanStatus.SUBMITTED) for i in range(pending)]
+    rows = existing + queue
+    for start in range(0, len(rows), LOAD_CHUNK):
+        with engine.begin() as conn:
+            conn.execute(insert(la), rows[start:start + LOAD_CHUNK])
+    return len(existing)
+
+
+def per_loan(engine, sample: int) -> float:
+    """Seconds per application when every assignment counts every workload."""
+    with engine.connect() as conn:
+        staff = conn.execute(select(User.id).where(User.role == UserRole.UNDERWRITER, User.is_active.is_(True))).scalars().all()
+    start = time.perf_counter()
+    for _ in range(sample):
+        with engine.begin() as conn:
+            loan_id = conn.execute(pending_select(1)).scalar()
+            counts = {
+                uw: conn.execute(select(func.count()).select_from(la).where(
+                    la.c.assigned_underwriter_id == uw, la.c.status.in_(OPEN_STATUSES))).scalar()
+                for uw in staff
+            }
+            conn.execute(update(la).where(la.c.id == loan_id).values(assigned_underwriter_id=min(counts, key=counts.get)))
+    return (time.perf_counter() - start) / sample
+
+
+def main():
+    underwriters = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pending = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    sample = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    bench_heap()
+
+    engine = get_engine()
+    start = time.perf_counter()
+    existing = seed(engine, underwriters, pending)
+    print()
+    print(f"Loaded {underwriters} underwriters, {existing:,} existing and {pending:,} pending applications "
+          f"in {time.perf_counter() - start:.1f}s ({os.environ['DATABASE_URL'].split(':')[0]})")
+    print("=" * 60)
+
+    per_app = per_loan(engine, min(sample, pending))
+    remaining = pending - sample
+    print(f"{'per-loan':<10} {per_app * 1e6:>10,.0f} us/loan  ~{per_app * remaining:,.0f}s for the queue "
+          f"({underwriters + 2} queries per loan, sample of {sample})")
+
+    assigner = AutoAssigner(engine)
+    t0 = time.perf_counter()
+    assigner.rebuild()
+    rebuild_s = time.perf_counter() - t0
+    stats = assigner.assign_pending()
+    total = rebuild_s + stats["seconds"]
+    print(f"{'heap':<10} {total / stats['assigned'] * 1e6:>10,.1f} us/loan  {total:.2f}s for {stats['assigned']:,} "
+          f"(rebuild {rebuild_s * 1e3:.0f}ms, heap {stats['plan_seconds'] * 1e3:.0f}ms, {stats['batches']} batches)")
+    print(f"speedup ~{per_app * remaining / total:,.0f}x")
+
+    with engine.connect() as conn:
+        actual = dict(conn.execute(load_select()).all())
+    load = assigner.workload()
+    agrees = actual == assigner.heap.loads
+    print(f"open workload per underwriter {load['min']}-{load['max']}, heap matches database: {agrees}")
+    if not agrees or load["max"] - load["min"] > 1 or stats["assigned"] != remaining:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput benchmark: looping POST /api/v1/loans vs one POST /api/v1/loans/bulk.
+
+Runs the app in-process through an ASGI transport against DATABASE_URL
+(tables are created if missing) and reports applications per second for
+each path, plus the NDJSON variant of the bulk endpoint.
+
+Usage: python bench_bulk_ingest.py [rows]
+"""
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx
+
+from database import Base, engine
+from app_hardened import app
+
+def make_records(n: int):
+    tag = uuid.uuid4().hex[:8]
+    return [
+        {
+            "applicant_first_name": f"bench{i % 500}",
+            "applicant_last_name": tag,
+            "loan_amount": 150000 + i,
+            "loan_purpose": "home_purchase",
+            "annual_income": 85000,
+            "employment_status": "employed",
+            "credit_score": 700,
+        }
+        for i in range(n)
+    ]
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        singles = make_records(rows)
+        start = time.perf_counter()
+        for record in singles:
+            (await client.post("/api/v1/loans", json=record)).raise_for_status()
+        single_rate = rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        r = await client.post("/api/v1/loans/bulk", json=make_records(rows))
+        r.raise_for_status()
+        assert r.json()["succeeded"] == rows, r.json()["errors"][:3]
+        bulk_rate = rows / (time.perf_counter() - start)
+
+        body = "\n".join(json.dumps(rec) for rec in make_records(rows))
+        start = time.perf_counter()
+        r = await client.post("/api/v1/loans/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+        r.raise_for_status()
+        ndjson_rate = rows / (time.perf_counter() - start)
+
+    print(f"Rows per run: {rows}")
+    print("=" * 50)
+    print(f"single POST loop   {single_rate:10.0f} apps/s")
+    print(f"bulk JSON array    {bulk_rate:10.0f} apps/s  ({bulk_rate / single_rate:.1f}x)")
+    print(f"bulk NDJSON        {ndjson_rate:10.0f} apps/s  ({ndjson_rate / single_rate:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
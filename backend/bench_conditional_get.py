@@ -0,0 +1,102 @@
+"""
+Conditional GET benchmark: poll-heavy clients with and without validators.
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL) with loan rows and
+drives app_hardened in-process. Each simulated poller re-fetches the first
+listing page and one loan detail POLLS times; before every CHANGE_EVERY-th
+poll a loan on that page is touched so some polls see fresh data. Compares:
+
+  plain        no validators sent, every poll returns 200 with a body
+  conditional  If-None-Match from the previous response, 304 when unchanged
+
+and reports response bytes and per-request latency for each mode.
+
+Usage: python bench_conditional_get.py
+"""
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_conditional_get.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+
+from database import Base, engine, LoanApplication, User, EmploymentStatus, LoanStatus
+from app_hardened import app
+from loan_cache import loan_cache
+
+ROWS = 5_000
+PAGE = 100
+POLLS = 400
+CHANGE_EVERY = 20
+
+def seed(n: int):
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    user_id = uuid.uuid4()
+    now = datetime.utcnow()
+    ids = [uuid.uuid4() for _ in range(n)]
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "id": user_id, "email": f"bench-{user_id}@example.com", "password_hash": "!",
+            "first_name": "Bench", "last_name": "Applicant",
+        }])
+        conn.execute(insert(LoanApplication.__table__), [{
+            "id": loan_id, "applicant_id": user_id, "loan_number": f"BENCH-{user_id.hex[:8]}-{i}",
+            "loan_amount": Decimal("250000.00"), "loan_purpose": "home_purchase",
+            "monthly_income": Decimal("7083.33"), "employment_status": EmploymentStatus.EMPLOYED,
+            "status": LoanStatus.SUBMITTED, "ssn": "000-00-0000", "current_address": "1 Main St",
+            "submitted_at": now - timedelta(seconds=i), "created_at": now, "updated_at": now,
+        } for i, loan_id in enumerate(ids)])
+    return ids
+
+def touch(loan_id):
+    with engine.begin() as conn:
+        conn.execute(update(LoanApplication.__table__).where(LoanApplication.id == loan_id).values(updated_at=datetime.utcnow()))
+    # Out-of-band write: drop the cached detail as an API write would
+    loan_cache.local.pop(loan_id)
+
+def poll(client, ids, conditional: bool):
+    urls = [f"/api/v1/loans?limit={PAGE}", f"/api/v1/loans/{ids[0]}"]
+    etags = {}
+    latencies, sent, not_modified = [], 0, 0
+    for i in range(POLLS):
+        if i and i % CHANGE_EVERY == 0:
+            touch(ids[i % PAGE if i % 2 else 0])
+        for url in urls:
+            headers = {"If-None-Match": etags[url]} if conditional and url in etags else {}
+            start = time.perf_counter()
+            r = client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            sent += len(r.content)
+            if r.status_code == 304:
+                not_modified += 1
+            else:
+                etags[url] = r.headers["etag"]
+    return latencies, sent, not_modified
+
+def main():
+    ids = seed(ROWS)
+    print(f"Database: {os.environ['DATABASE_URL']}  rows: {ROWS}  page: {PAGE}  polls: {POLLS}  change every: {CHANGE_EVERY}")
+    print("=" * 78)
+    print(f"{'mode':<12} {'requests':>9} {'304s':>6} {'body bytes':>12} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    results = {}
+    with TestClient(app) as client:
+        poll(client, ids, False)  # warm statement caches
+        for mode, conditional in (("plain", False), ("conditional", True)):
+            latencies, sent, not_modified = poll(client, ids, conditional)
+            ms = sorted(l * 1000 for l in latencies)
+            results[mode] = (sent, statistics.mean(ms))
+            print(f"{mode:<12} {len(ms):>9} {not_modified:>6} {sent:>12,} {statistics.mean(ms):>9.2f} "
+                  f"{ms[len(ms) // 2]:>8.2f} {ms[int(len(ms) * 0.95)]:>8.2f}")
+    (plain_bytes, plain_ms), (cond_bytes, cond_ms) = results["plain"], results["conditional"]
+    print(f"\nbytes saved: {1 - cond_bytes / plain_bytes:.1%}   mean latency saved: {1 - cond_ms / plain_ms:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Import-time budget check for the backend's entry points.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+ROUNDS times per module and takes the fastest cumulative time, so disk-cache
+noise doesn't count against the budget. Also fails when a module imports
+something it should only load on demand (the Postgres dialect, DB drivers,
+passlib) -- the usual way cold start creeps back up.
+
+Budgets are in milliseconds and deliberately loose (roughly 1.5x a warm run
+on a small instance); tighten them when a change makes startup cheaper.
+
+Usage: python bench_import_time.py [--top N]
+Exit status is 1 when any budget or lazy-import rule is broken.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROUNDS = 5
+
+BUDGETS_MS = {
+    "database": 650,
+    "db_utils": 750,
+    "seed_data": 750,
+    "app_hardened": 1500,
+}
+
+# Modules that must not be imported just by importing the entry point
+LAZY = {
+    "database": ("sqlalchemy.dialects.postgresql", "psycopg2", "asyncpg", "aiosqlite", "dotenv", "passlib"),
+    "db_utils": ("sqlalchemy.dialects.postgresql", "psycopg2", "asyncpg", "passlib"),
+    "seed_data": ("sqlalchemy.dialects.postgresql", "psycopg2", "asyncpg", "passlib"),
+    "app_hardened": ("sqlalchemy.dialects.postgresql", "psycopg2", "asyncpg", "passlib"),
+}
+
+
+def measure(module: str):
+    """Return (cumulative_us, {imported module: self_us}) for one cold import."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total, selfs = None, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        selfs[name] = int(self_us)
+        if name == module:
+            total = int(cumulative_us)
+    return total, selfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<14} {'best ms':>9} {'budget ms':>10}  status")
+    print("=" * 60)
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(ROUNDS)]
+        best_us, selfs = min(runs, key=lambda r: r[0])
+        best_ms = best_us / 1000
+        leaked = [name for name in LAZY.get(module, ()) if name in selfs]
+        ok = best_ms <= budget and not leaked
+        failed |= not ok
+        print(f"{module:<14} {best_ms:>9.1f} {budget:>10}  {'ok' if ok else 'OVER BUDGET' if not leaked else 'EAGER IMPORT'}")
+        if leaked:
+            print(f"    imported eagerly: {', '.join(leaked)}")
+        for name, self_us in sorted(selfs.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {self_us / 1000:>8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
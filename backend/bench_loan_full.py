@@ -0,0 +1,83 @@
+"""
+Server-time benchmark for GET /api/v1/loans/{id}/full.
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL) with one application
+carrying CHILDREN rows spread across income, assets, liabilities, documents,
+decisions and workflow steps, then times the endpoint in-process and reports
+the statements it issued. Target: under 10 ms for a 50-child application.
+
+Usage: python bench_loan_full.py [children]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_loan_full.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from database import (
+    Base, engine, SessionLocal, User, LoanApplication, ApplicantIncome, ApplicantAsset,
+    ApplicantLiability, Document, UnderwritingDecision, WorkflowStatus, LoanStatus,
+    IncomeType, AssetType, LiabilityType,
+)
+import database
+from app_hardened import app
+from financial_summary import install_hooks
+from loan_views import FULL_COLLECTIONS, full_loan_select
+from sql_stats import track_statements
+
+# The model class shadows the enum of the same name in database.py
+DecisionEnum = UnderwritingDecision.__table__.c.decision.type.enum_class
+
+REPEAT = 200
+
+def seed(children: int) -> uuid.UUID:
+    Base.metadata.create_all(bind=engine)
+    per = max(1, children // 6)
+    with SessionLocal() as db:
+        user = User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com", password_hash="!", first_name="Ada", last_name="Lovelace")
+        loan = LoanApplication(
+            id=uuid.uuid4(), applicant=user, loan_number=f"BENCH-{uuid.uuid4().hex[:10]}",
+            loan_amount=Decimal("300000"), loan_purpose="home_purchase", status=LoanStatus.SUBMITTED,
+            submitted_at=datetime.utcnow(),
+        )
+        db.add(loan)
+        for i in range(per):
+            loan.income_records.append(ApplicantIncome(income_type=IncomeType.SALARY, source=f"Employer {i}", monthly_amount=Decimal("4000")))
+            loan.assets.append(ApplicantAsset(asset_type=AssetType.SAVINGS, description=f"Account {i}", current_value=Decimal("20000"), liquid_amount=Decimal("20000")))
+            loan.liabilities.append(ApplicantLiability(liability_type=LiabilityType.CREDIT_CARD, creditor_name=f"Card {i}", current_balance=Decimal("2500"), monthly_payment=Decimal("75")))
+            loan.documents.append(Document(uploaded_by=user.id, document_type="paystub", file_name=f"p{i}.pdf", file_path=f"/docs/p{i}.pdf", file_size=1024))
+            loan.underwriting_decisions.append(UnderwritingDecision(underwriter_id=user.id, decision=DecisionEnum.PENDING))
+            loan.workflow_status.append(WorkflowStatus(status="pending", step_name=f"step {i}", step_order=i, due_date=datetime.utcnow() + timedelta(days=i)))
+        db.commit()
+        return loan.id
+
+async def main():
+    children = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    install_hooks()
+    loan_id = seed(children)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        url = f"/api/v1/loans/{loan_id}/full"
+        (await client.get(url)).raise_for_status()
+        server_ms = []
+        for _ in range(REPEAT):
+            r = await client.get(url)
+            server_ms.append(float(r.headers["server-timing"].split("dur=")[1].split(",")[0].split(";")[0]))
+    async with database.AsyncSessionLocal() as db:
+        with track_statements() as sql:
+            await db.execute(full_loan_select(loan_id, list(FULL_COLLECTIONS)))
+    server_ms.sort()
+    print(f"Children: {children}, statements per request: {sql.count}, response bytes: {len(r.content)}")
+    print(f"server time p50 {server_ms[len(server_ms) // 2]:.2f} ms  p99 {server_ms[int(len(server_ms) * 0.99) - 1]:.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Loan list serialization benchmark: ORM entities + LoanOut vs projected rows + fast JSON.
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL) with loan rows and
+times, for 200 / 2k / 20k rows, the full read-and-encode path of:
+
+  orm        select(LoanApplication) -> LoanOut per row -> jsonable_encoder -> json
+  projected  loan_list_select() -> render_loan_list (orjson when installed)
+
+Usage: python bench_loan_list.py
+"""
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_loan_list.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+
+from database import Base, engine, SessionLocal, LoanApplication, User, EmploymentStatus, LoanStatus
+from app_hardened import LoanOut
+from loan_views import loan_list_select, render_loan_list
+import fast_json
+
+SIZES = (200, 2_000, 20_000)
+REPEAT = 5
+
+def seed(n: int):
+    Base.metadata.create_all(bind=engine)
+    user_id = uuid.uuid4()
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "id": user_id, "email": f"bench-{user_id}@example.com", "password_hash": "!",
+            "first_name": "Bench", "last_name": "Applicant",
+        }])
+        conn.execute(insert(LoanApplication.__table__), [{
+            "id": uuid.uuid4(), "applicant_id": user_id, "loan_number": f"BENCH-{user_id.hex[:8]}-{i}",
+            "loan_amount": Decimal("250000.00"), "loan_purpose": "home_purchase",
+            "monthly_income": Decimal("7083.33"), "employment_status": EmploymentStatus.EMPLOYED,
+            "status": LoanStatus.SUBMITTED, "ssn": "000-00-0000", "current_address": "1 Main St",
+            "submitted_at": now - timedelta(seconds=i), "created_at": now, "updated_at": now,
+        } for i in range(n)])
+
+def orm_path(n: int) -> bytes:
+    with SessionLocal() as db:
+        rows = db.execute(select(LoanApplication).limit(n)).scalars().all()
+        out = [LoanOut(
+            id=r.id,
+            loan_number=r.loan_number,
+            applicant_name=f"{getattr(r, 'applicant_first_name', '')} {getattr(r, 'applicant_last_name', '')}".strip() or "Applicant",
+            loan_amount=float(r.loan_amount) if r.loan_amount is not None else 0,
+            loan_purpose=r.loan_purpose,
+            annual_income=float(r.monthly_income or 0) * 12 if hasattr(r, 'monthly_income') and r.monthly_income else float(getattr(r, 'annual_income', 0) or 0),
+            employment_status=r.employment_status.value if r.employment_status else 'unknown',
+            status=r.status.value if r.status else LoanStatus.DRAFT.value,
+            created_at=r.created_at.isoformat() if r.created_at else None,
+        ) for r in rows]
+        return json.dumps(jsonable_encoder(out)).encode()
+
+def projected_path(n: int) -> bytes:
+    with SessionLocal() as db:
+        rows = db.execute(loan_list_select().limit(n)).all()
+        return render_loan_list(rows)
+
+def best_ms(fn, n: int) -> float:
+    fn(n)  # warm statement caches
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(n)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    seed(max(SIZES))
+    encoder = "orjson" if fast_json.orjson is not None else "json"
+    print(f"Database: {os.environ['DATABASE_URL']}  encoder: {encoder}")
+    print("=" * 62)
+    print(f"{'rows':>8} {'orm ms':>12} {'projected ms':>14} {'speedup':>10}")
+    for n in SIZES:
+        orm_ms = best_ms(orm_path, n)
+        proj_ms = best_ms(projected_path, n)
+        print(f"{n:>8} {orm_ms:>12.2f} {proj_ms:>14.2f} {orm_ms / proj_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Contention benchmark for the loan number allocator across processes.
+
+Starts several worker processes that each draw loan numbers as fast as they
+can from DATABASE_URL, for a range of block sizes, then checks that every
+number issued is unique. Block size 1 is the one-round-trip-per-number
+baseline.
+
+Usage: python bench_loan_numbers.py [processes] [numbers_per_process]
+"""
+import asyncio
+import multiprocessing as mp
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOCK_SIZES = (1, 10, 100, 1000)
+
+def worker(block_size: int, count: int, queue):
+    from loan_numbers import LoanNumberAllocator
+
+    async def run():
+        allocator = LoanNumberAllocator(block_size=block_size)
+        start = time.perf_counter()
+        numbers = [await allocator.next() for _ in range(count)]
+        return numbers, time.perf_counter() - start, allocator.reservations
+
+    queue.put(asyncio.run(run()))
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    ctx = mp.get_context("spawn")
+    print(f"Processes: {processes}, numbers per process: {count}")
+    print("=" * 66)
+    for block_size in BLOCK_SIZES:
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(block_size, count, queue)) for _ in range(processes)]
+        for p in procs:
+            p.start()
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        issued = [n for numbers, _, _ in results for n in numbers]
+        slowest = max(elapsed for _, elapsed, _ in results)
+        round_trips = sum(r for _, _, r in results)
+        duplicates = len(issued) - len(set(issued))
+        print(f"block {block_size:>5}: {len(issued) / slowest:10.0f} numbers/s  "
+              f"{round_trips:6d} round trips  duplicates: {duplicates}")
+
+if __name__ == "__main__":
+    main()
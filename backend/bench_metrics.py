@@ -0,0 +1,114 @@
+"""
+Metrics overhead benchmark: request latency with MetricsMiddleware on and off.
+
+Runs the same workload in a fresh interpreter per mode (the middleware and
+prometheus_client's storage are chosen at import time):
+
+  off           METRICS_ENABLED=false
+  in-process    METRICS_ENABLED=true, single-process registry
+  multiprocess  METRICS_ENABLED=true, PROMETHEUS_MULTIPROC_DIR set (mmap files)
+
+The workload is REQUESTS cached GET /api/v1/loans/{id} calls through the
+in-process ASGI client -- one of the cheapest routes, so the middleware's
+share of request time is near its worst case. End-to-end numbers on a busy
+or single-CPU host are noisy, so each mode also times the middleware alone
+around a no-op ASGI app and reports that cost as a share of the request.
+A /metrics scrape is timed at the end.
+
+Usage: python bench_metrics.py
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REQUESTS = 3_000
+ROUNDS = 3
+
+def middleware_cost_us(n: int = 20_000) -> float:
+    """Per-request cost of MetricsMiddleware around a no-op app."""
+    from metrics import MetricsMiddleware
+
+    class Route:
+        path = "/api/v1/loans/{loan_id}"
+
+    async def noop(scope, receive, send):
+        scope["route"] = Route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def timed(app) -> float:
+        scope = {"type": "http", "method": "GET", "path": "/"}
+        start = time.perf_counter()
+        for _ in range(n):
+            await app(dict(scope), None, send)
+        return (time.perf_counter() - start) / n
+
+    async def both():
+        wrapped = MetricsMiddleware(noop)
+        await timed(noop), await timed(wrapped)  # warm up
+        wrapped_s = min([await timed(wrapped) for _ in range(ROUNDS)])
+        bare_s = min([await timed(noop) for _ in range(ROUNDS)])
+        return wrapped_s - bare_s
+
+    return max(0.0, asyncio.run(both())) * 1e6
+
+def worker():
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    import logging
+    logging.disable(logging.INFO)
+    from fastapi.testclient import TestClient
+    from database import Base, engine
+    from app_hardened import app
+
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    with TestClient(app) as client:
+        loan_id = client.post("/api/v1/loans", json={
+            "applicant_first_name": "Bench", "applicant_last_name": "Metrics", "loan_amount": 250000,
+            "loan_purpose": "home_purchase", "annual_income": 85000, "employment_status": "employed",
+        }).json()["id"]
+        url = f"/api/v1/loans/{loan_id}"
+        for _ in range(200):
+            client.get(url)
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get(url)
+            best = min(best, (time.perf_counter() - start) / REQUESTS)
+        start = time.perf_counter()
+        scrape = client.get("/metrics")
+        scrape_ms = (time.perf_counter() - start) * 1000
+    cost = middleware_cost_us() if os.getenv("METRICS_ENABLED", "true") != "false" else 0.0
+    print(json.dumps({"us_per_request": best * 1e6, "middleware_us": cost, "scrape_ms": scrape_ms, "scrape_bytes": len(scrape.content)}))
+
+def run(mode: str, env: dict) -> dict:
+    tmp = tempfile.mkdtemp()
+    env = {**os.environ, **env, "DATABASE_URL": os.getenv("BENCH_DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")}
+    out = subprocess.run([sys.executable, __file__, "--worker"], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    modes = {
+        "off": {"METRICS_ENABLED": "false"},
+        "in-process": {"METRICS_ENABLED": "true"},
+        "multiprocess": {"METRICS_ENABLED": "true", "PROMETHEUS_MULTIPROC_DIR": tempfile.mkdtemp()},
+    }
+    print(f"{REQUESTS} cached detail GETs per round, best of {ROUNDS}")
+    print("=" * 76)
+    print(f"{'mode':<14} {'us/request':>12} {'vs off':>8} {'middleware us':>15} {'share':>8} {'scrape ms':>11}")
+    baseline = None
+    for mode, env in modes.items():
+        r = run(mode, env)
+        baseline = baseline or r["us_per_request"]
+        print(f"{mode:<14} {r['us_per_request']:>12.1f} {r['us_per_request'] / baseline - 1:>7.1%} "
+              f"{r['middleware_us']:>15.1f} {r['middleware_us'] / baseline:>7.1%} {r['scrape_ms']:>11.2f}")
+
+if __name__ == "__main__":
+    worker() if "--worker" in sys.argv else main()
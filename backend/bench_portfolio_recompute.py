@@ -0,0 +1,116 @@
+"""
+Portfolio DTI/LTV recompute: per-application queries vs set-based chunks.
+
+Loads ROWS applications (default 200,000) with income and liability rows
+into a throwaway SQLite database (or BENCH_DATABASE_URL), then
+  per-row     what calculate_dti_ratio(uuid) per application amounts to: two
+              aggregate queries and an UPDATE per application, on a SAMPLE
+              (default 5,000) and extrapolated
+  set-based   portfolio_ratios.recompute_ratios over every application,
+              then a second run that should change nothing
+
+Usage: python bench_portfolio_recompute.py [rows] [sample]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_portfolio.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+import numpy as np
+from sqlalchemy import func, insert, select, update
+
+from database import (
+    Base, get_engine, ApplicantIncome, ApplicantLiability, IncomeType, LiabilityType,
+    LoanApplication, LoanStatus, User,
+)
+from financial_summary import install_hooks
+from portfolio_ratios import recompute_ratios
+
+LOAD_CHUNK = 20000
+
+
+def seed(engine, n: int):
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    rng = np.random.default_rng(3)
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": user_id, "email": f"portfolio-{user_id}@example.com",
+                                               "password_hash": "!", "first_name": "Bench", "last_name": "Portfolio"}])
+    for start in range(0, n, LOAD_CHUNK):
+        size = min(LOAD_CHUNK, n - start)
+        amounts = rng.uniform(50_000, 900_000, size).round(2).tolist()
+        values = rng.uniform(60_000, 1_200_000, size).round(2).tolist()
+        incomes = rng.uniform(2_000, 25_000, size).round(2).tolist()
+        payments = rng.uniform(0, 6_000, size).round(2).tolist()
+        loans, income_rows, debt_rows = [], [], []
+        for amount, value, income, payment in zip(amounts, values, incomes, payments):
+            loan_id = uuid.uuid4()
+            loans.append({
+                "id": loan_id, "applicant_id": user_id, "loan_number": f"PF-{loan_id.hex[:14]}",
+                "loan_amount": Decimal(str(amount)), "loan_purpose": "home_purchase",
+                "property_value": Decimal(str(value)), "status": LoanStatus.SUBMITTED,
+                "submitted_at": now, "created_at": now, "updated_at": now,
+            })
+            income_rows.append({"id": uuid.uuid4(), "application_id": loan_id, "income_type": IncomeType.SALARY,
+                                "source": "Employer", "monthly_amount": Decimal(str(income))})
+            debt_rows.append({"id": uuid.uuid4(), "application_id": loan_id, "liability_type": LiabilityType.AUTO_LOAN,
+                              "creditor_name": "Bank", "current_balance": Decimal("15000.00"),
+                              "monthly_payment": Decimal(str(payment))})
+        with engine.begin() as conn:
+            conn.execute(insert(LoanApplication.__table__), loans)
+            conn.execute(insert(ApplicantIncome.__table__), income_rows)
+            conn.execute(insert(ApplicantLiability.__table__), debt_rows)
+
+
+def per_row(engine, sample: int) -> float:
+    """Seconds per application for the function-per-row approach."""
+    la = LoanApplication.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(select(la.c.id, la.c.loan_amount, la.c.property_value).limit(sample)).all()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for loan_id, amount, value in rows:
+            income = conn.execute(select(func.coalesce(func.sum(ApplicantIncome.monthly_amount), 0))
+                                  .where(ApplicantIncome.application_id == loan_id)).scalar()
+            debt = conn.execute(select(func.coalesce(func.sum(ApplicantLiability.monthly_payment), 0))
+                                .where(ApplicantLiability.application_id == loan_id)).scalar()
+            dti = round(debt / income * 100, 2) if income else None
+            ltv = round(amount / value * 100, 2) if value else None
+            conn.execute(update(la).where(la.c.id == loan_id).values(
+                monthly_income=income, monthly_debt=debt, dti_ratio=dti, ltv_ratio=ltv))
+    return (time.perf_counter() - start) / len(rows)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    install_hooks()
+    engine = get_engine()
+    start = time.perf_counter()
+    seed(engine, rows)
+    print(f"Loaded {rows:,} applications in {time.perf_counter() - start:.1f}s "
+          f"({os.environ['DATABASE_URL'].split(':')[0]})")
+    print("=" * 70)
+
+    per_app = per_row(engine, min(sample, rows))
+    print(f"{'per-row':<12} {per_app * 1e6:>8.0f} us/app  {1 / per_app:>10,.0f} apps/s  "
+          f"~{per_app * rows:,.1f}s for the portfolio (sample of {min(sample, rows):,})")
+
+    first = recompute_ratios(engine)
+    print(f"{'set-based':<12} {first['seconds'] / rows * 1e6:>8.1f} us/app  {first['rows_per_second']:>10,} apps/s  "
+          f"{first['seconds']:.1f}s, {first['chunks']} chunks, {first['changed']:,} rows changed")
+    print(f"speedup ~{per_app * rows / first['seconds']:.0f}x")
+
+    again = recompute_ratios(engine)
+    print(f"{'rerun':<12} {again['seconds']:.1f}s, {again['changed']:,} rows changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Risk scoring benchmark: NumPy batch vs a per-application Python loop.
+
+1. Scoring only: ROWS synthetic applications (default 1,000,000) scored by
+   ``risk_scoring.score_arrays`` and by ``score_row``, the same rules written
+   as an ordinary per-row function. Both must agree on every decision.
+2. End to end: ``score_pending`` against a throwaway SQLite database (or
+   BENCH_DATABASE_URL) holding DB_ROWS submitted applications with income and
+   liability rows (summaries reconciled after loading), including the
+   decision INSERTs.
+
+Usage: python bench_risk_scoring.py [rows] [db_rows]
+"""
+import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_risk.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+from sqlalchemy import insert
+
+from database import (
+    Base, get_engine, ApplicantIncome, ApplicantLiability, EmploymentStatus, IncomeType,
+    LiabilityType, LoanApplication, LoanStatus, User,
+)
+from financial_summary import reconcile
+from risk_scoring import (
+    APPROVE, CONDITIONAL, EMPLOYMENT_RISK, MORE_INFO, RATIO_MAX, REJECT, RiskConfig,
+    score_arrays, score_pending,
+)
+
+EMPLOYMENT = list(EMPLOYMENT_RISK.values())
+
+
+def synthetic(n: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    loan = rng.uniform(50_000, 2_500_000, n).round(2)
+    missing = rng.random(n)
+    return {
+        "loan_amount": loan,
+        "property_value": np.where(missing < 0.1, np.nan, loan / rng.uniform(0.5, 1.05, n)),
+        "down_payment": np.where(missing < 0.05, 0.0, loan * 0.1),
+        "credit_score": np.where(missing > 0.98, np.nan, rng.integers(450, 850, n).astype(np.float64)),
+        "employment_risk": rng.choice(EMPLOYMENT, n),
+        "monthly_income": np.where(missing > 0.97, np.nan, rng.uniform(2_000, 30_000, n)),
+        "monthly_debt": rng.uniform(0, 12_000, n),
+    }
+
+
+def _risk(value, low, high):
+    if value is None or math.isnan(value):
+        return 1.0
+    return min(1.0, max(0.0, (value - low) / (high - low)))
+
+
+def score_row(loan, property_value, down, credit, employment, income, debt, config):
+    """Reference per-row implementation of risk_scoring.score_arrays."""
+    if math.isnan(property_value) and down > 0:
+        property_value = loan + down
+    dti = min(debt / income * 100, RATIO_MAX) if income > 0 else math.nan
+    ltv = min(loan / property_value * 100, RATIO_MAX) if property_value > 0 else math.nan
+    w = config.weights
+    weighted = (w["dti"] * _risk(dti, 0.0, config.max_dti * 1.5) + w["ltv"] * _risk(ltv, 50.0, config.max_ltv)
+                + w["credit"] * _risk(credit, 800.0, 500.0) + w["employment"] * employment)
+    score = round(weighted * 100.0 / sum(w.values()))
+    if math.isnan(dti) or math.isnan(ltv) or math.isnan(credit):
+        return MORE_INFO, score
+    if score >= config.reject_min or credit < config.min_credit or loan > config.max_loan:
+        return REJECT, score
+    if score <= config.approve_max and dti <= config.max_dti and ltv <= config.max_ltv:
+        return APPROVE, score
+    return CONDITIONAL, score
+
+
+def bench_compute(n: int):
+    config = RiskConfig()
+    cols = synthetic(n)
+    print(f"Scoring {n:,} synthetic applications")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    scored = score_arrays(cols, config)
+    vector_s = time.perf_counter() - start
+
+    rows = zip(*(cols[k].tolist() for k in ("loan_amount", "property_value", "down_payment", "credit_score",
+                                            "employment_risk", "monthly_income", "monthly_debt")))
+    start = time.perf_counter()
+    looped = [score_row(*row, config) for row in rows]
+    loop_s = time.perf_counter() - start
+
+    decisions = np.array([d for d, _ in looped], dtype=np.int8)
+    scores = np.array([s for _, s in looped], dtype=np.int16)
+    mismatches = int((decisions != scored["decision"]).sum() + (scores != scored["risk_score"]).sum())
+
+    print(f"{'per-row loop':<14} {loop_s:>8.3f}s  {n / loop_s:>12,.0f} rows/s")
+    print(f"{'numpy batch':<14} {vector_s:>8.3f}s  {n / vector_s:>12,.0f} rows/s")
+    print(f"speedup {loop_s / vector_s:.1f}x, mismatches: {mismatches}")
+    counts = np.bincount(scored["decision"], minlength=4)
+    print("decisions: " + ", ".join(f"{name}={c}" for name, c in
+                                    zip(("approve", "conditional", "reject", "more_info"), counts)))
+    if mismatches:
+        sys.exit(1)
+
+
+def seed(n: int):
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    cols = synthetic(n, seed=11)
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    statuses = list(EMPLOYMENT_RISK)
+    loans, incomes, debts = [], [], []
+    for i in range(n):
+        loan_id = uuid.uuid4()
+        loans.append({
+            "id": loan_id, "applicant_id": user_id, "loan_number": f"RISK-{loan_id.hex[:12]}",
+            "loan_amount": Decimal(f"{cols['loan_amount'][i]:.2f}"), "loan_purpose": "home_purchase",
+            "property_value": None if math.isnan(cols["property_value"][i]) else Decimal(f"{cols['property_value'][i]:.2f}"),
+            "down_payment": Decimal(f"{cols['down_payment'][i]:.2f}"),
+            "credit_score": None if math.isnan(cols["credit_score"][i]) else int(cols["credit_score"][i]),
+            "employment_status": statuses[i % len(statuses)], "status": LoanStatus.SUBMITTED,
+            "submitted_at": now, "created_at": now, "updated_at": now,
+        })
+        if not math.isnan(cols["monthly_income"][i]):
+            incomes.append({"id": uuid.uuid4(), "application_id": loan_id, "income_type": IncomeType.SALARY,
+                            "source": "Employer", "monthly_amount": Decimal(f"{cols['monthly_income'][i]:.2f}")})
+        for part in (0.6, 0.4):
+            debts.append({"id": uuid.uuid4(), "application_id": loan_id, "liability_type": LiabilityType.CREDIT_CARD,
+                          "creditor_name": "Bank", "current_balance": Decimal("1000.00"),
+                          "monthly_payment": Decimal(f"{cols['monthly_debt'][i] * part:.2f}")})
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": user_id, "email": f"risk-{user_id}@example.com",
+                                               "password_hash": "!", "first_name": "Bench", "last_name": "Risk"}])
+        conn.execute(insert(LoanApplication.__table__), loans)
+        conn.execute(insert(ApplicantIncome.__table__), incomes)
+        conn.execute(insert(ApplicantLiability.__table__), debts)
+    # Core inserts bypass the ORM summary hooks used on SQLite
+    reconcile(engine, repair=True)
+    return engine
+
+
+def bench_database(n: int):
+    print()
+    print(f"End to end: {n:,} submitted applications in {os.environ['DATABASE_URL'].split(':')[0]}")
+    print("=" * 60)
+    engine = seed(n)
+    start = time.perf_counter()
+    stats = score_pending(engine)
+    elapsed = time.perf_counter() - start
+    print(f"scored {stats['scored']:,} in {elapsed:.2f}s ({stats['scored'] / elapsed:,.0f} applications/s)")
+    print(f"fetch {stats['fetch_seconds']:.2f}s, score {stats['score_seconds']:.3f}s, insert {stats['insert_seconds']:.2f}s")
+    print("decisions: " + ", ".join(f"{k}={v}" for k, v in stats["decisions"].items()))
+    again = score_pending(engine)
+    print(f"second run scored {again['scored']} (already decided applications are skipped)")
+
+
+if __name__ == "__main__":
+    bench_compute(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
+    bench_database(int(sys.argv[2]) if len(sys.argv) > 2 else 20_000)
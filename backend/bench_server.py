@@ -0,0 +1,140 @@
+"""
+Server load test: the old sync-worker start command vs gunicorn.conf.py.
+
+Starts each server configuration on a local port against a throwaway SQLite
+database (or BENCH_DATABASE_URL) and drives it with CONNECTIONS keep-alive
+clients for SECONDS per endpoint, using a minimal asyncio HTTP/1.1 client so
+the load generator costs as little CPU as possible:
+
+  sync-2        gunicorn app_hardened:app --workers 2 (previous render.yaml)
+  uvicorn-h11   gunicorn -c gunicorn.conf.py, UvicornH11Worker (asyncio + h11)
+  uvicorn-auto  gunicorn -c gunicorn.conf.py, UvicornWorker (uvloop + httptools
+                when installed)
+
+Endpoints: /health/live (framework overhead) and a cached loan detail.
+The client shares the host with the server, so absolute numbers understate
+a real deployment; the ratios are what matter.
+
+Usage: python bench_server.py
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_server.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+from sqlalchemy import insert
+
+from database import Base, engine, LoanApplication, User, EmploymentStatus, LoanStatus
+
+CONNECTIONS = int(os.getenv("BENCH_CONNECTIONS", "32"))
+SECONDS = float(os.getenv("BENCH_SECONDS", "5"))
+PORT = 8765
+
+CONFIGS = {
+    "sync-2": (["gunicorn", "app_hardened:app", "--workers", "2", "--timeout", "120", "-c", "/dev/null"], {}),
+    "uvicorn-h11": (["gunicorn", "app_hardened:app", "-c", "gunicorn.conf.py"],
+                    {"GUNICORN_WORKER_CLASS": "uvicorn.workers.UvicornH11Worker"}),
+    "uvicorn-auto": (["gunicorn", "app_hardened:app", "-c", "gunicorn.conf.py"], {}),
+}
+
+def seed() -> uuid.UUID:
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    user_id, loan_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "id": user_id, "email": f"bench-{user_id}@example.com", "password_hash": "!",
+            "first_name": "Bench", "last_name": "Server",
+        }])
+        conn.execute(insert(LoanApplication.__table__), [{
+            "id": loan_id, "applicant_id": user_id, "loan_number": f"BENCH-{loan_id.hex[:8]}",
+            "loan_amount": Decimal("250000.00"), "loan_purpose": "home_purchase",
+            "monthly_income": Decimal("7083.33"), "employment_status": EmploymentStatus.EMPLOYED,
+            "status": LoanStatus.SUBMITTED, "ssn": "000-00-0000", "current_address": "1 Main St",
+            "submitted_at": now, "created_at": now, "updated_at": now,
+        }])
+    return loan_id
+
+async def _read_response(reader) -> tuple:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length, close = 0, False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip().lower() == b"close":
+            close = True
+    await reader.readexactly(length)
+    return status, close
+
+async def _client(path: str, deadline: float, counts: dict):
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+            writer.write(request)
+            status, close = await _read_response(reader)
+            counts["ok" if status < 400 else "errors"] += 1
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            counts["errors"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+async def load(path: str) -> dict:
+    counts = {"ok": 0, "errors": 0}
+    deadline = time.perf_counter() + SECONDS
+    await asyncio.gather(*(_client(path, deadline, counts) for _ in range(CONNECTIONS)))
+    return counts
+
+def wait_for_port(timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", PORT)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def main():
+    loan_id = seed()
+    paths = {"/health/live": "/health/live", "loan detail": f"/api/v1/loans/{loan_id}"}
+    print(f"Database: {os.environ['DATABASE_URL']}  connections: {CONNECTIONS}  seconds/endpoint: {SECONDS}  cpus: {os.cpu_count()}")
+    print("=" * 70)
+    print(f"{'config':<14} {'endpoint':<14} {'req/s':>10} {'ok':>9} {'errors':>8}")
+    for name, (cmd, extra_env) in CONFIGS.items():
+        env = {**os.environ, **extra_env, "PORT": str(PORT), "RATE_LIMIT_ENABLED": "false"}
+        cmd = cmd + ["--bind", f"127.0.0.1:{PORT}"]
+        server = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        try:
+            wait_for_port()
+            asyncio.run(load(paths["/health/live"]))  # warm up workers and caches
+            for label, path in paths.items():
+                counts = asyncio.run(load(path))
+                print(f"{name:<14} {label:<14} {counts['ok'] / SECONDS:>10.0f} {counts['ok']:>9} {counts['errors']:>8}")
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+
+if __name__ == "__main__":
+    main()
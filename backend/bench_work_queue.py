@@ -0,0 +1,172 @@
+"""
+Underwriter work queue under contention.
+
+Loads QUEUE submitted applications (default 5,000, random priorities) into a
+throwaway SQLite database (or BENCH_DATABASE_URL), then for 1, 8, 32 and 64
+simulated underwriters -- each an asyncio task on its own pooled connection
+-- claims until the queue is empty, with WORK_MS (default 0) of "review"
+between claims. Per round it checks that
+  * every application was claimed exactly once and the database agrees on
+    who holds it (no double assignment),
+  * a single underwriter receives the applications in priority order,
+and reports claims/s and claim latency percentiles: throughput should hold
+as underwriters are added rather than collapse into a queue behind one row
+lock (a convoy). Finally a lease round: half of the claimers heartbeat, the
+other half go silent; once the short lease lapses only the silent ones'
+applications are claimed again, and their late heartbeats are refused.
+
+Usage: python bench_work_queue.py [queue] [work_ms]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_work_queue.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+# One connection per underwriter: measure row locks, not pool checkout waits
+os.environ.setdefault("DB_POOL_SIZE", "64")
+
+from sqlalchemy import insert, select, update
+
+from database import AsyncSessionLocal, Base, get_async_engine, get_engine, LoanApplication, LoanStatus, User, UserRole
+from work_queue import claim_next, renew_claim
+
+UNDERWRITERS = (1, 8, 32, 64)
+LEASE_ROUND = 16
+LEASE_SECONDS = 2
+
+la = LoanApplication.__table__
+
+
+def seed(n: int):
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    applicant = uuid.uuid4()
+    underwriters = [uuid.uuid4() for _ in range(max(UNDERWRITERS))]
+    users = [{"id": applicant, "email": f"queue-{applicant}@example.com", "password_hash": "!",
+              "first_name": "Bench", "last_name": "Applicant", "role": UserRole.APPLICANT}]
+    users += [{"id": uw, "email": f"uw-{uw}@example.com", "password_hash": "!", "first_name": "Bench",
+               "last_name": "Underwriter", "role": UserRole.UNDERWRITER} for uw in underwriters]
+    loans = []
+    for i in range(n):
+        loan_id = uuid.uuid4()
+        loans.append({
+            "id": loan_id, "applicant_id": applicant, "loan_number": f"WQ-{loan_id.hex[:14]}",
+            "loan_amount": Decimal("250000.00"), "loan_purpose": "home_purchase",
+            "priority": rng.choice((0, 0, 0, 1, 2, 5)), "status": LoanStatus.SUBMITTED,
+            "submitted_at": now - timedelta(seconds=n - i), "created_at": now, "updated_at": now,
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), users)
+        conn.execute(insert(la), loans)
+    return underwriters
+
+
+def reset_queue():
+    with get_engine().begin() as conn:
+        conn.execute(update(la).values(assigned_underwriter_id=None, claimed_at=None, claim_expires_at=None))
+
+
+async def claim(underwriter_id, lease_seconds=None):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        row = await claim_next(db, underwriter_id, lease_seconds)
+    return row, time.perf_counter() - start
+
+
+async def underwriter(underwriter_id, work_s: float, claims: list, latencies: list):
+    while True:
+        row, elapsed = await claim(underwriter_id)
+        latencies.append(elapsed)
+        if row is None:
+            return
+        claims.append((row.id, row.priority, underwriter_id))
+        if work_s:
+            await asyncio.sleep(work_s)
+
+
+async def run_round(underwriters, n: int, work_s: float) -> bool:
+    reset_queue()
+    claims, latencies = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(underwriter(uw, work_s, claims, latencies) for uw in underwriters))
+    elapsed = time.perf_counter() - start
+
+    claimed = {loan_id: uw for loan_id, _, uw in claims}
+    with get_engine().connect() as conn:
+        held = dict(conn.execute(select(la.c.id, la.c.assigned_underwriter_id)).all())
+    doubles = len(claims) - len(claimed)
+    disagree = sum(1 for loan_id, uw in claimed.items() if held.get(loan_id) != uw)
+    ordered = len(underwriters) > 1 or all(a[1] >= b[1] for a, b in zip(claims, claims[1:]))
+    qs = statistics.quantiles(latencies, n=100)
+    print(f"{len(underwriters):>4} underwriters  {len(claims) / elapsed:>8,.0f} claims/s  "
+          f"p50 {qs[49] * 1e3:6.1f}ms  p99 {qs[98] * 1e3:7.1f}ms  max {max(latencies) * 1e3:7.1f}ms  "
+          f"claimed {len(claimed):,}/{n:,}  double {doubles}  mismatched {disagree}"
+          + ("" if ordered else "  OUT OF PRIORITY ORDER"))
+    return doubles == 0 and disagree == 0 and len(claimed) == n and ordered
+
+
+async def lease_round(underwriters) -> bool:
+    """Silent holders lose their claims once the lease lapses; heartbeating
+    holders keep theirs."""
+    reset_queue()
+    holders = underwriters[:LEASE_ROUND]
+    held = {uw: (await claim(uw, LEASE_SECONDS))[0].id for uw in holders}
+    alive, silent = holders[:LEASE_ROUND // 2], holders[LEASE_ROUND // 2:]
+    deadline = time.perf_counter() + LEASE_SECONDS * 1.5
+    while time.perf_counter() < deadline:
+        for uw in alive:
+            async with AsyncSessionLocal() as db:
+                assert await renew_claim(db, held[uw], uw, LEASE_SECONDS) is not None
+        await asyncio.sleep(LEASE_SECONDS / 4)
+
+    # Expired leases sort with everything else; drain enough to reach them
+    with get_engine().begin() as conn:
+        conn.execute(update(la).where(la.c.id.notin_(list(held.values()))).values(status=LoanStatus.UNDER_REVIEW))
+    newcomer = underwriters[-1]
+    taken = set()
+    while True:
+        row, _ = await claim(newcomer, LEASE_SECONDS)
+        if row is None:
+            break
+        taken.add(row.id)
+    refused = 0
+    for uw in silent:
+        async with AsyncSessionLocal() as db:
+            refused += await renew_claim(db, held[uw], uw) is None
+    with get_engine().begin() as conn:
+        conn.execute(update(la).values(status=LoanStatus.SUBMITTED))
+    ok = taken == {held[uw] for uw in silent} and refused == len(silent)
+    print(f"lease {LEASE_SECONDS}s: {len(alive)} heartbeating kept theirs, {len(taken)} of {len(silent)} silent "
+          f"claims reclaimed, {refused} late heartbeats refused" + ("" if ok else "  FAILED"))
+    return ok
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    work_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 0.0) / 1000
+    start = time.perf_counter()
+    underwriters = seed(n)
+    print(f"Loaded {n:,} submitted applications in {time.perf_counter() - start:.1f}s "
+          f"({os.environ['DATABASE_URL'].split(':')[0]}), review time {work_s * 1e3:.0f}ms per claim")
+    print("=" * 110)
+    ok = True
+    for count in UNDERWRITERS:
+        ok &= await run_round(underwriters[:count], n, work_s)
+    ok &= await lease_round(underwriters)
+    await get_async_engine().dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
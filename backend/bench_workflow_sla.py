@@ -0,0 +1,188 @@
+"""
+Workflow SLA tracking: polling workflow_status vs the in-memory timer heap.
+
+1. Tracker only: TIMERS due dates (default 1,000,000) spread over 30 days --
+   cost per add, per tick with nothing due and per breach popped, and memory
+   as measured by tracemalloc next to ``SLATracker.memory_bytes`` and the
+   capacity it reports for WORKFLOW_TIMER_MEMORY_MB.
+2. Database: APPS applications (default 20,000) get the step template in
+   bulk in a throwaway SQLite database (or BENCH_DATABASE_URL); most
+   workflows are then finished, as in a live system where history piles up.
+   Compared per overdue check:
+     scan      the overdue query with indexes bypassed (SQLite only), what a
+               table without idx_workflow_open_due gets
+     indexed   the same query through the partial index
+     heap      ``SLATracker.pop_due`` -- no query unless something is due
+   plus the tracker's reload from the partial index, and a breach round:
+   jumping the clock past the first step's SLA must report every open
+   application exactly once, and not again on the next check or reload.
+
+Usage: python bench_workflow_sla.py [timers] [apps]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+_tmp = os.path.join(tempfile.mkdtemp(), "bench_workflow_sla.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp}")
+
+from sqlalchemy import insert, select, text, update
+
+from database import Base, get_engine, LoanApplication, LoanStatus, User, UserRole, WorkflowStatus
+from workflow_engine import COMPLETED, OVERDUE, SLA_HOURS, TEMPLATE, SLATracker, template_rows
+
+ws = WorkflowStatus.__table__
+# Thousands of breaches are expected; keep their log lines off the report
+logging.getLogger("loan_api.workflow").setLevel(logging.ERROR)
+LOAD_CHUNK = 20000
+FINISHED_SHARE = 0.8
+CHECKS = 20
+
+
+def bench_tracker(n: int):
+    print(f"SLATracker with {n:,} timers")
+    print("=" * 70)
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    dues = [now + timedelta(seconds=rng.randrange(30 * 86400)) for _ in range(n)]
+
+    tracker = SLATracker()
+    start = time.perf_counter()
+    for due in dues:
+        tracker.add(uuid.uuid4(), due)
+    added = time.perf_counter() - start
+
+    # Again under tracemalloc (which slows it down), for the real footprint
+    del tracker
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracker = SLATracker()
+    for due in dues:
+        tracker.add(uuid.uuid4(), due)
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    stats = tracker.stats()
+    print(f"add            {added / n * 1e6:8.2f} us/timer")
+    print(f"memory         {traced / 2**20:8.1f} MiB traced, {stats['memory_bytes'] / 2**20:.1f} MiB estimated "
+          f"({stats['bytes_per_timer']:.0f} B/timer)")
+    print(f"capacity       {stats['capacity']:,} timers in {tracker.memory_budget // 2**20} MiB")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        tracker.pop_due(now)
+    print(f"idle tick      {(time.perf_counter() - start) / 100_000 * 1e6:8.2f} us")
+
+    day = now + timedelta(days=1)
+    start = time.perf_counter()
+    due = tracker.pop_due(day)
+    popped = time.perf_counter() - start
+    expected = sum(1 for when in dues if when <= day)
+    print(f"pop due        {popped / max(len(due), 1) * 1e6:8.2f} us/breach ({len(due):,} due after a day)")
+    return len(due) == expected
+
+
+def seed(engine, apps: int):
+    Base.metadata.create_all(bind=engine, tables=[t for name, t in Base.metadata.tables.items() if name != "audit_logs"])
+    now = datetime.utcnow()
+    applicant = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": applicant, "email": f"wf-{applicant}@example.com",
+                                               "password_hash": "!", "first_name": "Bench", "last_name": "Applicant",
+                                               "role": UserRole.APPLICANT}])
+    loans = [{"id": uuid.uuid4(), "applicant_id": applicant, "loan_number": f"WF-{i:010d}", "loan_amount": 250000,
+              "loan_purpose": "home_purchase", "status": LoanStatus.SUBMITTED, "submitted_at": now,
+              "created_at": now, "updated_at": now} for i in range(apps)]
+    for start in range(0, apps, LOAD_CHUNK):
+        with engine.begin() as conn:
+            conn.execute(insert(LoanApplication.__table__), loans[start:start + LOAD_CHUNK])
+
+    ids = [loan["id"] for loan in loans]
+    start = time.perf_counter()
+    steps = 0
+    for offset in range(0, apps, LOAD_CHUNK // len(TEMPLATE)):
+        rows = template_rows(ids[offset:offset + LOAD_CHUNK // len(TEMPLATE)], now)
+        with engine.begin() as conn:
+            conn.execute(insert(ws), rows)
+        steps += len(rows)
+    instantiated = time.perf_counter() - start
+
+    finished = ids[:int(apps * FINISHED_SHARE)]
+    with engine.begin() as conn:
+        for offset in range(0, len(finished), 1000):
+            conn.execute(update(ws).where(ws.c.application_id.in_(finished[offset:offset + 1000]))
+                         .values(is_completed=True, status=COMPLETED, completed_at=now))
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    return now, steps, instantiated, apps - len(finished)
+
+
+def overdue_query(engine, now: datetime, indexed: bool) -> float:
+    table = "workflow_status" if indexed else "workflow_status NOT INDEXED"
+    # A literal, as the partial index's WHERE: SQLite does not match parameters
+    open_step = "0" if engine.dialect.name == "sqlite" else "false"
+    stmt = text(f"SELECT id FROM {table} WHERE is_completed = {open_step} AND due_date IS NOT NULL "
+                f"AND status != :overdue AND due_date <= :now")
+    params = {"overdue": OVERDUE, "now": now}
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        for _ in range(CHECKS):
+            conn.execute(stmt, params).all()
+    return (time.perf_counter() - start) / CHECKS
+
+
+def bench_database(apps: int) -> bool:
+    engine = get_engine()
+    start = time.perf_counter()
+    now, steps, instantiated, open_apps = seed(engine, apps)
+    print()
+    print(f"Loaded {apps:,} applications, {steps:,} steps ({open_apps:,} workflows open) "
+          f"in {time.perf_counter() - start:.1f}s ({os.environ['DATABASE_URL'].split(':')[0]})")
+    print("=" * 70)
+    print(f"{'instantiate':<12} {steps / instantiated:>12,.0f} steps/s (template of {len(TEMPLATE)}, bulk INSERT)")
+
+    if engine.dialect.name == "sqlite":
+        print(f"{'scan':<12} {overdue_query(engine, now, False) * 1e3:>12.2f} ms/check")
+    print(f"{'indexed':<12} {overdue_query(engine, now, True) * 1e3:>12.2f} ms/check")
+
+    tracker = SLATracker()
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        loaded = tracker.load(conn)
+    reload_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(CHECKS):
+        tracker.check(engine, now)
+    print(f"{'heap':<12} {(time.perf_counter() - start) / CHECKS * 1e3:>12.4f} ms/check "
+          f"(reload {loaded:,} timers in {reload_s * 1e3:.0f}ms)")
+
+    later = now + timedelta(hours=SLA_HOURS[TEMPLATE[0][0]] + 1)
+    start = time.perf_counter()
+    breached = tracker.check(engine, later)
+    breach_s = time.perf_counter() - start
+    again = tracker.check(engine, later)
+    with engine.connect() as conn:
+        reloaded = tracker.load(conn)
+        recorded = conn.execute(select(ws.c.id).where(ws.c.status == OVERDUE)).all()
+    ok = len(breached) == open_apps == len(recorded) and not again and reloaded == 0
+    print(f"breaches     {len(breached):,} of {open_apps:,} open workflows in {breach_s * 1e3:.0f}ms, "
+          f"repeated {len(again)}, after reload {reloaded}" + ("" if ok else "  FAILED"))
+    return ok
+
+
+def main():
+    timers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    apps = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    ok = bench_tracker(timers)
+    ok &= bench_database(apps)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
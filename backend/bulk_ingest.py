@@ -0,0 +1,105 @@
+"""
+Bulk loan application ingestion helpers.
+
+``iter_records`` reads either a JSON array or an NDJSON stream from the
+request. NDJSON is parsed line by line as it arrives, so the raw body is never
+held in full; the endpoint does keep every validated record until the whole
+batch has been checked (at most BULK_MAX_ROWS). ``insert_loans`` writes a
+chunk of prepared loan rows with COPY when running on asyncpg and with a
+multi-row INSERT elsewhere.
+"""
+import json
+import os
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import insert
+
+from database import LoanApplication
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', '50000'))
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '1000'))
+
+LOAN_COLUMNS = (
+    "id", "applicant_id", "loan_number", "loan_amount", "loan_purpose",
+    "monthly_income", "monthly_debt", "dti_ratio", "employment_status", "credit_score", "priority", "status",
+    "submitted_at", "down_payment", "dependents", "created_at", "updated_at",
+)
+
+
+class BulkPayloadError(ValueError):
+    """The request body as a whole is unusable (malformed or too large)."""
+
+
+def _check_size(count: int, max_rows: int):
+    if count > max_rows:
+        raise BulkPayloadError(f"too_many_rows (max {max_rows})")
+
+
+async def iter_records(request, max_rows: int = BULK_MAX_ROWS) -> AsyncIterator[Tuple[object, str]]:
+    """Yield ``(record, parse_error)`` pairs in submission order.
+
+    A malformed NDJSON line only fails that row; a malformed JSON array fails
+    the whole request with BulkPayloadError.
+    """
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype not in NDJSON_TYPES:
+        try:
+            records = json.loads(await request.body())
+        except ValueError:
+            raise BulkPayloadError("invalid_json")
+        if not isinstance(records, list):
+            raise BulkPayloadError("expected_json_array")
+        _check_size(len(records), max_rows)
+        for record in records:
+            yield record, None
+        return
+
+    count = 0
+    buf = b""
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line), None
+        except ValueError as e:
+            return None, f"invalid_json: {e}"
+
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                count += 1
+                _check_size(count, max_rows)
+                yield parse(line)
+    if buf.strip():
+        _check_size(count + 1, max_rows)
+        yield parse(buf)
+
+
+async def insert_loans(db, rows: List[dict]):
+    """Insert prepared loan rows (dicts keyed by LOAN_COLUMNS) in the
+    session's current transaction."""
+    if not rows:
+        return
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        await _copy_loans(conn, rows)
+    else:
+        # executemany of a plain INSERT is batched into multi-row VALUES
+        await conn.execute(insert(LoanApplication.__table__), rows)
+
+
+async def _copy_loans(conn, rows: List[dict]):
+    table = LoanApplication.__table__
+    # Run values through the column types' bind processing so enums etc.
+    # reach COPY in the same form the ORM would write them
+    processors = [table.c[name].type.bind_processor(conn.dialect) for name in LOAN_COLUMNS]
+    records = [
+        tuple(proc(row[name]) if proc else row[name] for name, proc in zip(LOAN_COLUMNS, processors))
+        for row in rows
+    ]
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table.name, records=records, columns=list(LOAN_COLUMNS), schema_name=table.schema,
+    )
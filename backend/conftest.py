@@ -0,0 +1,64 @@
+"""
+Shared pytest setup for the backend tests.
+
+Tests run against a throwaway SQLite database, or TEST_DATABASE_URL; point
+that at a PostgreSQL database to also run the tests marked ``postgres_only``
+(triggers from migrations/). Each test module starts from an empty schema.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'tests.db')}")
+# Analytics segments written by the app stay out of the working tree
+os.environ.setdefault("ANALYTICS_DIR", os.path.join(_tmp, "analytics"))
+
+import pytest
+
+from database import Base, get_engine
+from financial_summary import install_hooks, install_triggers
+
+# What app_hardened / db_utils do at startup, before any connection is opened
+install_hooks()
+
+TABLES = [t for name, t in Base.metadata.tables.items() if name != "audit_logs"]
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+postgres_only = pytest.mark.skipif(
+    not os.environ["DATABASE_URL"].startswith("postgresql"),
+    reason="needs TEST_DATABASE_URL pointing at PostgreSQL",
+)
+
+
+def apply_migration(engine, name: str):
+    """Run one migrations/ script (PostgreSQL only)."""
+    with open(os.path.join(MIGRATIONS_DIR, name)) as f, engine.begin() as conn:
+        conn.exec_driver_sql(f.read())
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """The test database with a fresh schema, and the per-worker caches that
+    remember ids from it emptied."""
+    from applicants import applicant_cache
+    from loan_cache import loan_cache
+
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            install_triggers(conn)
+    applicant_cache.clear()
+    loan_cache.local.clear()
+    yield engine
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    import app_hardened
+
+    with TestClient(app_hardened.app) as c:
+        yield c
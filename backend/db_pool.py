@@ -0,0 +1,158 @@
+"""
+Environment-driven connection pool configuration and per-worker pool statistics.
+
+Settings (all optional):
+    DB_POOL_SIZE        persistent connections per engine per worker (default 5)
+    DB_MAX_OVERFLOW     extra connections allowed under burst (default 10)
+    DB_POOL_TIMEOUT     seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE     recycle connections older than N seconds (default 1800, -1 disables)
+    DB_POOL_PRE_PING    test connections on checkout (default true)
+    DB_PGBOUNCER_MODE   "transaction" when running behind pgbouncer in transaction
+                        pooling mode; disables server-side prepared statements
+
+Engines built with ``engine_kwargs`` use an instrumented QueuePool that counts
+checkouts and how often / how long callers had to wait for a connection, so
+pools can be sized from data. ``pool_snapshot(engine)`` reports those figures.
+"""
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+PGBOUNCER_MODE = os.getenv('DB_PGBOUNCER_MODE', '').strip().lower()
+
+
+class PoolStats:
+    """Counters for one pool. Updated under a lock; reads take a snapshot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record(self, waited: bool, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += elapsed
+                if elapsed > self.max_wait:
+                    self.max_wait = elapsed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_ms": round(self.wait_time * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        # The caller will block when nothing is checked in and overflow is spent
+        waited = (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(True, time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(waited, time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_kwargs(url, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    url = make_url(url)
+    if _is_memory_sqlite(url):
+        # In-memory SQLite needs its single shared connection; leave pooling alone
+        return {}
+    kwargs = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+    if PGBOUNCER_MODE == 'transaction' and url.get_backend_name() == 'postgresql':
+        kwargs["connect_args"] = pgbouncer_connect_args(url.get_driver_name())
+    return kwargs
+
+
+def pgbouncer_connect_args(driver: str) -> dict:
+    """Disable server-side prepared statements, which pgbouncer's transaction
+    mode cannot route back to the backend that prepared them."""
+    if driver == 'asyncpg':
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    if driver == 'psycopg':
+        return {"prepare_threshold": None}
+    # psycopg2 does not prepare statements server-side
+    return {}
+
+
+def pool_snapshot(engine) -> dict:
+    """Current occupancy and cumulative counters for ``engine``'s pool."""
+    pool = engine.pool
+    snap = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snap.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        snap.update(stats.snapshot())
+    return snap
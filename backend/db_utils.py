@@ -5,15 +5,23 @@ Provides functions to initialize, reset, and manage the database
 
 import os
 import sys
+import time
 from sqlalchemy import create_engine, text
-from database import Base, engine, DATABASE_URL
+from database import Base, get_engine, database_url
+from financial_summary import install_hooks
 from seed_data import create_seed_data
 
 def create_database():
     """Create all database tables"""
     try:
         print("Creating database tables...")
+        engine = get_engine()
         Base.metadata.create_all(bind=engine)
+        if engine.dialect.name == "postgresql":
+            # Summary-maintenance triggers that migrations/003 installs elsewhere
+            from financial_summary import install_triggers
+            with engine.begin() as conn:
+                install_triggers(conn)
         print("✅ Database tables created successfully!")
         return True
     except Exception as e:
@@ -24,7 +32,7 @@ def drop_database():
     """Drop all database tables"""
     try:
         print("Dropping database tables...")
-        Base.metadata.drop_all(bind=engine)
+        Base.metadata.drop_all(bind=get_engine())
         print("✅ Database tables dropped successfully!")
         return True
     except Exception as e:
@@ -41,9 +49,9 @@ def reset_database():
 def check_database_connection():
     """Test database connection"""
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             # Use a query that works with both PostgreSQL and SQLite
-            if 'sqlite' in DATABASE_URL.lower():
+            if 'sqlite' in database_url().lower():
                 result = conn.execute(text("SELECT sqlite_version()"))
                 version = result.fetchone()[0]
                 print(f"✅ Database connection successful!")
@@ -61,7 +69,7 @@ def check_database_connection():
 def show_table_info():
     """Show information about database tables"""
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             # Get table names
             result = conn.execute(text("""
                 SELECT table_name 
@@ -113,8 +121,121 @@ def initialize_database():
             return False
     return False
 
+def score_applications(limit=None, dry_run=False):
+    """Score submitted applications and record underwriting decisions"""
+    try:
+        from risk_scoring import score_pending
+    except ImportError as e:
+        print(f"❌ Risk scoring needs numpy (requirements.txt / requirements-hardened.txt): {e}")
+        return False
+
+    try:
+        started = time.perf_counter()
+        stats = score_pending(get_engine(), limit=limit, dry_run=dry_run)
+        elapsed = time.perf_counter() - started
+        verb = "Would record" if dry_run else "Recorded"
+        print(f"✅ {verb} {stats['scored']} decisions in {elapsed:.2f}s "
+              f"({stats['scored'] / elapsed if elapsed else 0:.0f} applications/s)")
+        for decision, count in stats["decisions"].items():
+            print(f"• {decision}: {count}")
+        print(f"fetch {stats['fetch_seconds']:.2f}s, score {stats['score_seconds']:.3f}s, "
+              f"insert {stats['insert_seconds']:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error scoring applications: {e}")
+        return False
+
+def reconcile_summaries(repair=False):
+    """Check loan financial summaries against their income/asset/liability rows"""
+    from financial_summary import reconcile
+
+    try:
+        stats = reconcile(get_engine(), repair=repair)
+        print(f"✅ Checked {stats['checked']} applications in {stats['seconds']:.2f}s: "
+              f"{stats['drifted']} drifted, {stats['repaired']} repaired")
+        for column, count in stats["columns"].items():
+            print(f"• {column}: {count}")
+        if stats["sample"]:
+            print(f"e.g. {', '.join(stats['sample'])}")
+        return stats["drifted"] == stats["repaired"]
+    except Exception as e:
+        print(f"❌ Error reconciling summaries: {e}")
+        return False
+
+def recompute_ratios(statuses=None, chunk_size=None):
+    """Recompute DTI/LTV for all (or the given statuses') applications"""
+    from database import LoanStatus
+    from portfolio_ratios import recompute_ratios as recompute
+
+    try:
+        stats = recompute(get_engine(), statuses=[LoanStatus(s) for s in statuses or ()], chunk_size=chunk_size)
+        print(f"✅ Scanned {stats['scanned']} applications in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second'] or 0} applications/s, {stats['chunks']} chunks)")
+        print(f"• rows changed: {stats['changed']}")
+        if stats["max_dti_ratio"] is not None:
+            print(f"• over max DTI ({stats['max_dti_ratio']:g}%): {stats['over_max_dti']}")
+        return True
+    except Exception as e:
+        print(f"❌ Error recomputing ratios: {e}")
+        return False
+
+def assign_applications(limit=None, watch=None):
+    """Assign unassigned submitted applications to the least-loaded underwriters"""
+    from assignment_scheduler import AutoAssigner
+
+    try:
+        assigner = AutoAssigner(get_engine())
+        if not assigner.rebuild():
+            print("❌ No active underwriters to assign to")
+            return False
+        refresh = float(os.getenv('ASSIGN_REFRESH_SECONDS', '300'))
+        while True:
+            stats = assigner.assign_pending(limit=limit)
+            if stats["assigned"] or stats["lost"] or not watch:
+                load = assigner.workload()
+                print(f"✅ Assigned {stats['assigned']} applications in {stats['seconds']:.2f}s "
+                      f"({stats['batches']} batches, {stats['lost']} claimed elsewhere); "
+                      f"open workload {load['min']}-{load['max']} across {load['underwriters']} underwriters")
+            if not watch:
+                return True
+            time.sleep(watch)
+            if time.monotonic() - assigner.rebuilt_at >= refresh:
+                assigner.rebuild()
+    except KeyboardInterrupt:
+        return True
+    except Exception as e:
+        print(f"❌ Error assigning applications: {e}")
+        return False
+
+def monitor_workflows(ticks=None):
+    """Watch open workflow steps and record SLA breaches as they happen"""
+    from log_pipeline import configure_logging, stop_listener
+    from workflow_engine import SLATracker, run_monitor
+
+    # sla_breach events go to loan_api.workflow: JSON lines on stdout, as
+    # from the app
+    configure_logging("loan_api")
+    tracker = SLATracker()
+    tracker.on_breach.append(lambda event: print(
+        f"⚠️  SLA breach: {event['step_name']} on application {event['application_id']} (due {event['due_date']})"
+    ))
+    try:
+        run_monitor(get_engine(), tracker, ticks=ticks)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"❌ Error monitoring workflows: {e}")
+        return False
+    finally:
+        stop_listener()
+    stats = tracker.stats()
+    print(f"✅ {stats['breaches']} breaches recorded; tracking {stats['timers']} open steps "
+          f"in ~{stats['memory_bytes'] / 1024:.0f} KiB (capacity ~{stats['capacity'] or 0:,} within the budget)")
+    return True
+
 def main():
     """Main CLI interface"""
+    install_hooks()
     if len(sys.argv) < 2:
         print("🏦 Loan Origination System - Database Manager")
         print("=" * 50)
@@ -127,6 +248,11 @@ def main():
         print("  test     - Test database connection")
         print("  info     - Show database table information")
         print("  seed     - Create seed data only")
+        print("  score    - Score submitted applications [--limit N] [--dry-run]")
+        print("  reconcile - Check loan financial summaries for drift [--repair]")
+        print("  recompute - Recompute DTI/LTV portfolio-wide [--status a,b] [--chunk N]")
+        print("  assign   - Assign submitted applications by underwriter workload [--limit N] [--watch SECONDS]")
+        print("  workflow-monitor - Record workflow SLA breaches as steps fall due [--ticks N]")
         return
     
     command = sys.argv[1].lower()
@@ -151,6 +277,29 @@ def main():
         show_table_info()
     elif command == "seed":
         create_seed_data()
+    elif command == "score":
+        args = sys.argv[2:]
+        limit = int(args[args.index("--limit") + 1]) if "--limit" in args else None
+        score_applications(limit=limit, dry_run="--dry-run" in args)
+    elif command == "recompute":
+        args = sys.argv[2:]
+        statuses = args[args.index("--status") + 1].split(",") if "--status" in args else None
+        chunk_size = int(args[args.index("--chunk") + 1]) if "--chunk" in args else None
+        recompute_ratios(statuses=statuses, chunk_size=chunk_size)
+    elif command == "assign":
+        args = sys.argv[2:]
+        limit = int(args[args.index("--limit") + 1]) if "--limit" in args else None
+        watch = float(args[args.index("--watch") + 1]) if "--watch" in args else None
+        if not assign_applications(limit=limit, watch=watch):
+            sys.exit(1)
+    elif command == "workflow-monitor":
+        args = sys.argv[2:]
+        ticks = int(args[args.index("--ticks") + 1]) if "--ticks" in args else None
+        if not monitor_workflows(ticks=ticks):
+            sys.exit(1)
+    elif command == "reconcile":
+        if not reconcile_summaries(repair="--repair" in sys.argv[2:]):
+            sys.exit(1)
     else:
         print(f"❌ Unknown command: {command}")
         print("Run 'python db_utils.py' for usage information.")
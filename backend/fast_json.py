@@ -0,0 +1,37 @@
+"""
+JSON encoding with orjson when it is installed, the standard library otherwise.
+
+``dumps`` returns bytes in both cases and understands the types our rows
+carry (UUID, datetime, date, Decimal, Enum) so callers can hand it database
+values without converting them first.
+"""
+import datetime
+import decimal
+import enum
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default)
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
@@ -5,7 +5,7 @@ from typing import List, Optional
 import os
 from dotenv import load_dotenv
 from database_sqlite import SessionLocal, User, LoanApplication as LoanApplicationModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 load_dotenv()
 
@@ -57,7 +57,8 @@ async def health_check():
 @app.get("/api/v1/loans")
 async def get_loans(db: Session = Depends(get_db)):
     """Get all loan applications"""
-    loans = db.query(LoanApplicationModel).all()
+    # Eager-load applicants in the same query instead of one SELECT per loan
+    loans = db.query(LoanApplicationModel).options(joinedload(LoanApplicationModel.applicant)).all()
     return [
         {
             "id": loan.id,
@@ -76,7 +77,12 @@ async def get_loans(db: Session = Depends(get_db)):
 @app.get("/api/v1/loans/{loan_id}")
 async def get_loan(loan_id: str, db: Session = Depends(get_db)):
     """Get a specific loan application"""
-    loan = db.query(LoanApplicationModel).filter(LoanApplicationModel.id == loan_id).first()
+    loan = (
+        db.query(LoanApplicationModel)
+        .options(joinedload(LoanApplicationModel.applicant))
+        .filter(LoanApplicationModel.id == loan_id)
+        .first()
+    )
     if not loan:
         raise HTTPException(status_code=404, detail="Loan application not found")
     
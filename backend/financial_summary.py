@@ -0,0 +1,293 @@
+"""
+Incrementally maintained financial summaries on loan applications.
+
+``LoanApplication.monthly_income``, ``total_assets`` and ``total_liabilities``
+follow the sums of the application's ApplicantIncome / ApplicantAsset /
+ApplicantLiability rows, ``monthly_debt`` the sum of liability payments, and
+``dti_ratio`` is monthly_debt / monthly_income * 100. Until an application
+has its first itemised row of a kind the figure stated at application time
+stands; the first row replaces it. Whether a row is the first is read from
+the application's own counter (income_items / asset_items /
+liability_items), never from whether sibling rows exist: rows inserted
+together, in one flush or one multi-row INSERT, all see each other.
+Reading DTI is therefore one row lookup.
+
+Every change is applied as a delta to the single affected application:
+  * PostgreSQL: row triggers from migrations/003_financial_summaries.sql as
+    revised by 008_financial_summary_counts.sql (``install_triggers`` applies
+    both to create_all() databases)
+  * other dialects: the ORM hooks below, registered by ``install_hooks``
+    (called at startup by app_hardened.py and db_utils.py). Core / bulk
+    statements on the child tables bypass them, as do ``Query.delete()`` /
+    ``update()``.
+
+DTI is rounded half up to the cent by one rule everywhere: ``dti_ratio``
+here, which reconcile uses and which backs the SQLite hooks and recompute
+through a ``loan_dti_ratio()`` SQL function of the same name as the
+PostgreSQL one (NUMERIC ROUND, also half up). SQLite's own round() works on
+binary floats and would round x.xx5 down.
+
+Either way the application's cached detail (loan_cache.py) is dropped once
+the session commits.
+
+``reconcile`` recomputes the summaries from the child rows, reports drift and
+optionally repairs it -- after bulk loads on SQLite, or as a periodic check.
+
+Settings:
+    RECONCILE_BATCH_SIZE   applications checked per query (default 5000)
+"""
+import os
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import Numeric, bindparam, case, event, func, inspect, literal, select, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.pool import Pool
+
+from database import ApplicantAsset, ApplicantIncome, ApplicantLiability, LoanApplication
+from loan_cache import after_commit, after_rollback, invalidate_after_commit
+
+MIGRATIONS = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations", name)
+    for name in ("003_financial_summaries.sql", "008_financial_summary_counts.sql", "009_dti_ratio_precision.sql")
+)
+
+# child model -> ((child column, summary column), ...)
+SUMMARIES = {
+    ApplicantIncome: (("monthly_amount", "monthly_income"),),
+    ApplicantAsset: (("current_value", "total_assets"),),
+    ApplicantLiability: (("current_balance", "total_liabilities"), ("monthly_payment", "monthly_debt")),
+}
+# child model -> its row counter on loan_applications
+ITEM_COUNTS = {
+    ApplicantIncome: "income_items",
+    ApplicantAsset: "asset_items",
+    ApplicantLiability: "liability_items",
+}
+
+DTI_MAX = Decimal("999.99")
+CENT = Decimal("0.01")
+
+
+def dti_ratio(monthly_debt, monthly_income) -> Optional[Decimal]:
+    """Same rule as loan_dti_ratio() in the migration; None without income."""
+    if not monthly_income or monthly_income <= 0:
+        return None
+    ratio = (Decimal(str(monthly_debt or 0)) / Decimal(str(monthly_income)) * 100).quantize(CENT, ROUND_HALF_UP)
+    return min(ratio, DTI_MAX)
+
+
+def dti_select(application_id):
+    """DTI for one application: a primary-key lookup, no aggregation."""
+    return select(LoanApplication.dti_ratio).where(LoanApplication.id == application_id)
+
+
+# ----------------------------------------------------------------------------
+# ORM hooks (dialects without the triggers)
+# ----------------------------------------------------------------------------
+def _maintained_by_hooks(connection) -> bool:
+    return connection.dialect.name != "postgresql"
+
+
+def _sql_dti_ratio(monthly_debt, monthly_income) -> Optional[float]:
+    ratio = dti_ratio(monthly_debt, monthly_income)
+    return None if ratio is None else float(ratio)
+
+
+def _register_functions(dbapi_connection, connection_record):
+    # sqlite3 and SQLAlchemy's aiosqlite adapter; PostgreSQL has the
+    # migrations' loan_dti_ratio() and its drivers no create_function
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("loan_dti_ratio", 2, _sql_dti_ratio, deterministic=True)
+
+
+def _apply(connection, model, application_id, amounts: dict, sign: int):
+    """Add (sign=1) or remove (sign=-1) one child row's amounts."""
+    la = LoanApplication.__table__
+    items = la.c[ITEM_COUNTS[model]]
+    # SET reads the row as of this UPDATE, after any earlier row's, so the
+    # counter says whether this is the application's first row of the kind
+    new = {items: items + 1 if sign > 0 else case((items > 0, items - 1), else_=0)}
+    for column, amount in amounts.items():
+        amount = literal(amount or 0, Numeric(12, 2))
+        current = func.coalesce(la.c[column], 0)
+        base = case((items > 0, current), else_=0) if sign > 0 else current
+        new[la.c[column]] = func.round(base + amount if sign > 0 else base - amount, 2)
+    income = new.get(la.c.monthly_income, la.c.monthly_income)
+    debt = new.get(la.c.monthly_debt, la.c.monthly_debt)
+    if la.c.monthly_income in new or la.c.monthly_debt in new:
+        new[la.c.dti_ratio] = func.loan_dti_ratio(debt, income)
+    connection.execute(update(la).where(la.c.id == application_id).values(new))
+
+
+def _amounts(model, get) -> dict:
+    return {summary: get(source) for source, summary in SUMMARIES[model]}
+
+
+def _invalidate(target, *application_ids):
+    session = object_session(target)
+    if session is not None:
+        invalidate_after_commit(session, application_ids)
+
+
+def _after_insert(mapper, connection, target):
+    _invalidate(target, target.application_id)
+    if _maintained_by_hooks(connection):
+        model = mapper.class_
+        _apply(connection, model, target.application_id, _amounts(model, lambda a: getattr(target, a)), 1)
+
+
+def _after_delete(mapper, connection, target):
+    _invalidate(target, target.application_id)
+    if _maintained_by_hooks(connection):
+        model = mapper.class_
+        _apply(connection, model, target.application_id, _amounts(model, lambda a: getattr(target, a)), -1)
+
+
+def _after_update(mapper, connection, target):
+    model = mapper.class_
+    state = inspect(target)
+    watched = ["application_id"] + [source for source, _ in SUMMARIES[model]]
+    if not any(state.attrs[name].history.has_changes() for name in watched):
+        return
+
+    def old(name):
+        deleted = state.attrs[name].history.deleted
+        return deleted[0] if deleted else getattr(target, name)
+
+    _invalidate(target, old("application_id"), target.application_id)
+    if not _maintained_by_hooks(connection):
+        return
+    _apply(connection, model, old("application_id"), _amounts(model, old), -1)
+    _apply(connection, model, target.application_id, _amounts(model, lambda a: getattr(target, a)), 1)
+
+
+def _set_dti(mapper, connection, target):
+    if _maintained_by_hooks(connection):
+        target.dti_ratio = dti_ratio(target.monthly_debt, target.monthly_income)
+
+
+def _loan_updated(mapper, connection, target):
+    _invalidate(target, target.id)
+
+
+def install_hooks():
+    """Register the summary hooks, the loan cache invalidation on commit and
+    SQLite's loan_dti_ratio(). Call once at process start, before the first
+    connection or session; repeated calls are no-ops."""
+    if event.contains(LoanApplication, "before_update", _set_dti):
+        return
+    for model in SUMMARIES:
+        event.listen(model, "after_insert", _after_insert)
+        event.listen(model, "after_update", _after_update)
+        event.listen(model, "after_delete", _after_delete)
+    event.listen(LoanApplication, "before_insert", _set_dti)
+    event.listen(LoanApplication, "before_update", _set_dti)
+    event.listen(LoanApplication, "after_update", _loan_updated)
+    event.listen(Session, "after_commit", after_commit)
+    event.listen(Session, "after_rollback", after_rollback)
+    event.listen(Pool, "connect", _register_functions)
+
+
+def install_triggers(connection):
+    """Apply migrations/003, 008 and 009 (columns, triggers, backfill) on PostgreSQL."""
+    for path in MIGRATIONS:
+        with open(path) as f:
+            connection.exec_driver_sql(f.read())
+
+
+# ----------------------------------------------------------------------------
+# Reconciliation
+# ----------------------------------------------------------------------------
+def _child_sum(model, column):
+    return (
+        select(func.sum(getattr(model, column)))
+        .where(model.application_id == LoanApplication.id)
+        .scalar_subquery()
+    )
+
+
+def _child_count(model):
+    return select(func.count()).where(model.application_id == LoanApplication.id).scalar_subquery()
+
+
+# Summary and counter columns, in _reconcile_select / expected_summary order
+COLUMNS = ("monthly_income", "total_assets", "total_liabilities", "monthly_debt", "dti_ratio",
+           "income_items", "asset_items", "liability_items")
+
+
+def _reconcile_select(batch_size: int, after=None):
+    la = LoanApplication
+    stmt = select(
+        la.id, *(getattr(la, name) for name in COLUMNS),
+        _child_sum(ApplicantIncome, "monthly_amount"),
+        _child_sum(ApplicantAsset, "current_value"),
+        _child_sum(ApplicantLiability, "current_balance"),
+        _child_sum(ApplicantLiability, "monthly_payment"),
+        *(_child_count(model) for model in ITEM_COUNTS),
+    ).order_by(la.id).limit(batch_size)
+    return stmt.where(la.id > after) if after is not None else stmt
+
+
+def _cents(value) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value)).quantize(CENT, ROUND_HALF_UP)
+
+
+def expected_summary(row) -> dict:
+    """Summary and counter columns the child rows imply for one
+    ``_reconcile_select`` row."""
+    (_, income, assets, liabilities, _, _, _, _, _,
+     income_sum, assets_sum, balance_sum, payment_sum, income_rows, asset_rows, liability_rows) = row
+    # No itemised rows of a kind: the stated figure stands
+    expected = {
+        "monthly_income": _cents(income if income_sum is None else income_sum),
+        "total_assets": _cents(assets if assets_sum is None else assets_sum),
+        "total_liabilities": _cents(liabilities if balance_sum is None else balance_sum),
+        "monthly_debt": _cents(payment_sum or 0),
+    }
+    expected["dti_ratio"] = dti_ratio(expected["monthly_debt"], expected["monthly_income"])
+    expected.update(income_items=income_rows, asset_items=asset_rows, liability_items=liability_rows)
+    return expected
+
+
+def reconcile(engine, repair: bool = False, batch_size: Optional[int] = None, sample: int = 10) -> dict:
+    """Compare every application's summaries and row counters with its
+    child rows.
+
+    Returns counts, the drifted columns and up to ``sample`` drifted ids;
+    with ``repair`` the drifted rows are rewritten in one executemany UPDATE
+    per batch.
+    """
+    batch_size = batch_size or int(os.getenv('RECONCILE_BATCH_SIZE', '5000'))
+    stats = {"checked": 0, "drifted": 0, "repaired": 0, "columns": {}, "sample": [], "seconds": 0.0}
+    la = LoanApplication.__table__
+    repair_stmt = update(la).where(la.c.id == bindparam("row_id")).values({name: bindparam(f"new_{name}") for name in COLUMNS})
+    started = time.perf_counter()
+    after = None
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(_reconcile_select(batch_size, after)).all()
+            if not rows:
+                break
+            fixes = []
+            for row in rows:
+                expected = expected_summary(row)
+                stored = dict(zip(COLUMNS, row[1:1 + len(COLUMNS)]))
+                stored.update((name, _cents(stored[name])) for name in COLUMNS[:5])
+                drifted = [name for name, value in expected.items() if stored[name] != value]
+                if not drifted:
+                    continue
+                stats["drifted"] += 1
+                for name in drifted:
+                    stats["columns"][name] = stats["columns"].get(name, 0) + 1
+                if len(stats["sample"]) < sample:
+                    stats["sample"].append(str(row[0]))
+                fixes.append({"row_id": row[0], **{f"new_{name}": value for name, value in expected.items()}})
+            if repair and fixes:
+                conn.execute(repair_stmt, fixes)
+                stats["repaired"] += len(fixes)
+        stats["checked"] += len(rows)
+        after = rows[-1][0]
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,134 @@
+"""
+Gunicorn configuration for app_hardened (ASGI via uvicorn workers).
+
+    gunicorn app_hardened:app -c gunicorn.conf.py
+
+Gunicorn picks this file up automatically when started from backend/.
+Every setting can be overridden from the environment:
+
+    WEB_CONCURRENCY          worker count (default: sized from CPU and memory)
+    WEB_WORKER_MEMORY_MB     memory budgeted per worker when sizing (default 256)
+    GUNICORN_WORKER_CLASS    default uvicorn.workers.UvicornWorker, which uses
+                             uvloop and httptools when installed
+    GUNICORN_PRELOAD         import the app once in the master (default true)
+    GUNICORN_KEEPALIVE       idle keep-alive seconds; keep above the load
+                             balancer's idle timeout (default 75)
+    GUNICORN_BACKLOG         listen backlog (default 2048)
+    GUNICORN_MAX_REQUESTS    recycle a worker after N requests (default 10000)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra so workers don't recycle together (default 1000)
+    GUNICORN_TIMEOUT         worker heartbeat timeout (default 120)
+    GUNICORN_GRACEFUL_TIMEOUT     drain time on restart (default 30)
+"""
+import os
+import shutil
+import tempfile
+
+# ----------------------------------------------------------------------------
+# Worker sizing
+# ----------------------------------------------------------------------------
+def _cpu_count() -> int:
+    """CPUs this process may use, honouring affinity and a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _memory_mb() -> int:
+    """Memory available to the container (cgroup limit) or host, in MiB."""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            return int(limit) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return 1024
+
+
+def _workers() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.getenv("WEB_CONCURRENCY")))
+    # Each async worker multiplexes many requests, so one per CPU (plus one to
+    # cover blocking moments) is enough; memory caps it on small instances
+    by_cpu = _cpu_count() + 1
+    by_memory = max(1, _memory_mb() // int(os.getenv("WEB_WORKER_MEMORY_MB", "256")))
+    return max(1, min(by_cpu, by_memory))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = _workers()
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes", "on")
+
+# ----------------------------------------------------------------------------
+# Connections
+# ----------------------------------------------------------------------------
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Heartbeat files on tmpfs so a slow disk never looks like a hung worker
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = None  # the app logs one structured line per request
+errorlog = "-"
+
+# Several workers share metrics through mmap files; must be set before the
+# app (and prometheus_client) is imported, i.e. here for --preload
+if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(base, "loan_api_metrics")
+metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Samples from a previous run would be aggregated into this one. Cleared here,
+# before --preload imports the app and it creates its metric files; once per
+# master, as a HUP re-reads this file while the workers are still writing
+if metrics_dir and os.getenv("LOAN_API_METRICS_MASTER") != str(os.getpid()):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ["LOAN_API_METRICS_MASTER"] = str(os.getpid())
+if metrics_dir:
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+# ----------------------------------------------------------------------------
+# Hooks
+# ----------------------------------------------------------------------------
+def on_starting(server):
+    server.log.info(
+        "workers=%s class=%s preload=%s keepalive=%s backlog=%s",
+        workers, worker_class, preload_app, keepalive, backlog,
+    )
+
+
+def post_fork(server, worker):
+    # Connections opened in the master (preload) must not be shared by
+    # forked workers: drop them without closing the parent's sockets
+    import database
+    database.dispose_engines_after_fork()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's livesum gauges from /metrics
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from metrics import mark_process_dead
+        mark_process_dead(worker.pid)
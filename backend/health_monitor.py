@@ -0,0 +1,170 @@
+"""
+Cached health state for liveness / readiness probes.
+
+A background task refreshes DB, pool and queue health every HEALTH_INTERVAL
+seconds and pre-renders the probe bodies, so ``/health/live`` and
+``/health/ready`` answer without touching the database or the pool however
+often load balancers probe.
+
+Readiness flips to not-ready when either condition is sustained:
+  * the DB check (``SELECT 1`` on a pooled connection, bounded by
+    HEALTH_DB_TIMEOUT) has failed HEALTH_DB_FAILURES times in a row
+  * the pool has been exhausted (every connection checked out, or checkouts
+    timing out) for at least HEALTH_POOL_EXHAUSTED_SECONDS
+While the pool is exhausted the DB check is skipped: it would only queue
+behind real traffic and then report a false DB failure.
+
+Settings:
+    HEALTH_INTERVAL                 seconds between refreshes (default 2)
+    HEALTH_DB_TIMEOUT               DB check timeout in seconds (default 2)
+    HEALTH_DB_FAILURES              consecutive failures before not-ready (default 2)
+    HEALTH_POOL_EXHAUSTED_SECONDS   exhaustion time before not-ready (default 10)
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+from db_pool import pool_snapshot
+from fast_json import dumps
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        engine_factory: Callable,
+        queue_stats: Optional[Callable[[], dict]] = None,
+        interval: Optional[float] = None,
+        db_timeout: Optional[float] = None,
+        db_failures: Optional[int] = None,
+        pool_exhausted_seconds: Optional[float] = None,
+    ):
+        self.engine_factory = engine_factory
+        self.queue_stats = queue_stats
+        self.interval = interval or float(os.getenv('HEALTH_INTERVAL', '2'))
+        self.db_timeout = db_timeout or float(os.getenv('HEALTH_DB_TIMEOUT', '2'))
+        self.db_failures = db_failures or int(os.getenv('HEALTH_DB_FAILURES', '2'))
+        self.pool_exhausted_seconds = pool_exhausted_seconds or float(os.getenv('HEALTH_POOL_EXHAUSTED_SECONDS', '10'))
+
+        self._task: Optional[asyncio.Task] = None
+        self.checked_at: Optional[float] = None
+        self.db_up = False
+        self.db_latency_ms: Optional[float] = None
+        self.db_error: Optional[str] = None
+        self.consecutive_db_failures = 0
+        self.pool: dict = {}
+        self.pool_exhausted_since: Optional[float] = None
+        self._pool_timeouts = 0
+        self.queues: dict = {}
+        self.ready = False
+        self.reasons = ["starting"]
+        self._render()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        # First check inline so readiness is known before traffic arrives
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # A bug in a check must not kill the monitor; report not-ready
+                self.ready, self.reasons = False, [f"monitor_error: {e}"]
+                self._render()
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+    async def refresh(self):
+        now = time.time()
+        engine = self.engine_factory()
+        exhausted = self._check_pool(engine)
+        if exhausted:
+            if self.pool_exhausted_since is None:
+                self.pool_exhausted_since = now
+        else:
+            self.pool_exhausted_since = None
+            await self._check_db(engine)
+        self.queues = self.queue_stats() if self.queue_stats else {}
+
+        reasons = []
+        if self.consecutive_db_failures >= self.db_failures:
+            reasons.append("db_unavailable")
+        if self.pool_exhausted_since is not None and now - self.pool_exhausted_since >= self.pool_exhausted_seconds:
+            reasons.append("pool_exhausted")
+        if self.db_latency_ms is None and not reasons:
+            # Never ready before the database has answered once
+            reasons.append("starting")
+        self.ready, self.reasons = not reasons, reasons
+        self.checked_at = now
+        self._render()
+
+    def _check_pool(self, engine) -> bool:
+        self.pool = pool_snapshot(engine)
+        timeouts = self.pool.get("timeouts", 0)
+        timed_out = timeouts > self._pool_timeouts
+        self._pool_timeouts = timeouts
+        max_overflow = getattr(engine.pool, "_max_overflow", -1)
+        if "size" not in self.pool or max_overflow < 0:
+            return timed_out
+        return timed_out or self.pool["checked_out"] >= self.pool["size"] + max_overflow
+
+    async def _check_db(self, engine):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._select_one(engine), self.db_timeout)
+        except Exception as e:
+            self.db_up = False
+            self.db_error = type(e).__name__
+            self.consecutive_db_failures += 1
+            return
+        self.db_up = True
+        self.db_error = None
+        self.db_latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        self.consecutive_db_failures = 0
+
+    @staticmethod
+    async def _select_one(engine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # ------------------------------------------------------------------
+    # Probe bodies
+    # ------------------------------------------------------------------
+    def _render(self):
+        self.live_body = dumps({"status": "alive", "pid": os.getpid()})
+        self.ready_body = dumps(self.snapshot())
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "reasons": self.reasons,
+            "pid": os.getpid(),
+            "checked_at": self.checked_at,
+            "db": {
+                "up": self.db_up,
+                "latency_ms": self.db_latency_ms,
+                "error": self.db_error,
+                "consecutive_failures": self.consecutive_db_failures,
+            },
+            "pool": {**self.pool, "exhausted_since": self.pool_exhausted_since},
+            "queues": self.queues,
+        }
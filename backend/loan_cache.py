@@ -0,0 +1,224 @@
+"""
+Read-through cache for serialized loan detail payloads.
+
+Entries hold the rendered JSON body together with its validators (ETag and
+``updated_at``), so a hit answers both plain and conditional GETs without a
+query. Two tiers:
+
+  local   per-worker size-bounded LRU with TTL (``TTLCache``)
+  shared  optional tier behind ``SharedTier`` (e.g. Redis or memcached),
+          consulted on a local miss and refilled into the local tier
+
+Writes made through the API call ``invalidate`` after they commit, which drops
+the ids from this worker's local tier and from the shared tier. Writes that
+bypass the API handlers -- the financial summary hooks (financial_summary.py)
+and the portfolio recompute (portfolio_ratios.py) -- use
+``invalidate_after_commit`` / ``invalidate_nowait``. Other workers' local
+tiers are not notified; their copies age out after LOAN_CACHE_TTL, so keep it
+short.
+
+Every invalidation bumps ``generation``. A read-through load takes the
+generation before its SELECT and hands it to ``set``, which refuses the entry
+if an invalidation happened in between: the row may have been read before
+that write committed.
+
+Settings:
+    LOAN_CACHE_ENABLED     "false" disables the cache (default true)
+    LOAN_CACHE_SIZE        local entries per worker (default 1000)
+    LOAN_CACHE_TTL         local entry lifetime in seconds (default 30)
+    LOAN_CACHE_SHARED      shared tier: "" (none) or "local" for the in-process
+                           stand-in (default none)
+    LOAN_CACHE_SHARED_TTL  shared entry lifetime in seconds (default 300)
+"""
+import asyncio
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, Optional
+
+from ttl_cache import TTLCache
+
+
+class CachedLoan:
+    __slots__ = ("etag", "last_modified", "body")
+
+    def __init__(self, etag: str, last_modified: Optional[datetime], body: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+
+    def to_bytes(self) -> bytes:
+        stamp = self.last_modified.isoformat() if self.last_modified else ""
+        return f"{self.etag}\n{stamp}\n".encode() + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedLoan":
+        etag, stamp, body = data.split(b"\n", 2)
+        return cls(etag.decode(), datetime.fromisoformat(stamp.decode()) if stamp else None, body)
+
+
+class SharedTier(ABC):
+    """Interface for a cache shared by every worker. Values are opaque bytes."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]):
+        ...
+
+
+class LocalSharedTier(SharedTier):
+    """In-process stand-in for a shared tier, for development and tests. It is
+    private to the worker, so it adds nothing over the local tier in production."""
+
+    def __init__(self, maxsize: int = 100000):
+        self._cache = TTLCache(maxsize=maxsize, ttl=300)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, keys: Iterable[str]):
+        for key in keys:
+            self._cache.pop(key)
+
+
+class LoanCache:
+    def __init__(self, local: TTLCache, shared: Optional[SharedTier] = None, shared_ttl: float = 300, enabled: bool = True):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.enabled = enabled
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.stale_loads = 0
+        self._deletes = set()
+
+    @classmethod
+    def from_env(cls) -> "LoanCache":
+        shared = None
+        if os.getenv('LOAN_CACHE_SHARED', '').lower() == 'local':
+            shared = LocalSharedTier()
+        return cls(
+            local=TTLCache(
+                maxsize=int(os.getenv('LOAN_CACHE_SIZE', '1000')),
+                ttl=float(os.getenv('LOAN_CACHE_TTL', '30')),
+            ),
+            shared=shared,
+            shared_ttl=float(os.getenv('LOAN_CACHE_SHARED_TTL', '300')),
+            enabled=os.getenv('LOAN_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no', 'off'),
+        )
+
+    @staticmethod
+    def _key(loan_id: uuid.UUID) -> str:
+        return f"loan:{loan_id}"
+
+    async def get(self, loan_id: uuid.UUID) -> Optional[CachedLoan]:
+        if not self.enabled:
+            return None
+        entry = self.local.get(loan_id)
+        if entry is not None or self.shared is None:
+            return entry
+        data = await self.shared.get(self._key(loan_id))
+        if data is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        entry = CachedLoan.from_bytes(data)
+        self.local.set(loan_id, entry)
+        return entry
+
+    async def set(self, loan_id: uuid.UUID, entry: CachedLoan, generation: Optional[int] = None):
+        """Store ``entry``; with ``generation`` (read before loading it) only
+        if nothing was invalidated since."""
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation:
+            self.stale_loads += 1
+            return
+        self.local.set(loan_id, entry)
+        if self.shared is not None:
+            await self.shared.set(self._key(loan_id), entry.to_bytes(), self.shared_ttl)
+
+    def _drop_local(self, loan_ids: Iterable[uuid.UUID]) -> list:
+        """Local half of an invalidation; returns the shared-tier keys."""
+        loan_ids = list(loan_ids)
+        if not loan_ids:
+            return []
+        self.generation += 1
+        for loan_id in loan_ids:
+            self.local.pop(loan_id)
+        self.invalidations += len(loan_ids)
+        return [self._key(loan_id) for loan_id in loan_ids]
+
+    async def invalidate(self, loan_ids: Iterable[uuid.UUID]):
+        """Drop ``loan_ids`` from both tiers; call after the write committed."""
+        if not self.enabled:
+            return
+        keys = self._drop_local(loan_ids)
+        if self.shared is not None and keys:
+            await self.shared.delete(keys)
+
+    def invalidate_nowait(self, loan_ids: Iterable[uuid.UUID]):
+        """``invalidate`` for synchronous callers. The local tier is cleared
+        at once; the shared-tier delete is scheduled on the running event loop,
+        or run to completion when there is none (CLI jobs)."""
+        if not self.enabled:
+            return
+        keys = self._drop_local(loan_ids)
+        if self.shared is None or not keys:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.shared.delete(keys))
+            return
+        task = loop.create_task(self.shared.delete(keys))
+        # Hold a reference until it finishes
+        self._deletes.add(task)
+        task.add_done_callback(self._deletes.discard)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "local": self.local.stats(),
+            "shared": None if self.shared is None else {
+                "backend": type(self.shared).__name__,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+            },
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+        }
+
+
+loan_cache = LoanCache.from_env()
+
+PENDING_KEY = "loan_cache_invalidate"
+
+
+def invalidate_after_commit(session, loan_ids: Iterable[uuid.UUID]):
+    """Drop ``loan_ids`` from the cache once ``session`` (a sync Session, or
+    the one behind an AsyncSession) commits; forgotten on rollback."""
+    session.info.setdefault(PENDING_KEY, set()).update(loan_ids)
+
+
+def after_commit(session):
+    loan_ids = session.info.pop(PENDING_KEY, None)
+    if loan_ids:
+        loan_cache.invalidate_nowait(loan_ids)
+
+
+def after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
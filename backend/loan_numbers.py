@@ -0,0 +1,96 @@
+"""
+Loan number allocation: ``LN-YYYY-NNNNNN`` backed by a per-year counter.
+
+Each worker reserves numbers from the database in blocks of
+LOAN_NUMBER_BLOCK and hands them out from memory, so most allocations cost no
+round trip. Numbers are unique but not gap-free: a worker that exits with part
+of a block unused leaves a hole, and numbers from different workers interleave.
+
+Postgres: one sequence per year (``loan_number_seq_YYYY``), created on demand
+and shared with the ``generate_loan_number()`` SQL function (migration 002). A
+block is ``nextval`` drawn N times in a single statement.
+
+SQLite: a ``loan_number_counters`` row per year bumped with an atomic
+UPSERT ... RETURNING. The reservation commits on its own connection, so on
+SQLite call the allocator before the request's own writes to avoid waiting on
+the write lock the request already holds.
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from database import get_async_engine
+
+LOAN_NUMBER_BLOCK = int(os.getenv('LOAN_NUMBER_BLOCK', '50'))
+
+_SQLITE_DDL = text(
+    "CREATE TABLE IF NOT EXISTS loan_number_counters ("
+    "year INTEGER PRIMARY KEY, next_value INTEGER NOT NULL)"
+)
+_SQLITE_RESERVE = text(
+    "INSERT INTO loan_number_counters (year, next_value) VALUES (:year, 1 + :n) "
+    "ON CONFLICT (year) DO UPDATE SET next_value = next_value + :n "
+    "RETURNING next_value"
+)
+
+
+def format_loan_number(year: int, value: int) -> str:
+    return f"LN-{year}-{value:06d}"
+
+
+def sequence_name(year: int) -> str:
+    return f"loan_number_seq_{year}"
+
+
+class LoanNumberAllocator:
+    def __init__(self, block_size: int = LOAN_NUMBER_BLOCK, engine=None):
+        self.block_size = max(1, block_size)
+        self._engine = engine
+        self._lock = asyncio.Lock()
+        self._year: Optional[int] = None
+        self._free: List[int] = []
+        self._ready_years: Dict[int, bool] = {}
+        self.reservations = 0
+
+    @property
+    def engine(self):
+        return self._engine or get_async_engine()
+
+    async def next(self) -> str:
+        return (await self.take(1))[0]
+
+    async def take(self, n: int) -> List[str]:
+        """Return ``n`` fresh loan numbers, reserving more blocks as needed."""
+        year = datetime.utcnow().year
+        async with self._lock:
+            if year != self._year:
+                # Numbers left over from last year's block are abandoned
+                self._year, self._free = year, []
+            if len(self._free) < n:
+                self._free.extend(await self._reserve(year, max(self.block_size, n - len(self._free))))
+            taken, self._free = self._free[:n], self._free[n:]
+        return [format_loan_number(year, value) for value in taken]
+
+    async def _reserve(self, year: int, n: int) -> List[int]:
+        self.reservations += 1
+        async with self.engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                if year not in self._ready_years:
+                    await conn.execute(_SQLITE_DDL)
+                    self._ready_years[year] = True
+                end = (await conn.execute(_SQLITE_RESERVE, {"year": year, "n": n})).scalar_one()
+                return list(range(end - n, end))
+            seq = sequence_name(year)
+            if year not in self._ready_years:
+                await conn.execute(text(f'CREATE SEQUENCE IF NOT EXISTS "{seq}"'))
+                self._ready_years[year] = True
+            result = await conn.execute(
+                text(f"SELECT nextval('\"{seq}\"') FROM generate_series(1, :n)"), {"n": n}
+            )
+            return sorted(result.scalars().all())
+
+
+loan_numbers = LoanNumberAllocator()
@@ -0,0 +1,214 @@
+"""
+Read models for loan responses.
+
+List endpoints select only the columns ``LoanOut`` needs and turn the result
+tuples straight into JSON bytes, bypassing ORM entity construction, the
+identity map and per-row Pydantic models. The dict shape produced here must
+stay in step with ``LoanOut`` in app_hardened.py.
+
+The full-application view loads the loan aggregate with selectin loading;
+its financial totals are the loan's maintained summary columns.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+
+from database import DocumentStatus, LoanApplication, User
+from fast_json import dumps
+from pagination import LISTED_AT
+
+LOAN_LIST_COLUMNS = (
+    LoanApplication.id,
+    LoanApplication.loan_number,
+    User.first_name,
+    User.last_name,
+    LoanApplication.loan_amount,
+    LoanApplication.loan_purpose,
+    LoanApplication.monthly_income,
+    LoanApplication.employment_status,
+    LoanApplication.status,
+    LoanApplication.created_at,
+    LISTED_AT.label("listed_at"),  # keyset cursor
+)
+
+
+def loan_list_select():
+    """Listing query: loan columns plus the applicant's name in one joined
+    SELECT, so a page costs one statement however many rows it has."""
+    return select(*LOAN_LIST_COLUMNS).join(User, LoanApplication.applicant_id == User.id)
+
+
+def applicant_name(first_name, last_name) -> str:
+    return f"{first_name or ''} {last_name or ''}".strip() or "Applicant"
+
+
+def loan_row_to_dict(row) -> dict:
+    (id_, loan_number, first_name, last_name, loan_amount, loan_purpose,
+     monthly_income, employment_status, status, created_at) = row[:10]
+    return {
+        "id": id_,
+        "loan_number": loan_number,
+        "applicant_name": applicant_name(first_name, last_name),
+        "loan_amount": float(loan_amount) if loan_amount is not None else 0.0,
+        "loan_purpose": loan_purpose,
+        "annual_income": float(monthly_income) * 12 if monthly_income else 0.0,
+        "employment_status": employment_status.value if employment_status else "unknown",
+        "status": status.value if status else "draft",
+        "created_at": created_at,
+    }
+
+
+def render_loan_list(rows: Iterable) -> bytes:
+    """Serialize projected rows (from ``loan_list_select()``) to JSON."""
+    out: List[dict] = [loan_row_to_dict(row) for row in rows]
+    return dumps(out)
+
+
+# ----------------------------------------------------------------------------
+# Full application aggregate (GET /api/v1/loans/{id}/full)
+# ----------------------------------------------------------------------------
+def _income(r) -> dict:
+    return {
+        "id": r.id, "income_type": r.income_type, "source": r.source,
+        "monthly_amount": r.monthly_amount, "is_primary": r.is_primary,
+        "years_receiving": r.years_receiving,
+    }
+
+
+def _asset(r) -> dict:
+    return {
+        "id": r.id, "asset_type": r.asset_type, "description": r.description,
+        "current_value": r.current_value, "liquid_amount": r.liquid_amount,
+        "institution_name": r.institution_name,
+    }
+
+
+def _liability(r) -> dict:
+    return {
+        "id": r.id, "liability_type": r.liability_type, "creditor_name": r.creditor_name,
+        "current_balance": r.current_balance, "monthly_payment": r.monthly_payment,
+        "remaining_months": r.remaining_months,
+    }
+
+
+def _document(r) -> dict:
+    return {
+        "id": r.id, "document_type": r.document_type, "file_name": r.file_name,
+        "file_size": r.file_size, "mime_type": r.mime_type, "status": r.status,
+        "is_required": r.is_required, "expiration_date": r.expiration_date,
+        "created_at": r.created_at,
+    }
+
+
+def _decision(r) -> dict:
+    return {
+        "id": r.id, "underwriter_id": r.underwriter_id, "decision": r.decision,
+        "decision_date": r.decision_date, "approved_amount": r.approved_amount,
+        "interest_rate": r.interest_rate, "loan_term_months": r.loan_term_months,
+        "debt_to_income_ratio": r.debt_to_income_ratio,
+        "loan_to_value_ratio": r.loan_to_value_ratio, "risk_score": r.risk_score,
+        "conditions": r.conditions,
+    }
+
+
+def _workflow_step(r) -> dict:
+    return {
+        "id": r.id, "step_name": r.step_name, "step_order": r.step_order,
+        "status": r.status, "assigned_to": r.assigned_to, "is_completed": r.is_completed,
+        "completed_at": r.completed_at, "due_date": r.due_date,
+    }
+
+
+# name -> (relationship, row serializer)
+FULL_COLLECTIONS = {
+    "income_records": (LoanApplication.income_records, _income),
+    "assets": (LoanApplication.assets, _asset),
+    "liabilities": (LoanApplication.liabilities, _liability),
+    "documents": (LoanApplication.documents, _document),
+    "underwriting_decisions": (LoanApplication.underwriting_decisions, _decision),
+    "workflow_status": (LoanApplication.workflow_status, _workflow_step),
+}
+
+
+def parse_include(include: Optional[str]) -> List[str]:
+    """Collections named in ``?include=a,b`` (all when omitted). Raises
+    ValueError naming the first unknown collection."""
+    if include is None:
+        return list(FULL_COLLECTIONS)
+    names = [n.strip() for n in include.split(",") if n.strip()]
+    for name in names:
+        if name not in FULL_COLLECTIONS:
+            raise ValueError(name)
+    return names
+
+
+def full_loan_select(loan_id, include: List[str]):
+    """One SELECT for the loan and applicant, plus one selectin query per
+    included collection -- at most seven statements whatever the child count."""
+    options = [joinedload(LoanApplication.applicant)]
+    options += [selectinload(FULL_COLLECTIONS[name][0]) for name in include]
+    return select(LoanApplication).where(LoanApplication.id == loan_id).options(*options)
+
+
+def _sum(rows, attr) -> float:
+    return float(sum((getattr(r, attr) or 0) for r in rows))
+
+
+def _money(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _totals(loan, include: List[str]) -> dict:
+    # Income, assets, liabilities, debt and DTI are the summary columns
+    # financial_summary.py maintains (the stated figure until a row is
+    # itemised), so they never disagree with the loan's own fields
+    totals = {
+        "monthly_income": _money(loan.monthly_income),
+        "assets": _money(loan.total_assets),
+        "liabilities": _money(loan.total_liabilities),
+        "monthly_debt": _money(loan.monthly_debt),
+        "debt_to_income_ratio": _money(loan.dti_ratio),
+    }
+    if "assets" in include:
+        totals["liquid_assets"] = _sum(loan.assets, "liquid_amount")
+    if "documents" in include:
+        totals["documents_pending"] = sum(1 for d in loan.documents if d.status in (None, DocumentStatus.PENDING))
+    if "workflow_status" in include:
+        totals["workflow_steps_completed"] = sum(1 for s in loan.workflow_status if s.is_completed)
+        totals["workflow_steps_total"] = len(loan.workflow_status)
+    return totals
+
+
+def render_full_loan(loan, include: List[str]) -> bytes:
+    applicant = loan.applicant
+    out = {
+        "id": loan.id,
+        "loan_number": loan.loan_number,
+        "applicant_id": loan.applicant_id,
+        "applicant_name": applicant_name(applicant.first_name, applicant.last_name) if applicant else "Applicant",
+        "loan_amount": loan.loan_amount,
+        "loan_purpose": loan.loan_purpose,
+        "property_value": loan.property_value,
+        "down_payment": loan.down_payment,
+        "monthly_income": loan.monthly_income,
+        "total_assets": loan.total_assets,
+        "total_liabilities": loan.total_liabilities,
+        "monthly_debt": loan.monthly_debt,
+        "dti_ratio": loan.dti_ratio,
+        "employment_status": loan.employment_status,
+        "credit_score": loan.credit_score,
+        "status": loan.status,
+        "assigned_underwriter_id": loan.assigned_underwriter_id,
+        "submitted_at": loan.submitted_at,
+        "created_at": loan.created_at,
+        "updated_at": loan.updated_at,
+    }
+    for name in include:
+        serialize = FULL_COLLECTIONS[name][1]
+        rows = getattr(loan, name)
+        if name == "workflow_status":
+            rows = sorted(rows, key=lambda s: s.step_order)
+        out[name] = [serialize(r) for r in rows]
+    out["totals"] = _totals(loan, include)
+    return dumps(out)
@@ -0,0 +1,153 @@
+"""
+Non-blocking structured logging.
+
+Request code never writes to stdout itself. ``configure_logging`` attaches a
+``DroppingQueueHandler`` to the logger: records are stamped with the current
+``request_id`` and put on a bounded in-memory queue without waiting; a
+``QueueListener`` thread formats them as one JSON object per line and writes
+them to the real stream. A slow log driver therefore stalls the listener
+thread, not the event loop. When the queue is full the record is dropped and
+counted rather than blocking the caller.
+
+Structured events are logged as dicts -- ``logger.info({"event": "x", ...})``
+-- and serialized in the listener thread, so callers pay no ``json.dumps``.
+Plain string messages work too and land in ``message``.
+
+High-volume events can be sampled by name; warnings and above are always
+kept. Sampling happens before enqueueing, so a sampled-out record costs
+almost nothing.
+
+Settings:
+    LOG_LEVEL         logger level (default INFO)
+    LOG_QUEUE_SIZE    records buffered before dropping (default 10000)
+    LOG_SAMPLE_RATES  per-event keep ratio, e.g. "request=0.1,bulk_ingest=1"
+"""
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from fast_json import dumps
+
+request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class EventSampler(logging.Filter):
+    """Keep only a fraction of INFO-and-below records for the configured events."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates or not isinstance(record.msg, dict):
+            return True
+        rate = self.rates.get(record.msg.get("event"))
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener; only capture what is bound to
+        # this context or may change after the call returns
+        record.request_id = request_id_ctx.get()
+        if record.args and not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            out.update(record.msg)
+        else:
+            out["message"] = record.getMessage()
+        out["request_id"] = getattr(record, "request_id", "-")
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return dumps(out).decode()
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[EventSampler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(name: str = "loan_api", stream=None) -> logging.Logger:
+    """Route ``name`` through the queue; idempotent per process."""
+    global _handler, _sampler, _listener
+    logger = logging.getLogger(name)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    if _handler is not None:
+        return logger
+    q: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    _handler = DroppingQueueHandler(q)
+    _sampler = EventSampler(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")))
+    _handler.addFilter(_sampler)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(q, output, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(_handler)
+    logger.propagate = False
+    return logger
+
+
+def start_listener():
+    """Restart the listener in a worker forked after ``configure_logging``.
+
+    The parent's thread does not exist in the child and its queue's lock may
+    have been held at fork time, so the queue is replaced too.
+    """
+    if _listener is None or (_listener._thread is not None and _listener._thread.is_alive()):
+        return
+    _handler.queue = _listener.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+    _listener._thread = None
+    _listener.start()
+
+
+def stop_listener():
+    """Flush queued records and stop the listener thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def log_stats() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "sampled_out": _sampler.sampled_out if _sampler else 0,
+    }
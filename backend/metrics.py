@@ -0,0 +1,175 @@
+"""
+Prometheus metrics for the loan API.
+
+``MetricsMiddleware`` (pure ASGI, outermost so 429s are counted too) records
+request latency per route template, method and status in a histogram -- its
+``_count`` series is the request count -- and tracks in-flight requests.
+Requests that match no route are labelled ``<unmatched>`` to bound
+cardinality.
+
+Pool, analytics, logging and cache figures already live in per-worker
+counters (``pool_snapshot``, ``analytics.stats()``, ``log_stats()``,
+``TTLCache.stats()``). Registered refresh hooks copy them into Prometheus
+metrics at most every METRICS_REFRESH_SECONDS from the request path, and
+always right before a scrape, so the hot path never touches them.
+
+Multiprocess: when PROMETHEUS_MULTIPROC_DIR is set (before this module is
+imported) every worker writes its samples to mmap'ed files in that
+directory and ``/metrics`` aggregates all of them, whichever worker answers
+the scrape. The directory must be emptied before workers start and
+``mark_process_dead(pid)`` called when a worker exits (gunicorn
+``on_starting`` / ``child_exit`` hooks). Gauges use ``livesum`` so a dead
+worker's values drop out.
+
+Settings:
+    METRICS_ENABLED           "false" disables the middleware (default true)
+    METRICS_REFRESH_SECONDS   min interval between stats refreshes (default 5)
+    PROMETHEUS_MULTIPROC_DIR  shared sample directory for multi-worker servers
+"""
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+UNMATCHED = "<unmatched>"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template, method and status",
+    ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_progress", "Requests currently being handled", multiprocess_mode="livesum"
+)
+
+POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pool connections by state", ["engine", "state"], multiprocess_mode="livesum"
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connection checkouts", ["engine"])
+POOL_WAITS = Counter("db_pool_waits", "Checkouts that had to wait for a connection", ["engine"])
+POOL_WAIT_SECONDS = Counter("db_pool_wait_seconds", "Time spent waiting for a connection", ["engine"])
+POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that timed out", ["engine"])
+
+ANALYTICS_EVENTS = Counter("analytics_events", "Analytics events by outcome", ["outcome"])
+ANALYTICS_QUEUED = Gauge("analytics_queue_depth", "Analytics events waiting to be written", multiprocess_mode="livesum")
+ANALYTICS_WRITE_ERRORS = Counter("analytics_write_errors", "Failed analytics segment writes")
+
+LOG_RECORDS_DISCARDED = Counter("log_records_discarded", "Log records not written", ["reason"])
+LOG_QUEUED = Gauge("log_queue_depth", "Log records waiting for the listener thread", multiprocess_mode="livesum")
+
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by result", ["cache", "result"])
+CACHE_EVICTIONS = Counter("cache_evictions", "Entries evicted for space", ["cache"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently cached", ["cache"], multiprocess_mode="livesum")
+
+_refresh_hooks: List[Callable[[], None]] = []
+_last_refresh = 0.0
+_REFRESH_SECONDS = float(os.getenv("METRICS_REFRESH_SECONDS", "5"))
+# Last value pushed per counter child, to turn cumulative stats into increments
+_pushed: Dict[Tuple[int, tuple], float] = {}
+
+
+def add_refresh_hook(hook: Callable[[], None]):
+    _refresh_hooks.append(hook)
+
+
+def refresh(force: bool = False):
+    global _last_refresh
+    now = time.monotonic()
+    if not force and now - _last_refresh < _REFRESH_SECONDS:
+        return
+    _last_refresh = now
+    for hook in _refresh_hooks:
+        hook()
+
+
+def _advance(counter: Counter, value: float, *labels):
+    """Bring ``counter`` up to the cumulative ``value``."""
+    key = (id(counter), labels)
+    child = counter.labels(*labels) if labels else counter
+    delta = value - _pushed.get(key, 0.0)
+    if delta > 0:
+        child.inc(delta)
+        _pushed[key] = value
+
+
+def record_pool(engine_name: str, snap: dict):
+    for state in ("checked_in", "checked_out", "overflow"):
+        if state in snap:
+            # QueuePool reports overflow as negative while below pool_size
+            POOL_CONNECTIONS.labels(engine_name, state).set(max(0, snap[state]))
+    if "checkouts" in snap:
+        _advance(POOL_CHECKOUTS, snap["checkouts"], engine_name)
+        _advance(POOL_WAITS, snap["waits"], engine_name)
+        _advance(POOL_WAIT_SECONDS, snap["wait_time_ms"] / 1000, engine_name)
+        _advance(POOL_TIMEOUTS, snap["timeouts"], engine_name)
+
+
+def record_analytics(stats: dict):
+    for outcome in ("accepted", "dropped", "flushed"):
+        _advance(ANALYTICS_EVENTS, stats[outcome], outcome)
+    _advance(ANALYTICS_WRITE_ERRORS, stats["write_errors"])
+    ANALYTICS_QUEUED.set(stats["queued"])
+
+
+def record_logging(stats: dict):
+    _advance(LOG_RECORDS_DISCARDED, stats["dropped"], "queue_full")
+    _advance(LOG_RECORDS_DISCARDED, stats["sampled_out"], "sampled")
+    LOG_QUEUED.set(stats["queued"])
+
+
+def record_cache(name: str, stats: dict):
+    _advance(CACHE_LOOKUPS, stats["hits"], name, "hit")
+    _advance(CACHE_LOOKUPS, stats["misses"], name, "miss")
+    if "evictions" in stats:
+        _advance(CACHE_EVICTIONS, stats["evictions"], name)
+    if "size" in stats:
+        CACHE_ENTRIES.labels(name).set(stats["size"])
+
+
+def render() -> Tuple[bytes, str]:
+    """Exposition text for every worker (multiprocess) or this process."""
+    refresh(force=True)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.enabled = os.getenv("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            # The router stores the matched route on the shared scope
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(getattr(route, "path", UNMATCHED), scope["method"], str(status)).observe(elapsed)
+            refresh()
@@ -0,0 +1,42 @@
+-- Loan number sequences
+-- PostgreSQL Migration Script v1.1
+--
+-- Replaces the MAX(SUBSTRING(...)) scan in generate_loan_number() with one
+-- sequence per year (loan_number_seq_YYYY). The application allocator
+-- (backend/loan_numbers.py) draws blocks from the same sequences, so numbers
+-- issued from SQL and from the API never collide.
+
+-- Create this year's sequence and move it past any LN-YYYY-NNNNNN numbers
+-- already issued by the old function
+DO $$
+DECLARE
+    yr INTEGER := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER;
+    seq TEXT := 'loan_number_seq_' || yr;
+    last_number BIGINT;
+BEGIN
+    EXECUTE format('CREATE SEQUENCE IF NOT EXISTS %I', seq);
+
+    SELECT MAX(CAST(SUBSTRING(loan_number FROM 9) AS BIGINT))
+    INTO last_number
+    FROM loan_applications
+    WHERE loan_number ~ ('^LN-' || yr || '-[0-9]+$');
+
+    IF last_number IS NOT NULL THEN
+        PERFORM setval(seq, last_number);
+    END IF;
+END;
+$$;
+
+-- Function to generate loan numbers (format: LN-YYYY-NNNNNN)
+CREATE OR REPLACE FUNCTION generate_loan_number()
+RETURNS VARCHAR(50) AS $$
+DECLARE
+    yr INTEGER := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER;
+    seq TEXT := 'loan_number_seq_' || yr;
+BEGIN
+    EXECUTE format('CREATE SEQUENCE IF NOT EXISTS %I', seq);
+    RETURN 'LN-' || yr || '-' || LPAD(nextval(seq)::TEXT, 6, '0');
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT 'Loan number sequences migration v1.1 applied successfully!' as status;
@@ -0,0 +1,160 @@
+-- Incrementally maintained financial summaries on loan_applications
+-- PostgreSQL Migration Script v1.2
+--
+-- monthly_income, total_assets and total_liabilities are kept equal to the
+-- sums of the application's applicant_income / applicant_assets /
+-- applicant_liabilities rows, and the new monthly_debt and dti_ratio columns
+-- follow them. Row triggers on the child tables apply each change as a delta
+-- to the one affected application, so calculate_dti_ratio() becomes a
+-- single-row lookup instead of two aggregate scans.
+--
+-- Until an application has its first itemised row of a kind, the figure
+-- stated at application time is left alone; the first row replaces it.
+-- SQLite deployments get the same behaviour from the ORM hooks in
+-- backend/financial_summary.py, and `python db_utils.py reconcile` checks
+-- (and with --repair fixes) drift on either backend. Safe to re-run.
+
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS monthly_debt DECIMAL(10,2) DEFAULT 0;
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS dti_ratio DECIMAL(5,2);
+
+-- ======================
+-- DTI FOLLOWS INCOME AND DEBT
+-- ======================
+CREATE OR REPLACE FUNCTION loan_dti_ratio(monthly_debt DECIMAL, monthly_income DECIMAL)
+RETURNS DECIMAL(5,2) AS $$
+    SELECT CASE
+        WHEN monthly_income > 0 THEN LEAST(ROUND(COALESCE(monthly_debt, 0) / monthly_income * 100, 2), 999.99)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION set_loan_dti_ratio()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.dti_ratio := loan_dti_ratio(NEW.monthly_debt, NEW.monthly_income);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_loan_applications_dti_ratio ON loan_applications;
+CREATE TRIGGER set_loan_applications_dti_ratio
+    BEFORE INSERT OR UPDATE OF monthly_income, monthly_debt, dti_ratio ON loan_applications
+    FOR EACH ROW EXECUTE FUNCTION set_loan_dti_ratio();
+
+-- ======================
+-- CHILD ROW DELTAS
+-- ======================
+-- Each trigger locks the parent row before looking for sibling rows, so two
+-- concurrent "first" rows cannot both replace the stated figure.
+
+CREATE OR REPLACE FUNCTION maintain_income_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET monthly_income = COALESCE(monthly_income, 0) - OLD.monthly_amount
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM 1 FROM loan_applications WHERE id = NEW.application_id FOR UPDATE;
+        UPDATE loan_applications
+        SET monthly_income = NEW.monthly_amount + CASE
+            WHEN EXISTS (SELECT 1 FROM applicant_income WHERE application_id = NEW.application_id AND id <> NEW.id)
+            THEN COALESCE(monthly_income, 0) ELSE 0 END
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_asset_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET total_assets = COALESCE(total_assets, 0) - OLD.current_value
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM 1 FROM loan_applications WHERE id = NEW.application_id FOR UPDATE;
+        UPDATE loan_applications
+        SET total_assets = NEW.current_value + CASE
+            WHEN EXISTS (SELECT 1 FROM applicant_assets WHERE application_id = NEW.application_id AND id <> NEW.id)
+            THEN COALESCE(total_assets, 0) ELSE 0 END
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_liability_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET total_liabilities = COALESCE(total_liabilities, 0) - OLD.current_balance,
+            monthly_debt = COALESCE(monthly_debt, 0) - OLD.monthly_payment
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM 1 FROM loan_applications WHERE id = NEW.application_id FOR UPDATE;
+        UPDATE loan_applications
+        SET total_liabilities = NEW.current_balance + CASE WHEN siblings THEN COALESCE(total_liabilities, 0) ELSE 0 END,
+            monthly_debt = NEW.monthly_payment + CASE WHEN siblings THEN COALESCE(monthly_debt, 0) ELSE 0 END
+        FROM (
+            SELECT EXISTS (SELECT 1 FROM applicant_liabilities WHERE application_id = NEW.application_id AND id <> NEW.id) AS siblings
+        ) s
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS maintain_income_summary ON applicant_income;
+CREATE TRIGGER maintain_income_summary
+    AFTER INSERT OR UPDATE OF application_id, monthly_amount OR DELETE ON applicant_income
+    FOR EACH ROW EXECUTE FUNCTION maintain_income_summary();
+
+DROP TRIGGER IF EXISTS maintain_asset_summary ON applicant_assets;
+CREATE TRIGGER maintain_asset_summary
+    AFTER INSERT OR UPDATE OF application_id, current_value OR DELETE ON applicant_assets
+    FOR EACH ROW EXECUTE FUNCTION maintain_asset_summary();
+
+DROP TRIGGER IF EXISTS maintain_liability_summary ON applicant_liabilities;
+CREATE TRIGGER maintain_liability_summary
+    AFTER INSERT OR UPDATE OF application_id, current_balance, monthly_payment OR DELETE ON applicant_liabilities
+    FOR EACH ROW EXECUTE FUNCTION maintain_liability_summary();
+
+-- ======================
+-- BACKFILL
+-- ======================
+-- Applications without itemised rows keep their stated figures
+UPDATE loan_applications la SET monthly_income = s.total
+FROM (SELECT application_id, SUM(monthly_amount) AS total FROM applicant_income GROUP BY application_id) s
+WHERE la.id = s.application_id AND la.monthly_income IS DISTINCT FROM s.total;
+
+UPDATE loan_applications la SET total_assets = s.total
+FROM (SELECT application_id, SUM(current_value) AS total FROM applicant_assets GROUP BY application_id) s
+WHERE la.id = s.application_id AND la.total_assets IS DISTINCT FROM s.total;
+
+UPDATE loan_applications la SET total_liabilities = s.balance, monthly_debt = s.payment
+FROM (
+    SELECT application_id, SUM(current_balance) AS balance, SUM(monthly_payment) AS payment
+    FROM applicant_liabilities GROUP BY application_id
+) s
+WHERE la.id = s.application_id
+  AND (la.total_liabilities IS DISTINCT FROM s.balance OR la.monthly_debt IS DISTINCT FROM s.payment);
+
+UPDATE loan_applications SET monthly_debt = 0 WHERE monthly_debt IS NULL;
+
+UPDATE loan_applications SET dti_ratio = loan_dti_ratio(monthly_debt, monthly_income)
+WHERE dti_ratio IS DISTINCT FROM loan_dti_ratio(monthly_debt, monthly_income);
+
+-- ======================
+-- SINGLE-ROW DTI LOOKUP
+-- ======================
+CREATE OR REPLACE FUNCTION calculate_dti_ratio(application_uuid UUID)
+RETURNS DECIMAL(5,2) AS $$
+    SELECT COALESCE(dti_ratio, 0) FROM loan_applications WHERE id = application_uuid;
+$$ LANGUAGE sql STABLE;
+
+SELECT 'Financial summaries migration v1.2 applied successfully!' as status;
@@ -0,0 +1,10 @@
+-- Loan-to-value ratio on loan_applications
+-- PostgreSQL Migration Script v1.3
+--
+-- Written by the set-based portfolio recompute (backend/portfolio_ratios.py,
+-- `python db_utils.py recompute`) together with monthly_income, monthly_debt
+-- and dti_ratio. Safe to re-run.
+
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS ltv_ratio DECIMAL(5,2);
+
+SELECT 'LTV ratio migration v1.3 applied successfully!' as status;
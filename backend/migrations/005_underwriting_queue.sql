@@ -0,0 +1,27 @@
+-- Underwriting work queue on loan_applications
+-- PostgreSQL Migration Script v1.4
+--
+-- Underwriters pull submitted applications with
+-- POST /api/v1/underwriting/claim-next (backend/work_queue.py): highest
+-- priority first, then oldest submission. A claim sets
+-- assigned_underwriter_id plus a lease (claimed_at / claim_expires_at) that
+-- the underwriter renews with heartbeats; once it lapses the application can
+-- be claimed again. Manual assignments (no lease) are never taken over.
+-- Two partial indexes serve the claim: the claim order over unassigned
+-- submissions (claimed rows drop out of it), and lease expiry for reclaiming
+-- lapsed claims. A claim reads a few index entries however large the queue
+-- or the number of claims in progress. Safe to re-run.
+
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS claim_expires_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_loan_applications_claim_queue
+    ON loan_applications (priority DESC, submitted_at, id)
+    WHERE status = 'submitted' AND assigned_underwriter_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_loan_applications_claim_expiry
+    ON loan_applications (claim_expires_at)
+    WHERE status = 'submitted';
+
+SELECT 'Underwriting queue migration v1.4 applied successfully!' as status;
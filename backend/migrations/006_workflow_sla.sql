@@ -0,0 +1,15 @@
+-- Workflow SLA tracking on workflow_status
+-- PostgreSQL Migration Script v1.5
+--
+-- New applications get the workflow step template (backend/workflow_engine.py);
+-- a started step carries a due date. The SLA monitor
+-- (python db_utils.py workflow-monitor) keeps open steps' due dates in an
+-- in-memory heap and reloads it from this partial index, which holds only
+-- steps not yet completed: a reload reads the work in progress, not every
+-- step ever recorded. Safe to re-run.
+
+CREATE INDEX IF NOT EXISTS idx_workflow_open_due
+    ON workflow_status (due_date)
+    WHERE is_completed = false;
+
+SELECT 'Workflow SLA migration v1.5 applied successfully!' as status;
@@ -0,0 +1,12 @@
+-- Loan listing order including drafts
+-- PostgreSQL Migration Script v1.6
+--
+-- GET /api/v1/loans pages by (COALESCE(submitted_at, created_at), id), newest
+-- first (backend/pagination.py), so drafts, which have no submitted_at, are
+-- listed by their creation time instead of being left out. This expression
+-- index serves that order and the keyset comparison. Safe to re-run.
+
+CREATE INDEX IF NOT EXISTS idx_loan_applications_listing
+    ON loan_applications ((COALESCE(submitted_at, created_at)), id);
+
+SELECT 'Listing index migration v1.6 applied successfully!' as status;
@@ -0,0 +1,96 @@
+-- Itemised row counters for the financial summaries
+-- PostgreSQL Migration Script v1.7
+--
+-- The 003 triggers decided whether a new income / asset / liability row was
+-- the application's first of its kind (replacing the stated figure) by
+-- looking for other rows. Rows inserted by one multi-row INSERT fire their
+-- AFTER ROW triggers once the whole statement has run, so each saw the
+-- others and added to the stated figure instead of replacing it.
+--
+-- loan_applications now counts its itemised rows per kind; the triggers
+-- read and move that counter in the same UPDATE that applies the delta, so
+-- each row sees exactly the rows applied before it. The UPDATE locks the
+-- parent row, which also serialises concurrent first rows. Safe to re-run.
+
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS income_items INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS asset_items INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE loan_applications ADD COLUMN IF NOT EXISTS liability_items INTEGER NOT NULL DEFAULT 0;
+
+-- ======================
+-- BACKFILL COUNTERS
+-- ======================
+UPDATE loan_applications la SET income_items = s.n
+FROM (SELECT application_id, COUNT(*) AS n FROM applicant_income GROUP BY application_id) s
+WHERE la.id = s.application_id AND la.income_items <> s.n;
+
+UPDATE loan_applications la SET asset_items = s.n
+FROM (SELECT application_id, COUNT(*) AS n FROM applicant_assets GROUP BY application_id) s
+WHERE la.id = s.application_id AND la.asset_items <> s.n;
+
+UPDATE loan_applications la SET liability_items = s.n
+FROM (SELECT application_id, COUNT(*) AS n FROM applicant_liabilities GROUP BY application_id) s
+WHERE la.id = s.application_id AND la.liability_items <> s.n;
+
+-- ======================
+-- CHILD ROW DELTAS
+-- ======================
+CREATE OR REPLACE FUNCTION maintain_income_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET monthly_income = COALESCE(monthly_income, 0) - OLD.monthly_amount,
+            income_items = GREATEST(income_items - 1, 0)
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE loan_applications
+        SET monthly_income = NEW.monthly_amount + CASE WHEN income_items > 0 THEN COALESCE(monthly_income, 0) ELSE 0 END,
+            income_items = income_items + 1
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_asset_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET total_assets = COALESCE(total_assets, 0) - OLD.current_value,
+            asset_items = GREATEST(asset_items - 1, 0)
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE loan_applications
+        SET total_assets = NEW.current_value + CASE WHEN asset_items > 0 THEN COALESCE(total_assets, 0) ELSE 0 END,
+            asset_items = asset_items + 1
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_liability_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE loan_applications
+        SET total_liabilities = COALESCE(total_liabilities, 0) - OLD.current_balance,
+            monthly_debt = COALESCE(monthly_debt, 0) - OLD.monthly_payment,
+            liability_items = GREATEST(liability_items - 1, 0)
+        WHERE id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE loan_applications
+        SET total_liabilities = NEW.current_balance + CASE WHEN liability_items > 0 THEN COALESCE(total_liabilities, 0) ELSE 0 END,
+            monthly_debt = NEW.monthly_payment + CASE WHEN liability_items > 0 THEN COALESCE(monthly_debt, 0) ELSE 0 END,
+            liability_items = liability_items + 1
+        WHERE id = NEW.application_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT 'Financial summary counters migration v1.7 applied successfully!' as status;
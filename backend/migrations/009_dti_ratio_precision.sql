@@ -0,0 +1,21 @@
+-- DTI ratio computed before dividing
+-- PostgreSQL Migration Script v1.8
+--
+-- loan_dti_ratio() from 003 divided first and scaled by 100 afterwards. The
+-- set-based portfolio recompute (backend/portfolio_ratios.py) scales first
+-- (`* 100.0 /`), and the two can round the last cent differently, so the
+-- trigger and the recompute would keep rewriting each other's values. This
+-- redefines the function the recompute's way and re-derives stored ratios.
+-- Safe to re-run.
+
+CREATE OR REPLACE FUNCTION loan_dti_ratio(monthly_debt DECIMAL, monthly_income DECIMAL)
+RETURNS DECIMAL(5,2) AS $$
+    SELECT CASE
+        WHEN monthly_income > 0 THEN LEAST(ROUND(COALESCE(monthly_debt, 0) * 100.0 / monthly_income, 2), 999.99)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE loan_applications SET dti_ratio = loan_dti_ratio(monthly_debt, monthly_income)
+WHERE dti_ratio IS DISTINCT FROM loan_dti_ratio(monthly_debt, monthly_income);
+
+SELECT 'DTI ratio precision migration v1.8 applied successfully!' as status;
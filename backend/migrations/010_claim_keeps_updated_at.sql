@@ -0,0 +1,32 @@
+-- Work-queue claims leave loan_applications.updated_at alone
+-- PostgreSQL Migration Script v1.9
+--
+-- updated_at is the loan's row version: GET /api/v1/loans/{id} and the
+-- listing derive their ETag / Last-Modified from it. The generic
+-- update_updated_at_column() trigger from 001 stamped it on every UPDATE,
+-- so each claim, lease heartbeat and release of the underwriting queue
+-- (backend/work_queue.py, migrations/005) looked like an edit and clients'
+-- conditional GETs stopped getting 304s while an underwriter held the lease.
+-- loan_applications now gets its own trigger function: an UPDATE that
+-- changes nothing but assigned_underwriter_id, claimed_at and
+-- claim_expires_at keeps the previous updated_at; any other change stamps
+-- it as before. Safe to re-run.
+
+CREATE OR REPLACE FUNCTION update_loan_applications_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF to_jsonb(NEW) - ARRAY['assigned_underwriter_id', 'claimed_at', 'claim_expires_at', 'updated_at']
+       = to_jsonb(OLD) - ARRAY['assigned_underwriter_id', 'claimed_at', 'claim_expires_at', 'updated_at'] THEN
+        NEW.updated_at = OLD.updated_at;
+    ELSE
+        NEW.updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_loan_applications_updated_at ON loan_applications;
+CREATE TRIGGER update_loan_applications_updated_at BEFORE UPDATE ON loan_applications
+    FOR EACH ROW EXECUTE FUNCTION update_loan_applications_updated_at_column();
+
+SELECT 'Claim updated_at migration v1.9 applied successfully!' as status;
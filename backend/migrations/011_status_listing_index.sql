@@ -0,0 +1,14 @@
+-- Loan listing order within a status
+-- PostgreSQL Migration Script v1.10
+--
+-- GET /api/v1/loans?status=... pages by (COALESCE(submitted_at, created_at),
+-- id) among the rows of one status (backend/pagination.py). With only the
+-- listing index from 007 the planner walks every status in listing order and
+-- discards the rows that do not match, which grows with the cursor's depth.
+-- Leading with status makes the filtered page one index range scan. Safe to
+-- re-run.
+
+CREATE INDEX IF NOT EXISTS idx_loan_applications_status_listing
+    ON loan_applications (status, (COALESCE(submitted_at, created_at)), id);
+
+SELECT 'Status listing index migration v1.10 applied successfully!' as status;
@@ -0,0 +1,78 @@
+"""
+Keyset (cursor) pagination helpers for loan listings.
+
+Pages are ordered by ``(listed_at, id)`` newest first, where ``listed_at`` is
+the submission time, or the creation time for drafts that have none, so every
+application is listable. The cursor handed to clients is an opaque, URL-safe
+token encoding the sort key of the last row on the page; the next page resumes
+strictly after that key with a row-value comparison, so Postgres can walk
+``idx_loan_applications_listing`` (``idx_loan_applications_status_listing``
+for a status filter) instead of counting and discarding rows the way OFFSET
+does.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, tuple_
+
+from database import LoanApplication
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Listing sort key; idx_loan_applications_listing indexes this expression
+LISTED_AT = func.coalesce(LoanApplication.submitted_at, LoanApplication.created_at)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor we did not issue."""
+
+
+def encode_cursor(listed_at: datetime, loan_id: uuid.UUID) -> str:
+    raw = json.dumps([listed_at.isoformat(), str(loan_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        listed_at, loan_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(listed_at), uuid.UUID(loan_id)
+    except Exception as e:
+        raise InvalidCursor(cursor) from e
+
+
+def apply_keyset(stmt, cursor: Optional[str], limit: int):
+    """Order ``stmt`` by the listing key, resume after ``cursor`` and fetch one
+    extra row so the caller can tell whether another page exists."""
+    key = (LISTED_AT, LoanApplication.id)
+    if cursor:
+        listed_at, loan_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(*key) < tuple_(listed_at, loan_id))
+    return stmt.order_by(key[0].desc(), key[1].desc()).limit(limit + 1)
+
+
+def window_position():
+    """Row number in listing order, for aggregates over an ``apply_keyset``
+    window that need the page's last key without loading the page."""
+    return func.row_number().over(order_by=(LISTED_AT.desc(), LoanApplication.id.desc()))
+
+
+def next_page_headers(url, next_cursor: Optional[str]) -> dict:
+    """``X-Next-Cursor`` and ``Link: rel="next"`` for ``url`` (a request URL)."""
+    if not next_cursor:
+        return {}
+    next_url = url.include_query_params(cursor=next_cursor)
+    return {"X-Next-Cursor": next_cursor, "Link": f'<{next_url}>; rel="next"'}
+
+
+def split_page(rows: list, limit: int):
+    """Trim the look-ahead row and return ``(page_rows, next_cursor)``."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.listed_at, last.id)
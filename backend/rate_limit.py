@@ -0,0 +1,242 @@
+"""
+Token-bucket rate limiting shared by every worker process on the host.
+
+Buckets live in a fixed-size hash table in a memory-mapped file
+(RATE_LIMIT_FILE, on /dev/shm when available), so all gunicorn workers see the
+same counters. Each slot holds ``(key_hash, tokens, last_refill)``; a check
+hashes the bucket key, locks the slot's stripe with a byte-range ``lockf`` and
+probes at most RATE_LIMIT_PROBE slots, so it is O(1). Tokens are refilled
+lazily from the elapsed time when a bucket is touched.
+
+Idle buckets are evicted implicitly: a slot untouched for longer than the
+slowest policy takes to refill completely holds a full bucket, which is
+indistinguishable from a fresh one, so it may be reused by any key.
+
+Settings:
+    RATE_LIMIT_ENABLED      "false" disables the middleware (default true)
+    RATE_LIMIT_DEFAULT      per-client-IP limit as "<requests>/<seconds>" (default 300/60)
+    RATE_LIMIT_ROUTES       extra per-IP-per-route limits, e.g.
+                            "POST /api/v1/loans/bulk=10/60;POST /analytics=60/60"
+    RATE_LIMIT_EXEMPT       comma-separated path prefixes never limited (default /health,/metrics)
+    RATE_LIMIT_TRUSTED_PROXIES  reverse proxies in front of the app that append to
+                            X-Forwarded-For; the client IP is the entry that many
+                            hops from the right (default 0: the header is ignored).
+                            The leftmost entries are whatever the client sent.
+    RATE_LIMIT_TRUST_FORWARDED  deprecated; "true" means RATE_LIMIT_TRUSTED_PROXIES=1
+    RATE_LIMIT_FILE         backing file (default /dev/shm/loan_api_ratelimit or the temp dir)
+    RATE_LIMIT_SLOTS        hash table slots (default 65536)
+    RATE_LIMIT_PROBE        slots probed per lookup (default 8)
+"""
+import fcntl
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+_SLOT = struct.Struct("<Qdd")  # key hash, tokens, last refill (unix time)
+STRIPE_SLOTS = 64
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _default_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "loan_api_ratelimit")
+
+
+class Policy:
+    """``limit`` requests per ``period`` seconds, bursting up to ``limit``."""
+
+    __slots__ = ("limit", "period", "rate")
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "Policy":
+        limit, _, period = spec.strip().partition("/")
+        return cls(int(limit), float(period or 1))
+
+
+class SharedBucketStore:
+    def __init__(self, path: Optional[str] = None, slots: int = 65536, probe: int = 8, idle_seconds: float = 60.0):
+        self.path = path or _default_path()
+        self.slots = max(STRIPE_SLOTS, slots - slots % STRIPE_SLOTS)
+        self.probe = min(probe, STRIPE_SLOTS)
+        self.idle_seconds = idle_seconds
+        size = self.slots * _SLOT.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def key_hash(key: str) -> int:
+        # Stable across processes, unlike hash(); zero marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def consume(self, key: str, policy: Policy, now: Optional[float] = None) -> Tuple[bool, float, float]:
+        """Take one token from ``key``'s bucket.
+
+        Returns ``(allowed, tokens_remaining, seconds_until_next_token)``.
+        """
+        h = self.key_hash(key)
+        home = h % self.slots
+        stripe_start = home - home % STRIPE_SLOTS
+        lock_offset = stripe_start * _SLOT.size
+        lock_len = STRIPE_SLOTS * _SLOT.size
+        buf = self._map
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, lock_len, lock_offset)
+        try:
+            # Read the clock under the lock so writers never move a bucket's
+            # refill time backwards
+            now = time.time() if now is None else now
+            slot = free = oldest = None
+            oldest_seen = math.inf
+            for i in range(self.probe):
+                idx = stripe_start + (home - stripe_start + i) % STRIPE_SLOTS
+                key_h, tokens, last = _SLOT.unpack_from(buf, idx * _SLOT.size)
+                if key_h == h:
+                    slot = idx
+                    break
+                if free is None and (key_h == 0 or now - last > self.idle_seconds):
+                    free = idx
+                if last < oldest_seen:
+                    oldest, oldest_seen = idx, last
+            if slot is None:
+                # New (or evicted) bucket starts full; when every probed slot is
+                # busy the least recently refilled one is reclaimed
+                slot = free if free is not None else oldest
+                tokens, last = float(policy.limit), now
+            tokens = min(float(policy.limit), tokens + max(0.0, now - last) * policy.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            _SLOT.pack_into(buf, slot * _SLOT.size, h, tokens, max(now, last))
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, lock_len, lock_offset)
+        wait = 0.0 if tokens >= 1.0 else (1.0 - tokens) / policy.rate
+        return allowed, tokens, wait
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class RateLimiter:
+    def __init__(self, default: Policy, routes: Dict[str, Policy], store: SharedBucketStore):
+        self.default = default
+        self.routes = routes
+        self.store = store
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        default = Policy.parse(os.getenv("RATE_LIMIT_DEFAULT", "300/60"))
+        routes = {}
+        for rule in filter(None, os.getenv("RATE_LIMIT_ROUTES", "").split(";")):
+            route, _, spec = rule.rpartition("=")
+            method, _, path = route.strip().partition(" ")
+            routes[f"{method.upper()} {path.strip()}"] = Policy.parse(spec)
+        idle = max(p.period for p in [default, *routes.values()])
+        store = SharedBucketStore(
+            path=os.getenv("RATE_LIMIT_FILE"),
+            slots=int(os.getenv("RATE_LIMIT_SLOTS", "65536")),
+            probe=int(os.getenv("RATE_LIMIT_PROBE", "8")),
+            idle_seconds=idle,
+        )
+        return cls(default, routes, store)
+
+    def check(self, client: str, method: str, path: str, now: Optional[float] = None):
+        """Apply the per-IP bucket and, if configured, the per-route bucket.
+
+        Returns ``(allowed, policy, remaining, wait)`` for the most
+        restrictive bucket involved.
+        """
+        allowed, remaining, wait = self.store.consume(f"ip:{client}", self.default, now)
+        policy = self.default
+        route = f"{method} {path}"
+        route_policy = self.routes.get(route)
+        if route_policy is not None and allowed:
+            r_allowed, r_remaining, r_wait = self.store.consume(f"route:{client}:{route}", route_policy, now)
+            if not r_allowed or r_remaining < remaining:
+                allowed, policy, remaining, wait = r_allowed, route_policy, r_remaining, r_wait
+        return allowed, policy, remaining, wait
+
+
+def _headers(policy: Policy, remaining: float) -> List[Tuple[bytes, bytes]]:
+    # Seconds until the bucket would be full again
+    reset = math.ceil((policy.limit - remaining) / policy.rate)
+    return [
+        (b"ratelimit-limit", str(policy.limit).encode()),
+        (b"ratelimit-remaining", str(int(remaining)).encode()),
+        (b"ratelimit-reset", str(reset).encode()),
+        (b"ratelimit-policy", f"{policy.limit};w={int(policy.period)}".encode()),
+    ]
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with RateLimit-* and Retry-After headers."""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.enabled = _env_bool("RATE_LIMIT_ENABLED", True)
+        self.limiter = (limiter or RateLimiter.from_env()) if self.enabled else None
+        self.exempt = tuple(p.strip() for p in os.getenv("RATE_LIMIT_EXEMPT", "/health,/metrics").split(",") if p.strip())
+        legacy = "1" if _env_bool("RATE_LIMIT_TRUST_FORWARDED", False) else "0"
+        self.trusted_proxies = max(0, int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", legacy)))
+
+    def _client(self, scope) -> str:
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies:
+            return peer
+        # Repeated headers form one list, in order
+        hops = [
+            hop.strip()
+            for name, value in scope.get("headers", ())
+            if name == b"x-forwarded-for"
+            for hop in value.decode("latin-1").split(",")
+        ]
+        hops = [hop for hop in hops if hop]
+        # Each trusted proxy appended the address it was connected from; with
+        # fewer entries the request did not come through them all
+        return hops[-self.trusted_proxies] if len(hops) >= self.trusted_proxies else peer
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+        allowed, policy, remaining, wait = self.limiter.check(self._client(scope), scope["method"], scope["path"])
+        headers = _headers(policy, remaining)
+        if not allowed:
+            body = json.dumps({"error": "rate_limited", "retry_after": math.ceil(wait)}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(math.ceil(wait)).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,72 @@
+"""
+Replay analytics segments written by analytics_pipeline.py.
+
+Reads every segment in the directory in time order and writes the stored
+records back out as NDJSON (one {"received_at", "request_id", "event"} object
+per line), or just counts them. A truncated final line or gzip member -- what
+a crash mid-write leaves behind -- is skipped rather than treated as an error.
+
+Usage:
+    python replay_analytics.py [directory] [--since 2025-01-01T00:00:00] [--count]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Iterator, List
+
+from analytics_pipeline import SEGMENT_SUFFIXES
+
+def list_segments(directory: str) -> List[str]:
+    # Names start with a UTC timestamp, so lexical order is write order per worker
+    names = sorted(n for n in os.listdir(directory) if n.startswith("analytics-") and n.endswith(SEGMENT_SUFFIXES))
+    return [os.path.join(directory, n) for n in names]
+
+def _read_lines(path: str) -> Iterator[bytes]:
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            try:
+                yield from f
+            except (EOFError, gzip.BadGzipFile):
+                return
+    else:
+        with open(path, "rb") as f:
+            yield from f
+
+def iter_records(directory: str, since: float = 0.0) -> Iterator[dict]:
+    for path in list_segments(directory):
+        for line in _read_lines(path):
+            if not line.endswith(b"\n"):
+                break  # partial write
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("received_at", 0) >= since:
+                yield record
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored analytics events")
+    parser.add_argument("directory", nargs="?", default=os.getenv("ANALYTICS_DIR", "analytics_data"))
+    parser.add_argument("--since", help="only events received at or after this ISO timestamp (UTC)")
+    parser.add_argument("--count", action="store_true", help="print the number of events instead of the events")
+    args = parser.parse_args()
+
+    since = 0.0
+    if args.since:
+        ts = datetime.fromisoformat(args.since)
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        since = ts.timestamp()
+
+    if args.count:
+        print(sum(1 for _ in iter_records(args.directory, since)))
+        return
+    out = sys.stdout
+    for record in iter_records(args.directory, since):
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+if __name__ == "__main__":
+    main()
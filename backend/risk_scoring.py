@@ -0,0 +1,296 @@
+"""
+Vectorized batch risk scoring for submitted loan applications.
+
+``score_pending`` walks SUBMITTED applications that have no underwriting
+decision yet in id order, BATCH rows at a time. Each batch is one query over
+loan_applications alone (monthly income and debt come from the summary
+columns that financial_summary.py keeps in step with the income / liability
+rows). The rows are transposed into NumPy arrays and ``score_arrays``
+computes DTI, LTV, the risk score and the decision for the whole batch in one
+pass. The resulting UnderwritingDecision rows are written with a single
+executemany INSERT per batch.
+
+Risk score (0 best .. 100 worst) is a weighted mean of per-factor risks, each
+scaled to 0..1 between a "no risk" and a "full risk" anchor:
+    dti          0% .. 1.5 x max DTI
+    ltv          50% .. max LTV
+    credit       800 .. 500 (missing score counts as full risk)
+    employment   fixed per EmploymentStatus (EMPLOYMENT_RISK)
+
+Decision, first match wins:
+    request_more_info     no usable income, credit score or property value
+    reject                score >= RISK_REJECT_MIN, credit below the minimum
+                          or amount above the maximum
+    approve               score <= RISK_APPROVE_MAX and DTI / LTV within limits
+    conditional_approval  everything else
+
+Limits default to the ``system_settings`` rows (min_credit_score,
+max_dti_ratio, max_loan_amount); the environment overrides them.
+
+Settings:
+    RISK_WEIGHTS        per-factor weights (default "dti=0.35,ltv=0.25,credit=0.3,employment=0.1")
+    RISK_APPROVE_MAX    highest score that can be auto-approved (default 35)
+    RISK_REJECT_MIN     lowest score that is rejected (default 70)
+    RISK_MAX_DTI        overrides system_settings.max_dti_ratio (fallback 43)
+    RISK_MIN_CREDIT     overrides system_settings.min_credit_score (fallback 620)
+    RISK_MAX_LOAN       overrides system_settings.max_loan_amount (fallback 2000000)
+    RISK_MAX_LTV        highest LTV that can be auto-approved (default 97)
+    RISK_BATCH_SIZE     applications per query / insert (default 5000)
+    RISK_ENGINE_EMAIL   user recorded as the underwriter (default risk-engine@system.local)
+"""
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import Float, case, cast, exists, func, insert, select
+
+from database import EmploymentStatus, LoanApplication, LoanStatus, SystemSetting, UnderwritingDecision, User, UserRole
+
+Decision = UnderwritingDecision.__table__.c.decision.type.enum_class
+
+# Decision codes produced by score_arrays, indexes into DECISIONS
+APPROVE, CONDITIONAL, REJECT, MORE_INFO = range(4)
+DECISIONS = (Decision.APPROVE, Decision.CONDITIONAL_APPROVAL, Decision.REJECT, Decision.REQUEST_MORE_INFO)
+
+EMPLOYMENT_RISK = {
+    EmploymentStatus.EMPLOYED: 0.1,
+    EmploymentStatus.RETIRED: 0.3,
+    EmploymentStatus.SELF_EMPLOYED: 0.4,
+    EmploymentStatus.STUDENT: 0.8,
+    EmploymentStatus.UNEMPLOYED: 1.0,
+}
+
+# Numeric(5, 2) columns
+RATIO_MAX = 999.99
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {"dti": 0.35, "ltv": 0.25, "credit": 0.3, "employment": 0.1}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        factor, _, weight = item.partition("=")
+        factor = factor.strip()
+        if factor not in weights:
+            raise ValueError(f"unknown risk factor {factor!r}")
+        weights[factor] = max(0.0, float(weight))
+    if not sum(weights.values()):
+        raise ValueError("risk weights must not all be zero")
+    return weights
+
+
+class RiskConfig:
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        approve_max: Optional[float] = None,
+        reject_min: Optional[float] = None,
+        max_dti: Optional[float] = None,
+        min_credit: Optional[float] = None,
+        max_loan: Optional[float] = None,
+        max_ltv: Optional[float] = None,
+    ):
+        # Explicit values win, zeros included; None falls back to the environment
+        self.weights = weights or parse_weights(os.getenv('RISK_WEIGHTS', ''))
+        self.approve_max = approve_max if approve_max is not None else float(os.getenv('RISK_APPROVE_MAX', '35'))
+        self.reject_min = reject_min if reject_min is not None else float(os.getenv('RISK_REJECT_MIN', '70'))
+        self.max_dti = max_dti if max_dti is not None else float(os.getenv('RISK_MAX_DTI', '43'))
+        self.min_credit = min_credit if min_credit is not None else float(os.getenv('RISK_MIN_CREDIT', '620'))
+        self.max_loan = max_loan if max_loan is not None else float(os.getenv('RISK_MAX_LOAN', '2000000'))
+        self.max_ltv = max_ltv if max_ltv is not None else float(os.getenv('RISK_MAX_LTV', '97'))
+
+    @classmethod
+    def from_settings(cls, conn) -> "RiskConfig":
+        """Limits from system_settings unless set in the environment."""
+        rows = dict(conn.execute(
+            select(SystemSetting.setting_key, SystemSetting.setting_value)
+            .where(SystemSetting.setting_key.in_(("max_dti_ratio", "min_credit_score", "max_loan_amount")))
+        ).all())
+
+        def limit(env: str, key: str) -> Optional[float]:
+            value = os.getenv(env) or rows.get(key)
+            return float(value) if value else None
+
+        return cls(
+            max_dti=limit('RISK_MAX_DTI', "max_dti_ratio"),
+            min_credit=limit('RISK_MIN_CREDIT', "min_credit_score"),
+            max_loan=limit('RISK_MAX_LOAN', "max_loan_amount"),
+        )
+
+
+def _risk(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Scale to 0 at ``low`` .. 1 at ``high`` (either direction), clipped."""
+    return np.clip((values - low) / (high - low), 0.0, 1.0)
+
+
+def score_arrays(cols: Dict[str, np.ndarray], config: RiskConfig) -> Dict[str, np.ndarray]:
+    """Score a batch given as float arrays (NaN = missing).
+
+    ``cols`` needs loan_amount, property_value, down_payment, credit_score,
+    employment_risk, monthly_income and monthly_debt. Returns dti, ltv (NaN
+    when not computable), risk_score (int) and decision (codes into DECISIONS).
+    """
+    loan = cols["loan_amount"]
+    income = cols["monthly_income"]
+    credit = cols["credit_score"]
+    down = np.nan_to_num(cols["down_payment"])
+
+    # Without an appraisal the purchase price is loan + down payment
+    value = np.where(np.isnan(cols["property_value"]) & (down > 0), loan + down, cols["property_value"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dti = np.where(income > 0, cols["monthly_debt"] / income * 100, np.nan)
+        ltv = np.where(value > 0, loan / value * 100, np.nan)
+    dti = np.minimum(dti, RATIO_MAX)
+    ltv = np.minimum(ltv, RATIO_MAX)
+
+    w = config.weights
+    weighted = (
+        w["dti"] * np.nan_to_num(_risk(dti, 0.0, config.max_dti * 1.5), nan=1.0)
+        + w["ltv"] * np.nan_to_num(_risk(ltv, 50.0, config.max_ltv), nan=1.0)
+        + w["credit"] * np.nan_to_num(_risk(credit, 800.0, 500.0), nan=1.0)
+        + w["employment"] * np.nan_to_num(cols["employment_risk"], nan=1.0)
+    )
+    score = np.rint(weighted * 100.0 / sum(w.values())).astype(np.int16)
+
+    more_info = np.isnan(dti) | np.isnan(ltv) | np.isnan(credit)
+    reject = (score >= config.reject_min) | (credit < config.min_credit) | (loan > config.max_loan)
+    approve = (score <= config.approve_max) & (dti <= config.max_dti) & (ltv <= config.max_ltv)
+    decision = np.select([more_info, reject, approve], [MORE_INFO, REJECT, APPROVE], CONDITIONAL).astype(np.int8)
+    return {"dti": dti, "ltv": ltv, "risk_score": score, "decision": decision}
+
+
+# ----------------------------------------------------------------------------
+# Database
+# ----------------------------------------------------------------------------
+def _as_float(column):
+    return cast(column, Float)
+
+
+def pending_select(batch_size: int, after: Optional[uuid.UUID] = None):
+    """One batch of unscored submitted applications with their income/debt."""
+    la = LoanApplication
+    employment = case(
+        *((la.employment_status == status, risk) for status, risk in EMPLOYMENT_RISK.items()),
+        else_=None,
+    )
+    stmt = (
+        select(
+            la.id,
+            _as_float(la.loan_amount),
+            _as_float(la.property_value),
+            _as_float(la.down_payment),
+            _as_float(la.credit_score),
+            _as_float(employment),
+            # Maintained from the income / liability rows (financial_summary.py)
+            _as_float(la.monthly_income),
+            _as_float(func.coalesce(la.monthly_debt, 0)),
+        )
+        .where(
+            la.status == LoanStatus.SUBMITTED,
+            ~exists().where(UnderwritingDecision.application_id == la.id),
+        )
+        .order_by(la.id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        stmt = stmt.where(la.id > after)
+    return stmt
+
+
+COLUMNS = ("loan_amount", "property_value", "down_payment", "credit_score",
+           "employment_risk", "monthly_income", "monthly_debt")
+
+
+def to_arrays(rows) -> tuple:
+    """Transpose result rows into (ids, {column: float array})."""
+    ids, *values = zip(*rows)
+    return list(ids), {name: np.array(col, dtype=np.float64) for name, col in zip(COLUMNS, values)}
+
+
+def decision_rows(ids, cols: Dict[str, np.ndarray], scored: Dict[str, np.ndarray], underwriter_id) -> list:
+    now = datetime.utcnow()
+    approved = np.isin(scored["decision"], (APPROVE, CONDITIONAL))
+    amount = np.where(approved, cols["loan_amount"], np.nan)
+
+    def nullable(values: np.ndarray) -> list:
+        return [None if v != v else v for v in np.round(values, 2).tolist()]
+
+    return [
+        {
+            "id": uuid.uuid4(),
+            "application_id": app_id,
+            "underwriter_id": underwriter_id,
+            "decision": DECISIONS[code],
+            "decision_date": now,
+            "notes": "automated risk score",
+            "approved_amount": approved_amount,
+            "debt_to_income_ratio": dti,
+            "loan_to_value_ratio": ltv,
+            "risk_score": score,
+            "created_at": now,
+        }
+        for app_id, code, approved_amount, dti, ltv, score in zip(
+            ids, scored["decision"].tolist(), nullable(amount), nullable(scored["dti"]),
+            nullable(scored["ltv"]), scored["risk_score"].tolist(),
+        )
+    ]
+
+
+def engine_underwriter_id(conn) -> uuid.UUID:
+    """The user automated decisions are recorded under, created on first use."""
+    email = os.getenv('RISK_ENGINE_EMAIL', 'risk-engine@system.local')
+    user_id = conn.execute(select(User.id).where(User.email == email)).scalar()
+    if user_id is None:
+        user_id = uuid.uuid4()
+        conn.execute(insert(User.__table__), [{
+            "id": user_id, "email": email, "password_hash": "!",  # cannot log in
+            "first_name": "Risk", "last_name": "Engine", "role": UserRole.UNDERWRITER,
+            "is_active": False,
+        }])
+    return user_id
+
+
+def score_pending(
+    engine,
+    config: Optional[RiskConfig] = None,
+    batch_size: Optional[int] = None,
+    limit: Optional[int] = None,
+    underwriter_id: Optional[uuid.UUID] = None,
+    dry_run: bool = False,
+) -> dict:
+    """Score unscored submitted applications; one transaction per batch.
+
+    Returns counts per decision plus query / scoring / insert timings.
+    """
+    batch_size = batch_size or int(os.getenv('RISK_BATCH_SIZE', '5000'))
+    stats = {"scored": 0, "decisions": {d.value: 0 for d in DECISIONS},
+             "fetch_seconds": 0.0, "score_seconds": 0.0, "insert_seconds": 0.0}
+    with engine.begin() as conn:
+        config = config or RiskConfig.from_settings(conn)
+        if underwriter_id is None and not dry_run:
+            underwriter_id = engine_underwriter_id(conn)
+
+    after = None
+    while limit is None or stats["scored"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["scored"])
+        with engine.begin() as conn:
+            t0 = time.perf_counter()
+            rows = conn.execute(pending_select(size, after)).all()
+            if not rows:
+                break
+            ids, cols = to_arrays(rows)
+            t1 = time.perf_counter()
+            scored = score_arrays(cols, config)
+            t2 = time.perf_counter()
+            if not dry_run:
+                conn.execute(insert(UnderwritingDecision.__table__), decision_rows(ids, cols, scored, underwriter_id))
+            t3 = time.perf_counter()
+        stats["fetch_seconds"] += t1 - t0
+        stats["score_seconds"] += t2 - t1
+        stats["insert_seconds"] += t3 - t2
+        for code, count in zip(*np.unique(scored["decision"], return_counts=True)):
+            stats["decisions"][DECISIONS[code].value] += int(count)
+        stats["scored"] += len(ids)
+        after = ids[-1]
+    return stats
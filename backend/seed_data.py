@@ -5,16 +5,19 @@ Run this script to populate the database with initial test data
 
 from database import SessionLocal, User, LoanApplication, SystemSetting, UserRole, LoanStatus, EmploymentStatus
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 import uuid
 from datetime import datetime, date
 from decimal import Decimal
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; passlib (and bcrypt) load on first use, not on import
+_pwd_context = None
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context.hash(password)
 
 def create_seed_data():
     db = SessionLocal()
@@ -210,4 +213,6 @@ def create_seed_data():
         db.close()
 
 if __name__ == "__main__":
+    from financial_summary import install_hooks
+    install_hooks()
     create_seed_data()
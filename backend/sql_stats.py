@@ -0,0 +1,108 @@
+"""
+Per-request SQL statement accounting and phase timing.
+
+Class-level ``before_cursor_execute`` / ``after_cursor_execute`` listeners
+count every statement any Engine executes, and the time spent in the driver,
+into the ``StatementStats`` bound to the current context (if any).
+``track_statements()`` binds one for the duration of a block; the listeners
+also see statements run by AsyncSession because SQLAlchemy carries the
+caller's context into its greenlets. DB time is measured around cursor
+execution, so rows a driver fetches lazily afterwards (sqlite3) are not in it.
+
+``serializing()`` attributes the enclosed block to the serialization phase of
+the current stats; ``TimedJSONResponse`` does the same for JSON rendering of
+regular FastAPI responses.
+
+``assert_max_queries(n)`` is the guard for tests and scripts: it raises
+``QueryBudgetExceeded`` when the block ran more than ``n`` statements, which
+is how N+1 regressions show up. Tracked blocks nest, so requests made inside
+it (each tracked by the app's middleware) count towards it; test_query_budget.py
+holds the API's routes to their QUERY_BUDGETS that way.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementStats:
+    __slots__ = ("count", "db_time", "serialize_time")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current: ContextVar[Optional[StatementStats]] = ContextVar("sql_statement_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        if context is not None:
+            context._sql_stats_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_stats_started", None)
+    if stats is not None and started is not None:
+        stats.db_time += time.perf_counter() - started
+
+
+@contextmanager
+def track_statements():
+    """Bind fresh stats for the block; on exit they are also added to the
+    enclosing block's, so a test's budget covers the requests it makes."""
+    stats = StatementStats()
+    parent = _current.get()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.count += stats.count
+            parent.db_time += stats.db_time
+            parent.serialize_time += stats.serialize_time
+
+
+def current_stats() -> Optional[StatementStats]:
+    return _current.get()
+
+
+@contextmanager
+def serializing():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.serialize_time += time.perf_counter() - started
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with serializing():
+            return super().render(content)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block"):
+    with track_statements() as stats:
+        yield stats
+    if stats.count > limit:
+        raise QueryBudgetExceeded(f"{label} ran {stats.count} SQL statements (budget {limit})")
@@ -0,0 +1,130 @@
+"""
+Workload-balanced auto-assignment (assignment_scheduler.py).
+
+  * each submission goes to the least-loaded active underwriter, counting
+    the open applications they already hold
+  * an application claimed elsewhere between the SELECT and the UPDATE
+    keeps its claimer, is reported as lost, and the heap's loads follow
+    what was actually stored
+
+Usage: python -m pytest -q test_assignment_scheduler.py
+"""
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from assignment_scheduler import AutoAssigner, LoadHeap
+from database import LoanApplication, LoanStatus, User, UserRole
+
+la = LoanApplication.__table__
+users = User.__table__
+
+
+def _users(conn, n: int, role=UserRole.UNDERWRITER, active: bool = True) -> list:
+    ids = [uuid.uuid4() for _ in range(n)]
+    conn.execute(insert(users), [{"id": uid, "email": f"{uid}@example.com", "password_hash": "!",
+                                  "first_name": "Assign", "last_name": "Test", "role": role,
+                                  "is_active": active} for uid in ids])
+    return ids
+
+
+def _loans(conn, applicant, n: int, status=LoanStatus.SUBMITTED, underwriter=None) -> list:
+    now = datetime.utcnow()
+    ids = [uuid.uuid4() for _ in range(n)]
+    conn.execute(insert(la), [{"id": loan_id, "applicant_id": applicant, "loan_number": f"AS-{loan_id.hex[:12]}",
+                               "loan_amount": Decimal("150000"), "loan_purpose": "home_purchase", "status": status,
+                               "submitted_at": now - timedelta(minutes=n - i), "priority": 0,
+                               "assigned_underwriter_id": underwriter} for i, loan_id in enumerate(ids)])
+    return ids
+
+
+def _held(engine) -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(
+            select(la.c.assigned_underwriter_id, func.count())
+            .where(la.c.assigned_underwriter_id.is_not(None), la.c.status == LoanStatus.SUBMITTED)
+            .group_by(la.c.assigned_underwriter_id)
+        ).all())
+
+
+@pytest.fixture()
+def desk(engine):
+    """Three active underwriters holding 0, 2 and 5 open applications, one
+    inactive one, and an applicant; everything else cleared."""
+    with engine.begin() as conn:
+        conn.execute(la.delete())
+        conn.execute(update(users).values(is_active=False))
+        idle, busy, swamped = _users(conn, 3)
+        _users(conn, 1, active=False)
+        [applicant] = _users(conn, 1, role=UserRole.APPLICANT)
+        _loans(conn, applicant, 2, underwriter=busy)
+        _loans(conn, applicant, 5, underwriter=swamped)
+        # Decided applications are not workload
+        _loans(conn, applicant, 4, status=LoanStatus.APPROVED, underwriter=idle)
+    return {"idle": idle, "busy": busy, "swamped": swamped, "applicant": applicant}
+
+
+def test_load_heap_takes_the_least_loaded():
+    a, b, c = (uuid.UUID(int=i) for i in (1, 2, 3))
+    heap = LoadHeap({a: 3, b: 1, c: 1})
+    assert sorted([heap.take(), heap.take()]) == [b, c]
+    heap.adjust(a, -3)
+    assert heap.take() == a
+    heap.adjust(uuid.uuid4(), 5)  # unknown underwriters are ignored
+    assert heap.loads == {a: 1, b: 2, c: 2}
+
+
+def test_assign_levels_the_workload(engine, desk):
+    with engine.begin() as conn:
+        _loans(conn, desk["applicant"], 9)
+    assigner = AutoAssigner(engine, batch_size=4)
+    assert assigner.rebuild() == 3
+    stats = assigner.assign_pending()
+    assert (stats["assigned"], stats["lost"], stats["batches"]) == (9, 0, 3)
+    # 0, 2, 5 plus nine: 5, 5, 5 and the last one to any of them -- nobody
+    # gets more while someone has less
+    held = _held(engine)
+    assert sorted(held[desk[name]] for name in ("idle", "busy", "swamped")) == [5, 5, 6]
+    assert assigner.heap.loads == held
+    assert assigner.workload() == {"underwriters": 3, "open": 16, "min": 5, "max": 6}
+
+
+def test_lost_race_is_settled_against_the_database(engine, desk, monkeypatch):
+    with engine.begin() as conn:
+        pending = _loans(conn, desk["applicant"], 4)
+    assigner = AutoAssigner(engine)
+    assigner.rebuild()
+    take = LoadHeap.take
+
+    def claim_meanwhile(heap):
+        if not claimed:
+            # A work-queue claim lands after the SELECT, before the UPDATE
+            with engine.begin() as conn:
+                conn.execute(update(la).where(la.c.id == pending[0]).values(assigned_underwriter_id=desk["swamped"]))
+            claimed.append(pending[0])
+        return take(heap)
+
+    claimed = []
+    monkeypatch.setattr(LoadHeap, "take", claim_meanwhile)
+    stats = assigner.assign_pending()
+    assert (stats["assigned"], stats["lost"]) == (3, 1)
+    held = _held(engine)
+    assert held[desk["swamped"]] == 6
+    # The planned load moved to the claimer: the heap agrees with the table
+    assert assigner.heap.loads == held
+    with engine.connect() as conn:
+        assert conn.execute(select(la.c.assigned_underwriter_id).where(la.c.id == pending[0])).scalar_one() == desk["swamped"]
+
+
+def test_release_accounts_for_decisions(engine, desk):
+    assigner = AutoAssigner(engine)
+    assigner.rebuild()
+    assigner.release(desk["swamped"], 5)
+    with engine.begin() as conn:
+        _loans(conn, desk["applicant"], 2)
+    assigner.assign_pending()
+    # swamped is now at 0 like idle, below busy's 2: one each
+    assert assigner.heap.loads == {desk["idle"]: 1, desk["busy"]: 2, desk["swamped"]: 1}
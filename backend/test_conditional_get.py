@@ -0,0 +1,81 @@
+"""
+Conditional GETs of the loan listing (conditional.py, GET /api/v1/loans).
+
+  * an unchanged page answers If-None-Match with a 304
+  * renaming an applicant changes the page's validators
+  * If-Modified-Since alone never gets a 304: a delete can leave the newest
+    updated_at where it was
+
+Usage: python -m pytest -q test_conditional_get.py
+"""
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from database import LoanApplication, LoanStatus, User
+
+la = LoanApplication.__table__
+PARAMS = {"status": "approved", "limit": 10}
+
+
+def _create_loan(client, first_name: str) -> uuid.UUID:
+    # A new applicant each time, untouched by earlier tests
+    response = client.post("/api/v1/loans", json={
+        "applicant_first_name": first_name, "applicant_last_name": f"Poller-{uuid.uuid4().hex[:8]}",
+        "loan_amount": 210000, "loan_purpose": "home_purchase", "annual_income": 78000, "employment_status": "employed",
+    })
+    assert response.status_code == 201, response.text
+    return uuid.UUID(response.json()["id"])
+
+
+@pytest.fixture()
+def approved(engine, client):
+    """Three approved loans, alone in ``PARAMS``' listing; the last one edited
+    most recently."""
+    with engine.begin() as conn:
+        # Earlier tests' loans out of the listing
+        conn.execute(update(la).where(la.c.status == LoanStatus.APPROVED).values(status=LoanStatus.CLOSED))
+    ids = [_create_loan(client, name) for name in ("Ada", "Bea", "Cy")]
+    with engine.begin() as conn:
+        conn.execute(update(la).where(la.c.id.in_(ids)).values(status=LoanStatus.APPROVED))
+        newest = conn.execute(select(la.c.updated_at).where(la.c.id == ids[-1])).scalar_one()
+        conn.execute(update(la).where(la.c.id == ids[-1]).values(updated_at=newest + timedelta(minutes=5)))
+    return ids
+
+
+def test_unchanged_page_is_a_304(client, approved):
+    first = client.get("/api/v1/loans", params=PARAMS)
+    assert first.status_code == 200
+    again = client.get("/api/v1/loans", params=PARAMS, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_applicant_rename_changes_the_page(engine, client, approved):
+    first = client.get("/api/v1/loans", params=PARAMS)
+    with engine.begin() as conn:
+        applicant = conn.execute(select(la.c.applicant_id).where(la.c.id == approved[0])).scalar_one()
+        renamed_at = conn.execute(select(la.c.updated_at).where(la.c.id == approved[-1])).scalar_one()
+        conn.execute(update(User.__table__).where(User.__table__.c.id == applicant)
+                     .values(first_name="Adele", updated_at=renamed_at + timedelta(minutes=1)))
+    after = client.get("/api/v1/loans", params=PARAMS, headers={"If-None-Match": first.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert after.headers["Last-Modified"] != first.headers["Last-Modified"]
+    assert any(loan["applicant_name"].startswith("Adele ") for loan in after.json())
+
+
+def test_if_modified_since_alone_misses_a_delete(engine, client, approved):
+    first = client.get("/api/v1/loans", params=PARAMS)
+    with Session(engine) as session:
+        # Not the newest row: the page's newest updated_at stays put
+        session.delete(session.get(LoanApplication, approved[0]))
+        session.commit()
+    after = client.get("/api/v1/loans", params=PARAMS, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert after.status_code == 200
+    assert after.headers["Last-Modified"] == first.headers["Last-Modified"]
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert len(after.json()) == 2
@@ -0,0 +1,103 @@
+"""
+Financial summaries (financial_summary.py) and the figures built on them.
+
+  * DTI rounds half up to the cent by one rule: the SQLite hooks, the
+    portfolio recompute and ``dti_ratio`` (which reconcile uses) agree on
+    x.xx5 values, so reconcile finds no drift and a recompute changes nothing
+  * the first itemised row of a kind replaces the stated figure, also when
+    several rows arrive in one flush
+  * /full totals are the maintained summary columns, the stated income
+    included
+
+Usage: python -m pytest -q test_financial_summary.py
+"""
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from database import (
+    ApplicantIncome, ApplicantLiability, IncomeType, LiabilityType, LoanApplication, LoanStatus, User, UserRole,
+)
+from financial_summary import dti_ratio, reconcile
+from portfolio_ratios import recompute_ratios
+
+# (stated monthly income, monthly payment, DTI): each ratio is exactly x.xx5,
+# the classic binary floating point cases (1.005, 2.675, ...) among them
+HALF_CENTS = [
+    ("2000.00", "20.10", "1.01"),
+    ("800.00", "21.40", "2.68"),
+    ("400.00", "4.46", "1.12"),
+    ("2000.00", "2.50", "0.13"),
+    ("1000.00", "2.85", "0.29"),
+]
+
+
+def _application(session, monthly_income) -> LoanApplication:
+    user = User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com", password_hash="!",
+                first_name="Summary", last_name="Test", role=UserRole.APPLICANT)
+    loan = LoanApplication(id=uuid.uuid4(), applicant=user, loan_number=f"FS-{uuid.uuid4().hex[:12]}",
+                           loan_amount=Decimal("100000"), loan_purpose="home_purchase",
+                           monthly_income=Decimal(monthly_income), status=LoanStatus.SUBMITTED)
+    session.add(loan)
+    session.flush()
+    return loan
+
+
+def _liability(loan, payment) -> ApplicantLiability:
+    return ApplicantLiability(application_id=loan.id, liability_type=list(LiabilityType)[0], creditor_name="Card",
+                              current_balance=Decimal("1000"), monthly_payment=Decimal(payment))
+
+
+def _income(loan, amount) -> ApplicantIncome:
+    return ApplicantIncome(application_id=loan.id, income_type=list(IncomeType)[0], source="Employer",
+                           monthly_amount=Decimal(amount))
+
+
+@pytest.mark.parametrize("income, payment, expected", HALF_CENTS)
+def test_dti_rounds_half_up(engine, income, payment, expected):
+    assert dti_ratio(Decimal(payment), Decimal(income)) == Decimal(expected)
+    with Session(engine) as session:
+        loan = _application(session, income)
+        session.add(_liability(loan, payment))
+        session.commit()
+        session.refresh(loan)
+        assert loan.dti_ratio == Decimal(expected)
+
+
+def test_reconcile_and_recompute_agree_with_the_hooks(engine):
+    # Runs after the parametrized cases above have stored their x.xx5 ratios
+    stats = reconcile(engine)
+    assert stats["checked"] >= len(HALF_CENTS)
+    assert stats["drifted"] == 0, stats
+    assert recompute_ratios(engine)["changed"] == 0
+
+
+def test_rows_in_one_flush_replace_the_stated_income(engine):
+    with Session(engine) as session:
+        loan = _application(session, "9000.00")
+        session.add_all([_income(loan, "100.00"), _income(loan, "200.00")])
+        session.commit()
+        session.refresh(loan)
+        assert (loan.monthly_income, loan.income_items) == (Decimal("300.00"), 2)
+    assert reconcile(engine)["drifted"] == 0
+
+
+def test_full_totals_are_the_summary_columns(engine, client):
+    created = client.post("/api/v1/loans", json={
+        "applicant_first_name": "Stated", "applicant_last_name": "Income", "loan_amount": 150000,
+        "loan_purpose": "home_purchase", "annual_income": 90000, "employment_status": "employed",
+    })
+    loan_id = created.json()["id"]
+    full = client.get(f"/api/v1/loans/{loan_id}/full").json()
+    # No income rows yet: the stated figure stands, in totals too
+    assert full["totals"]["monthly_income"] == float(full["monthly_income"]) == 7500.0
+    assert full["totals"]["debt_to_income_ratio"] == float(full["dti_ratio"])
+
+    with Session(engine) as session:
+        session.add(_liability(session.get(LoanApplication, uuid.UUID(loan_id)), "750.00"))
+        session.commit()
+    full = client.get(f"/api/v1/loans/{loan_id}/full", params={"include": "documents"}).json()
+    assert full["totals"]["monthly_debt"] == float(full["monthly_debt"]) == 750.0
+    assert full["totals"]["debt_to_income_ratio"] == float(full["dti_ratio"]) == 10.0
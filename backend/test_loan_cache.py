@@ -0,0 +1,111 @@
+"""
+Read-through loan cache: no stale entries after writes.
+
+  * an invalidation that lands while a detail is being loaded keeps that
+    load out of both tiers (the generation check in ``LoanCache.set``)
+  * writes outside the API handlers -- the financial summary hooks and the
+    portfolio recompute -- drop the loans they changed
+
+Usage: python -m pytest -q test_loan_cache.py
+"""
+import asyncio
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import app_hardened
+from database import ApplicantIncome, IncomeType
+from loan_cache import CachedLoan, LoanCache, LocalSharedTier, loan_cache
+from portfolio_ratios import recompute_ratios
+from ttl_cache import TTLCache
+
+
+def _create_loan(client, annual_income: int = 90000) -> str:
+    response = client.post("/api/v1/loans", json={
+        "applicant_first_name": "Cache", "applicant_last_name": "Reader", "loan_amount": 200000,
+        "loan_purpose": "home_purchase", "annual_income": annual_income, "employment_status": "employed",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _annual_income(client, loan_id: str) -> float:
+    response = client.get(f"/api/v1/loans/{loan_id}")
+    assert response.status_code == 200
+    return response.json()["annual_income"]
+
+
+def _income(loan_id: str, monthly_amount: int) -> dict:
+    return {"application_id": uuid.UUID(loan_id), "income_type": list(IncomeType)[0],
+            "source": "Employer", "monthly_amount": Decimal(monthly_amount)}
+
+
+def test_set_refuses_a_load_that_raced_an_invalidation():
+    cache = LoanCache(local=TTLCache(maxsize=10, ttl=30), shared=LocalSharedTier())
+    loan_id = uuid.uuid4()
+
+    async def scenario():
+        generation = cache.generation
+        # ... the SELECT runs; meanwhile a write commits and invalidates ...
+        await cache.invalidate([loan_id])
+        await cache.set(loan_id, CachedLoan('W/"old"', None, b"{}"), generation)
+        assert await cache.get(loan_id) is None
+        # A load started after the invalidation is cached as usual
+        await cache.set(loan_id, CachedLoan('W/"new"', None, b"{}"), cache.generation)
+        assert (await cache.get(loan_id)).etag == 'W/"new"'
+
+    asyncio.run(scenario())
+    assert cache.stale_loads == 1
+
+
+def test_detail_load_racing_a_write_is_not_cached(client, monkeypatch):
+    loan_id = _create_loan(client)
+    render = app_hardened.loan_row_to_dict
+
+    def write_lands_after_select(row):
+        loan_cache.invalidate_nowait([uuid.UUID(loan_id)])
+        return render(row)
+
+    monkeypatch.setattr(app_hardened, "loan_row_to_dict", write_lands_after_select)
+    stale = loan_cache.stale_loads
+    assert client.get(f"/api/v1/loans/{loan_id}").status_code == 200
+    assert loan_cache.local.get(uuid.UUID(loan_id)) is None
+    assert loan_cache.stale_loads == stale + 1
+
+
+def test_summary_hooks_invalidate(engine, client):
+    loan_id = _create_loan(client)
+    assert _annual_income(client, loan_id) == 90000.0
+    with Session(engine) as session:
+        # First itemised income replaces the stated figure
+        session.add(ApplicantIncome(**_income(loan_id, 5000)))
+        session.commit()
+    assert _annual_income(client, loan_id) == 60000.0
+
+
+def test_rolled_back_hook_writes_leave_the_cache_alone(engine, client):
+    loan_id = _create_loan(client)
+    assert _annual_income(client, loan_id) == 90000.0
+    invalidations = loan_cache.invalidations
+    with Session(engine) as session:
+        session.add(ApplicantIncome(**_income(loan_id, 5000)))
+        session.flush()
+        session.rollback()
+    assert loan_cache.invalidations == invalidations
+    assert loan_cache.local.get(uuid.UUID(loan_id)) is not None
+
+
+def test_recompute_invalidates(engine, client):
+    loan_id = _create_loan(client)
+    with Session(engine) as session:
+        session.add(ApplicantIncome(**_income(loan_id, 5000)))
+        session.commit()
+    assert _annual_income(client, loan_id) == 60000.0
+    with engine.begin() as conn:
+        # Core insert: no hooks, the summary is now behind
+        conn.execute(insert(ApplicantIncome.__table__), [_income(loan_id, 1000)])
+    stats = recompute_ratios(engine)
+    assert stats["changed"] >= 1
+    assert _annual_income(client, loan_id) == 72000.0
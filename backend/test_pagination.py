@@ -0,0 +1,116 @@
+"""
+Keyset pagination of GET /api/v1/loans (pagination.py).
+
+  * cursors round-trip, and one the API did not issue is a 400
+  * rows sharing a listing key are neither repeated nor skipped across pages
+  * status / underwriter filters hold on every page after the first
+  * a status-filtered page is served by idx_loan_applications_status_listing
+
+Usage: python -m pytest -q test_pagination.py
+"""
+import base64
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from database import LoanApplication, LoanStatus, User, UserRole
+from pagination import InvalidCursor, apply_keyset, decode_cursor, encode_cursor
+
+la = LoanApplication.__table__
+# Shared by every loan of the listing tests, so the tie-break on id is all
+# that orders them
+LISTED_AT = datetime(2024, 3, 1, 9, 30)
+
+
+def _create_loan(client) -> uuid.UUID:
+    response = client.post("/api/v1/loans", json={
+        "applicant_first_name": "Page", "applicant_last_name": "Turner", "loan_amount": 180000,
+        "loan_purpose": "home_purchase", "annual_income": 84000, "employment_status": "employed",
+    })
+    assert response.status_code == 201, response.text
+    return uuid.UUID(response.json()["id"])
+
+
+@pytest.fixture(scope="module")
+def tied(engine, client):
+    """Seven loans under review with one submission time; the first four held
+    by one underwriter. Returns ``(loan ids, underwriter id)``."""
+    ids = [_create_loan(client) for _ in range(7)]
+    underwriter = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": underwriter, "email": f"uw-{underwriter}@example.com",
+                                               "password_hash": "!", "first_name": "Page", "last_name": "Reviewer",
+                                               "role": UserRole.UNDERWRITER, "is_active": True}])
+        conn.execute(update(la).where(la.c.id.in_(ids))
+                     .values(status=LoanStatus.UNDER_REVIEW, submitted_at=LISTED_AT))
+        conn.execute(update(la).where(la.c.id.in_(ids[:4])).values(assigned_underwriter_id=underwriter))
+    return ids, underwriter
+
+
+def _walk(client, **params) -> list:
+    """Every page of a listing, following X-Next-Cursor; the ids in order."""
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/v1/loans", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= params["limit"]
+        ids.extend(uuid.UUID(loan["id"]) for loan in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+def test_cursor_round_trip():
+    loan_id = uuid.uuid4()
+    listed_at = datetime(2024, 3, 1, 9, 30, 15, 123456)
+    cursor = encode_cursor(listed_at, loan_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (listed_at, loan_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b'{"a":1}').decode(),
+    base64.urlsafe_b64encode(b'["yesterday","42"]').decode(),
+])
+def test_decode_rejects_foreign_cursors(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_equal_listing_keys_page_without_gaps_or_repeats(client, tied):
+    ids, _ = tied
+    listed = _walk(client, status="under_review", limit=3)
+    assert listed == sorted(ids, reverse=True)
+
+
+def test_filters_hold_across_pages(client, tied):
+    ids, underwriter = tied
+    listed = _walk(client, status="under_review", assigned_underwriter_id=str(underwriter), limit=1)
+    assert listed == sorted(ids[:4], reverse=True)
+    # Same cursor position, other underwriter: nothing of this one leaks in
+    assert _walk(client, status="under_review", assigned_underwriter_id=str(uuid.uuid4()), limit=2) == []
+
+
+def test_tampered_cursor_is_a_400(client, tied):
+    first = client.get("/api/v1/loans", params={"status": "under_review", "limit": 2})
+    cursor = first.headers["X-Next-Cursor"]
+    tampered = ("A" if cursor[0] != "A" else "B") + cursor[1:]
+    for bad in (tampered, "%%%", cursor[:-5]):
+        response = client.get("/api/v1/loans", params={"status": "under_review", "limit": 2, "cursor": bad})
+        assert response.status_code == 400, bad
+        assert response.json()["error"] == "invalid_cursor"
+
+
+def test_status_page_uses_the_status_listing_index(engine, tied):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN is SQLite's")
+    stmt = apply_keyset(select(la.c.id).where(la.c.status == LoanStatus.UNDER_REVIEW),
+                        encode_cursor(LISTED_AT, tied[0][0]), 50)
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    assert "idx_loan_applications_status_listing" in " ".join(str(step[-1]) for step in plan)
@@ -0,0 +1,77 @@
+"""
+Set-based portfolio recompute (portfolio_ratios.py).
+
+  * ``scanned`` counts the applications a run covered: with a status filter,
+    the matching ones, not every id in each chunk
+  * PostgreSQL's loan_dti_ratio() (migrations/009, applied by
+    install_triggers) rounds as ``financial_summary.dti_ratio`` does
+
+Usage: python -m pytest -q test_portfolio_ratios.py
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, text
+
+from conftest import postgres_only
+from database import ApplicantLiability, LiabilityType, LoanApplication, LoanStatus, User, UserRole
+from financial_summary import MIGRATIONS, dti_ratio
+from portfolio_ratios import recompute_ratios
+from test_financial_summary import HALF_CENTS
+
+la = LoanApplication.__table__
+
+
+@pytest.fixture(scope="module")
+def portfolio(engine):
+    """Seven submitted and five approved applications: stated income, and a
+    liability written without the summary hooks."""
+    applicant = uuid.uuid4()
+    statuses = [LoanStatus.SUBMITTED] * 7 + [LoanStatus.APPROVED] * 5
+    ids = [uuid.uuid4() for _ in statuses]
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": applicant, "email": f"{applicant}@example.com",
+                                               "password_hash": "!", "first_name": "Port", "last_name": "Folio",
+                                               "role": UserRole.APPLICANT}])
+        conn.execute(insert(la), [{"id": loan_id, "applicant_id": applicant, "loan_number": f"PR-{i:04d}",
+                                   "loan_amount": Decimal("200000"), "loan_purpose": "home_purchase",
+                                   "status": status, "monthly_income": Decimal("6000"),
+                                   "submitted_at": datetime.utcnow()}
+                                  for i, (loan_id, status) in enumerate(zip(ids, statuses))])
+        conn.execute(insert(ApplicantLiability.__table__), [{
+            "application_id": loan_id, "liability_type": list(LiabilityType)[0], "creditor_name": "Card",
+            "current_balance": Decimal("9000"), "monthly_payment": Decimal("1500"),
+        } for loan_id in ids])
+    return statuses
+
+
+@pytest.mark.parametrize("chunk_size", [3, 5, 100])
+def test_scanned_counts_matching_applications(engine, portfolio, chunk_size):
+    approved = recompute_ratios(engine, statuses=[LoanStatus.APPROVED], chunk_size=chunk_size)
+    assert approved["scanned"] == portfolio.count(LoanStatus.APPROVED)
+    both = recompute_ratios(engine, statuses=[LoanStatus.APPROVED, LoanStatus.SUBMITTED], chunk_size=chunk_size)
+    assert both["scanned"] == len(portfolio)
+    assert recompute_ratios(engine, chunk_size=chunk_size)["scanned"] == len(portfolio)
+
+
+def test_recompute_brings_the_ratios_up_to_date(engine, portfolio):
+    # The scanned tests above already recomputed: nothing is left to change
+    assert recompute_ratios(engine, chunk_size=4)["changed"] == 0
+    with engine.connect() as conn:
+        assert set(conn.execute(text("SELECT dti_ratio FROM loan_applications")).scalars()) == {Decimal("25.00")}
+
+
+def test_dti_migration_follows_the_summary_migrations():
+    names = [path.rsplit("/", 1)[-1] for path in MIGRATIONS]
+    assert names.index("009_dti_ratio_precision.sql") > names.index("003_financial_summaries.sql")
+
+
+@postgres_only
+@pytest.mark.parametrize("income, payment, expected", HALF_CENTS)
+def test_sql_dti_ratio_rounds_like_python(engine, income, payment, expected):
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT loan_dti_ratio(:debt, :income)"),
+                              {"debt": Decimal(payment), "income": Decimal(income)}).scalar_one()
+    assert stored == dti_ratio(Decimal(payment), Decimal(income)) == Decimal(expected)
@@ -0,0 +1,66 @@
+"""
+SQL statement budgets for the loan routes (QUERY_BUDGETS in app_hardened.py).
+
+Each route is called over a small and a larger data set under
+``assert_max_queries``: it must stay within its budget, and its statement
+count must not grow with the number of loans (an N+1 would).
+
+Usage: python -m pytest -q test_query_budget.py
+"""
+from app_hardened import QUERY_BUDGETS
+from sql_stats import assert_max_queries
+
+SIZES = (5, 60)
+
+
+def _loan(i: int) -> dict:
+    return {
+        "applicant_first_name": f"Budget{i % 13}", "applicant_last_name": "Test",
+        "loan_amount": 100000 + i, "loan_purpose": "home_purchase",
+        "annual_income": 60000, "employment_status": "employed",
+    }
+
+
+def _grow_to(client, size: int) -> list:
+    """Top the database up to ``size`` loans; returns every loan id."""
+    existing = client.get("/api/v1/loans", params={"limit": 500}).json()
+    missing = size - len(existing)
+    if missing > 0:
+        body = client.post("/api/v1/loans/bulk", json=[_loan(len(existing) + i) for i in range(missing)]).json()
+        assert body["failed"] == 0
+    return [loan["id"] for loan in client.get("/api/v1/loans", params={"limit": 500}).json()]
+
+
+def _statements(budget_key, call) -> int:
+    with assert_max_queries(QUERY_BUDGETS[budget_key], label=" ".join(budget_key)) as stats:
+        response = call()
+    assert response.status_code == 200, response.text
+    # Zero would mean the request escaped tracking (or hit a cache)
+    assert stats.count > 0
+    return stats.count
+
+
+def test_listing_within_budget(client):
+    counts = []
+    for size in SIZES:
+        ids = _grow_to(client, size)
+        assert len(ids) == size
+        counts.append(_statements(("GET", "/api/v1/loans"), lambda: client.get("/api/v1/loans", params={"limit": 500})))
+    assert len(set(counts)) == 1, counts
+
+
+def test_detail_within_budget(client):
+    counts = []
+    for size in SIZES:
+        ids = _grow_to(client, size)
+        # A different loan per size, so each read is a cache miss
+        counts.append(_statements(("GET", "/api/v1/loans/{loan_id}"), lambda: client.get(f"/api/v1/loans/{ids[size - 1]}")))
+    assert len(set(counts)) == 1, counts
+
+
+def test_full_view_within_budget(client):
+    counts = []
+    for size in SIZES:
+        ids = _grow_to(client, size)
+        counts.append(_statements(("GET", "/api/v1/loans/{loan_id}/full"), lambda: client.get(f"/api/v1/loans/{ids[-1]}/full")))
+    assert len(set(counts)) == 1, counts
@@ -0,0 +1,124 @@
+"""
+Rate limiting (rate_limit.py).
+
+  * the client IP is the X-Forwarded-For entry RATE_LIMIT_TRUSTED_PROXIES
+    hops from the right; entries the client wrote itself are never used
+  * one bucket is shared by every process that maps the same file: workers
+    together allow exactly the limit, not the limit each
+
+Usage: python -m pytest -q test_rate_limit.py
+"""
+import asyncio
+import multiprocessing
+
+import pytest
+
+from rate_limit import Policy, RateLimiter, RateLimitMiddleware, SharedBucketStore
+
+PEER = "10.0.0.2"
+
+
+@pytest.fixture()
+def limiter_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_FILE", str(tmp_path / "buckets"))
+    monkeypatch.setenv("RATE_LIMIT_SLOTS", "1024")
+    monkeypatch.delenv("RATE_LIMIT_TRUST_FORWARDED", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_TRUSTED_PROXIES", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_ENABLED", raising=False)
+    return monkeypatch
+
+
+def _middleware(monkeypatch, trusted: int, app=None) -> RateLimitMiddleware:
+    monkeypatch.setenv("RATE_LIMIT_TRUSTED_PROXIES", str(trusted))
+    return RateLimitMiddleware(app)
+
+
+def _scope(*forwarded: str) -> dict:
+    return {"type": "http", "method": "GET", "path": "/api/v1/loans", "client": (PEER, 51000),
+            "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded]}
+
+
+@pytest.mark.parametrize("trusted, forwarded, client", [
+    # No trusted proxies: the header is the client's own word
+    (0, ["198.51.100.7"], PEER),
+    (1, [], PEER),
+    (1, ["203.0.113.9"], "203.0.113.9"),
+    # Spoofed leftmost entries are ignored
+    (1, ["1.2.3.4, 203.0.113.9"], "203.0.113.9"),
+    (2, ["1.2.3.4, 203.0.113.9, 10.0.0.1"], "203.0.113.9"),
+    # Repeated headers form one list; empty entries do not count as hops
+    (2, ["1.2.3.4", "203.0.113.9, , 10.0.0.1"], "203.0.113.9"),
+    # Fewer entries than proxies: it did not come through them all
+    (3, ["203.0.113.9, 10.0.0.1"], PEER),
+])
+def test_client_from_forwarded_for(limiter_env, trusted, forwarded, client):
+    middleware = _middleware(limiter_env, trusted)
+    assert middleware._client(_scope(*forwarded)) == client
+    middleware.limiter.store.close()
+
+
+def test_legacy_trust_forwarded_means_one_proxy(limiter_env):
+    limiter_env.setenv("RATE_LIMIT_TRUST_FORWARDED", "true")
+    middleware = RateLimitMiddleware(None)
+    assert middleware.trusted_proxies == 1
+    middleware.limiter.store.close()
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_bucket(limiter_env):
+    limiter_env.setenv("RATE_LIMIT_DEFAULT", "2/60")
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = _middleware(limiter_env, 1, app)
+
+    async def status(forwarded: str) -> int:
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(_scope(forwarded), None, send)
+        return sent[0]["status"]
+
+    statuses = [asyncio.run(status(f"{spoof}, 203.0.113.9")) for spoof in ("1.1.1.1", "2.2.2.2", "3.3.3.3")]
+    assert statuses == [200, 200, 429]
+    middleware.limiter.store.close()
+
+
+def _drain(path: str, attempts: int, results) -> None:
+    # A worker of its own: opens the shared file itself
+    store = SharedBucketStore(path=path, slots=1024)
+    policy = Policy(100, 3600)
+    results.put(sum(store.consume("ip:203.0.113.9", policy, now=1_000.0)[0] for _ in range(attempts)))
+    store.close()
+
+
+def test_bucket_is_shared_across_processes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    path = str(tmp_path / "buckets")
+    SharedBucketStore(path=path, slots=1024).close()
+    workers = [ctx.Process(target=_drain, args=(path, 60, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    allowed = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+    # 240 attempts at one clock reading: exactly the 100 tokens, across all four
+    assert sum(allowed) == 100
+
+
+def test_limiter_applies_the_route_policy(limiter_env):
+    limiter_env.setenv("RATE_LIMIT_DEFAULT", "100/60")
+    limiter_env.setenv("RATE_LIMIT_ROUTES", "POST /analytics=1/60")
+    limiter = RateLimiter.from_env()
+    assert limiter.check("203.0.113.9", "POST", "/analytics", now=50.0)[0]
+    allowed, policy, _, wait = limiter.check("203.0.113.9", "POST", "/analytics", now=50.0)
+    assert not allowed and policy.limit == 1 and wait == pytest.approx(60.0)
+    # Other routes and clients keep their own buckets
+    assert limiter.check("203.0.113.9", "GET", "/api/v1/loans", now=50.0)[0]
+    assert limiter.check("198.51.100.7", "POST", "/analytics", now=50.0)[0]
+    limiter.store.close()
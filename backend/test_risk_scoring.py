@@ -0,0 +1,85 @@
+"""
+Vectorized risk scorer (risk_scoring.score_arrays) and its configuration.
+
+Scores are made to order by weighting credit alone: a credit score of c
+scores round((800 - c) / 3), so 695 is 35 and 590 is 70.
+
+Usage: python -m pytest -q test_risk_scoring.py
+"""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from risk_scoring import APPROVE, CONDITIONAL, MORE_INFO, REJECT, RiskConfig, score_arrays  # noqa: E402
+
+CREDIT_ONLY = {"dti": 0.0, "ltv": 0.0, "credit": 1.0, "employment": 0.0}
+NAN = math.nan
+
+
+def _config(**overrides) -> RiskConfig:
+    limits = dict(weights=CREDIT_ONLY, approve_max=35, reject_min=70, max_dti=43, min_credit=0,
+                  max_loan=1_000_000, max_ltv=97)
+    return RiskConfig(**{**limits, **overrides})
+
+
+def _score(config, **row) -> dict:
+    """Score one application; unspecified columns are a clean approval
+    (DTI 0, LTV 50, credit 800)."""
+    values = {"loan_amount": 100_000, "property_value": 200_000, "down_payment": 0, "credit_score": 800,
+              "employment_risk": 0.0, "monthly_income": 10_000, "monthly_debt": 0, **row}
+    scored = score_arrays({name: np.array([value], dtype=np.float64) for name, value in values.items()}, config)
+    return {name: column[0] for name, column in scored.items()}
+
+
+@pytest.mark.parametrize("row, decision", [
+    # Score boundaries: approve at <= approve_max, reject at >= reject_min
+    ({"credit_score": 695}, APPROVE),
+    ({"credit_score": 692}, CONDITIONAL),
+    ({"credit_score": 593}, CONDITIONAL),
+    ({"credit_score": 590}, REJECT),
+    # DTI / LTV limits are inclusive; just over leaves a conditional approval
+    ({"monthly_debt": 4_300}, APPROVE),
+    ({"monthly_debt": 4_301}, CONDITIONAL),
+    ({"loan_amount": 97_000, "property_value": 100_000}, APPROVE),
+    ({"loan_amount": 97_001, "property_value": 100_000}, CONDITIONAL),
+    # Hard limits reject whatever the score
+    ({"loan_amount": 1_000_001, "property_value": 2_000_000}, REJECT),
+    # Nothing to score on
+    ({"monthly_income": NAN}, MORE_INFO),
+    ({"monthly_income": 0}, MORE_INFO),
+    ({"credit_score": NAN}, MORE_INFO),
+    ({"property_value": NAN}, MORE_INFO),
+    # ... unless the down payment gives the purchase price
+    ({"property_value": NAN, "down_payment": 25_000}, APPROVE),
+])
+def test_decision_table(row, decision):
+    assert _score(_config(), **row)["decision"] == decision
+
+
+def test_minimum_credit_rejects_below_only():
+    config = _config(min_credit=700)
+    assert _score(config, credit_score=700)["decision"] != REJECT
+    assert _score(config, credit_score=699)["decision"] == REJECT
+
+
+def test_ratios_and_missing_values():
+    scored = _score(_config(), monthly_debt=2_500, loan_amount=150_000, property_value=NAN, down_payment=50_000)
+    assert (scored["dti"], scored["ltv"]) == (25.0, 75.0)
+    missing = _score(_config(), monthly_income=NAN, property_value=NAN)
+    assert math.isnan(missing["dti"]) and math.isnan(missing["ltv"])
+    # Missing factors count as full risk in the score
+    assert _score(_config(weights={**CREDIT_ONLY, "dti": 1.0}), monthly_income=NAN)["risk_score"] == 50
+
+
+def test_explicit_zero_limits_are_kept(monkeypatch):
+    for env in ("RISK_APPROVE_MAX", "RISK_REJECT_MIN", "RISK_MIN_CREDIT"):
+        monkeypatch.setenv(env, "50")
+    config = _config(approve_max=0, min_credit=0)
+    assert (config.approve_max, config.min_credit, config.reject_min) == (0, 0, 70)
+    assert _score(config, credit_score=800)["decision"] == APPROVE
+    assert _score(config, credit_score=797)["decision"] == CONDITIONAL
+    # No credit floor: a poor score is judged by the score alone
+    assert _score(config, credit_score=600)["decision"] == CONDITIONAL
+    assert RiskConfig().min_credit == 50
@@ -0,0 +1,117 @@
+"""
+Underwriting queue claims must not look like edits of the loan.
+
+A claim, lease heartbeat or release leaves updated_at -- and with it the
+loan's ETag / Last-Modified -- untouched, so conditional GETs keep getting
+304s while an underwriter works on the application. On PostgreSQL this is
+the loan_applications trigger from migrations/010 (run with
+TEST_DATABASE_URL set to a PostgreSQL URL).
+
+Usage: python -m pytest -q test_work_queue.py
+"""
+import uuid
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from conftest import apply_migration, postgres_only
+from database import LoanApplication, User, UserRole
+from loan_cache import loan_cache
+
+la = LoanApplication.__table__
+
+
+@pytest.fixture(scope="module")
+def queue(engine, client):
+    if engine.dialect.name == "postgresql":
+        apply_migration(engine, "010_claim_keeps_updated_at.sql")
+    underwriter = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": underwriter, "email": f"uw-{underwriter}@example.com",
+                                               "password_hash": "!", "first_name": "Queue", "last_name": "Tester",
+                                               "role": UserRole.UNDERWRITER, "is_active": True}])
+    return underwriter
+
+
+def _create_loan(client, priority: int = 0) -> str:
+    response = client.post("/api/v1/loans", json={
+        "applicant_first_name": "Lease", "applicant_last_name": "Holder", "loan_amount": 250000,
+        "loan_purpose": "home_purchase", "annual_income": 90000, "employment_status": "employed",
+        "priority": priority,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _claim(client, underwriter) -> str:
+    response = client.post("/api/v1/underwriting/claim-next", json={"underwriter_id": str(underwriter)})
+    assert response.status_code == 200, response.text
+    return response.json()["loan_id"]
+
+
+def _updated_at(engine, loan_id: str):
+    with engine.connect() as conn:
+        return conn.execute(select(la.c.updated_at).where(la.c.id == uuid.UUID(loan_id))).scalar_one()
+
+
+def _fresh_etag(client, loan_id: str) -> str:
+    # Straight from the database, not from an entry cached before the claim
+    loan_cache.local.clear()
+    response = client.get(f"/api/v1/loans/{loan_id}")
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_claim_heartbeat_release_keep_the_etag(engine, client, queue):
+    loan_id = _create_loan(client)
+    etag = _fresh_etag(client, loan_id)
+    before = _updated_at(engine, loan_id)
+
+    assert _claim(client, queue) == loan_id
+    heartbeat = client.post(f"/api/v1/underwriting/claims/{loan_id}/heartbeat", json={"underwriter_id": str(queue)})
+    assert heartbeat.status_code == 200, heartbeat.text
+    assert _updated_at(engine, loan_id) == before
+    assert _fresh_etag(client, loan_id) == etag
+    loan_cache.local.clear()
+    assert client.get(f"/api/v1/loans/{loan_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    released = client.post(f"/api/v1/underwriting/claims/{loan_id}/release", json={"underwriter_id": str(queue)})
+    assert released.status_code == 204
+    assert _updated_at(engine, loan_id) == before
+    assert _fresh_etag(client, loan_id) == etag
+
+
+def test_underwriter_listing_changes_with_claims(engine, client, queue):
+    # Claims keep updated_at, but swapping one held loan for another must
+    # still change the underwriter's listing validator. Here the swap keeps
+    # the count, the newest updated_at and the oldest listing key
+    with engine.begin() as conn:
+        # Earlier tests' loans behind everything this test claims
+        conn.execute(update(la).values(priority=-5, updated_at=la.c.updated_at))
+    first, middle, later, newest = (_create_loan(client, priority) for priority in (1, 1, 0, 2))
+    held = [_claim(client, queue) for _ in range(3)]
+    assert held == [newest, first, middle]
+    params = {"assigned_underwriter_id": str(queue)}
+    before = client.get("/api/v1/loans", params=params)
+
+    assert client.post(f"/api/v1/underwriting/claims/{middle}/release", json={"underwriter_id": str(queue)}).status_code == 204
+    with engine.begin() as conn:
+        # Out of the way of the next claim, without touching updated_at
+        conn.execute(update(la).where(la.c.id == uuid.UUID(middle)).values(priority=-1, updated_at=la.c.updated_at))
+    assert _claim(client, queue) == later
+
+    after = client.get("/api/v1/loans", params=params, headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert {loan["id"] for loan in after.json()} == {first, later, newest}
+    for loan_id in (first, later, newest):
+        client.post(f"/api/v1/underwriting/claims/{loan_id}/release", json={"underwriter_id": str(queue)})
+
+
+@postgres_only
+def test_trigger_still_stamps_real_edits(engine, client, queue):
+    loan_id = _create_loan(client)
+    before = _updated_at(engine, loan_id)
+    with engine.begin() as conn:
+        # Raw SQL as another client would write it: no ORM onupdate stamp
+        conn.execute(update(la).where(la.c.id == uuid.UUID(loan_id)).values(loan_amount=260000, updated_at=la.c.updated_at))
+    assert _updated_at(engine, loan_id) > before
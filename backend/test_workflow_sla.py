@@ -0,0 +1,116 @@
+"""
+Workflow SLA timers (workflow_engine.SLATracker) on a fake clock.
+
+  * steps fall due in due-date order, and only once
+  * rescheduling a step keeps just its latest due date
+  * completed steps stop being tracked, whether discarded here or completed
+    by another process before the breach is recorded
+  * ``db_utils.py workflow-monitor`` logs each breach as an sla_breach event
+
+Usage: python -m pytest -q test_workflow_sla.py
+"""
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from workflow_engine import COMPLETED, OVERDUE, SLATracker, ws
+
+T0 = datetime(2024, 6, 3, 12, 0)
+
+
+def _at(hours: float) -> datetime:
+    return T0 + timedelta(hours=hours)
+
+
+def _create_loan(client) -> uuid.UUID:
+    response = client.post("/api/v1/loans", json={
+        "applicant_first_name": "Sla", "applicant_last_name": "Watcher", "loan_amount": 190000,
+        "loan_purpose": "home_purchase", "annual_income": 80000, "employment_status": "employed",
+    })
+    assert response.status_code == 201, response.text
+    return uuid.UUID(response.json()["id"])
+
+
+def _open_step(engine, loan_id: uuid.UUID, due: datetime) -> uuid.UUID:
+    """The loan's first (started) step, made due at ``due``."""
+    with engine.begin() as conn:
+        step_id = conn.execute(select(ws.c.id).where(ws.c.application_id == loan_id, ws.c.step_order == 1)).scalar_one()
+        conn.execute(update(ws).where(ws.c.id == step_id).values(due_date=due))
+    return step_id
+
+
+def test_steps_fall_due_in_order_once():
+    tracker = SLATracker()
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    tracker.add_many([(a, _at(3)), (b, _at(1)), (c, _at(2))])
+    assert tracker.next_due() == _at(1)
+    assert tracker.pop_due(_at(0.5)) == []
+    assert tracker.pop_due(_at(1)) == [b]
+    assert tracker.pop_due(_at(10)) == [c, a]
+    assert tracker.pop_due(_at(20)) == [] and len(tracker) == 0
+    assert tracker.next_due() is None
+
+
+def test_reschedule_keeps_the_latest_due_date():
+    tracker = SLATracker()
+    later, sooner = uuid.uuid4(), uuid.uuid4()
+    tracker.add_many([(later, _at(1)), (sooner, _at(5))])
+    tracker.add(later, _at(4))
+    tracker.add(sooner, _at(2))
+    assert len(tracker) == 2
+    assert tracker.next_due() == _at(2)
+    assert tracker.pop_due(_at(3)) == [sooner]
+    assert tracker.pop_due(_at(4)) == [later]
+    # The superseded entry for the old 5h date is skipped, not reported
+    assert tracker.pop_due(_at(10)) == []
+    assert tracker.stats()["heap_entries"] == 0
+
+
+def test_discarded_steps_never_fall_due():
+    tracker = SLATracker()
+    done, open_ = uuid.uuid4(), uuid.uuid4()
+    tracker.add_many([(done, _at(1)), (open_, _at(2))])
+    tracker.discard(done)
+    tracker.discard(uuid.uuid4())  # unknown ids are ignored
+    assert tracker.next_due() == _at(2)
+    assert tracker.pop_due(_at(10)) == [open_]
+
+
+def test_check_skips_steps_completed_elsewhere(engine, client):
+    late, finished = (_open_step(engine, _create_loan(client), _at(1)) for _ in range(2))
+    tracker = SLATracker()
+    with engine.connect() as conn:
+        assert tracker.load(conn) >= 2
+    with engine.begin() as conn:
+        # Another process completes one step after this tracker loaded it
+        conn.execute(update(ws).where(ws.c.id == finished).values(is_completed=True, status=COMPLETED))
+    recorded = []
+    tracker.on_breach.append(recorded.append)
+
+    breached = {event["id"] for event in tracker.check(engine, now=_at(2))}
+    assert late in breached and finished not in breached
+    assert {event["id"] for event in recorded} == breached
+    with engine.connect() as conn:
+        assert conn.execute(select(ws.c.status).where(ws.c.id == late)).scalar_one() == OVERDUE
+        # A reloaded monitor does not report it again
+        tracker.load(conn)
+    assert tracker.check(engine, now=_at(2)) == []
+
+
+def test_monitor_cli_logs_breaches(engine, client):
+    step_id = _open_step(engine, _create_loan(client), datetime.utcnow() - timedelta(hours=1))
+    result = subprocess.run(
+        [sys.executable, "db_utils.py", "workflow-monitor", "--ticks", "1"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=60,
+        env={**os.environ, "LOG_LEVEL": "INFO"},
+    )
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    breaches = [e for e in events if e.get("event") == "sla_breach"]
+    assert str(step_id) in {e["step_id"] for e in breaches}
+    assert {e["logger"] for e in breaches} == {"loan_api.workflow"}
@@ -0,0 +1,189 @@
+"""
+Underwriter work queue: claim the next submitted application.
+
+An application is claimable while it is SUBMITTED and either unassigned or
+its claim lease has lapsed. ``claim_next`` hands out lapsed claims first
+(that work was due before anything still unclaimed), otherwise the highest
+priority, oldest unassigned submission, in one statement:
+
+    UPDATE loan_applications SET assigned_underwriter_id = ..., lease ...
+    WHERE id = COALESCE(
+        (SELECT id ... lease lapsed ... ORDER BY priority DESC, submitted_at, id
+         LIMIT 1 FOR UPDATE SKIP LOCKED),
+        (SELECT id ... unassigned ...   ORDER BY priority DESC, submitted_at, id
+         LIMIT 1 FOR UPDATE SKIP LOCKED))
+    RETURNING ...
+
+Each subquery reads its own partial index (migrations/005): claimed rows
+leave the unassigned index, so a claim costs a few index entries however
+many applications are already being worked on.
+
+  * PostgreSQL: SKIP LOCKED makes concurrent claimers step over rows another
+    transaction is claiming instead of queueing behind it, so N underwriters
+    get N different applications in parallel (no lock convoy).
+  * SQLite: the same statement without the locking clause. An UPDATE takes
+    the database write lock before it reads, so the subquery and the write
+    are atomic. Concurrent connections would otherwise busy-poll that lock
+    (and time out under load), so queue writes from one process take turns
+    on an asyncio.Lock and hold it only for the statement and its commit.
+
+Claims, heartbeats and releases are not edits: they leave updated_at (the
+loan's ETag / Last-Modified) as it was. The statements set it to itself,
+which overrides the column's onupdate stamp; on PostgreSQL the
+loan_applications trigger (migrations/010) does the same.
+
+A claim is a lease: ``renew_claim`` (the heartbeat) pushes claim_expires_at
+forward, ``release_claim`` hands the application back. Once a lease lapses
+the next claimer may take the application; the previous holder learns so
+from its next heartbeat. Applications assigned by hand carry no lease and
+are never claimed away. The claimer's role is checked inside the statement.
+
+Settings:
+    CLAIM_LEASE_SECONDS   lease granted per claim / heartbeat (default 900)
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, exists, func, or_, select, update
+
+from database import LoanApplication, LoanStatus, User, UserRole
+
+CLAIM_LEASE_SECONDS = int(os.getenv('CLAIM_LEASE_SECONDS', '900'))
+
+# Roles allowed to pull work from the queue
+QUEUE_ROLES = (UserRole.UNDERWRITER, UserRole.MANAGER, UserRole.ADMIN)
+
+la = LoanApplication.__table__
+users = User.__table__
+
+CLAIM_COLUMNS = (la.c.id, la.c.loan_number, la.c.priority, la.c.submitted_at, la.c.claimed_at, la.c.claim_expires_at)
+
+# Statements are built once and executed with these parameters
+_loan_id = bindparam("loan_id", type_=la.c.id.type)
+_underwriter_id = bindparam("underwriter_id", type_=la.c.assigned_underwriter_id.type)
+_now = bindparam("now", type_=la.c.claim_expires_at.type)
+_expires = bindparam("expires", type_=la.c.claim_expires_at.type)
+
+
+def claimable():
+    """Submitted and unassigned, or held under a lease that has lapsed."""
+    return and_(
+        la.c.status == LoanStatus.SUBMITTED,
+        or_(la.c.assigned_underwriter_id.is_(None), la.c.claim_expires_at < _now),
+    )
+
+
+def underwriter_check():
+    return exists().where(users.c.id == _underwriter_id, users.c.role.in_(QUEUE_ROLES), users.c.is_active.is_(True))
+
+
+def _next_id(*criteria):
+    # The role check sits in the subquery: Postgres evaluates it once, before
+    # any row is locked. SQLite's compiler drops FOR UPDATE SKIP LOCKED.
+    return (
+        select(la.c.id)
+        .where(la.c.status == LoanStatus.SUBMITTED, *criteria, underwriter_check())
+        .order_by(la.c.priority.desc(), la.c.submitted_at, la.c.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+
+@lru_cache(maxsize=None)
+def claim_statement():
+    candidate = func.coalesce(
+        _next_id(la.c.claim_expires_at < _now),
+        _next_id(la.c.assigned_underwriter_id.is_(None)),
+    )
+    return (
+        update(la)
+        .where(la.c.id == candidate, claimable())
+        .values(assigned_underwriter_id=_underwriter_id, claimed_at=_now, claim_expires_at=_expires,
+                updated_at=la.c.updated_at)
+        .returning(*CLAIM_COLUMNS)
+    )
+
+
+@lru_cache(maxsize=None)
+def renew_statement():
+    return (
+        update(la)
+        .where(
+            la.c.id == _loan_id,
+            la.c.assigned_underwriter_id == _underwriter_id,
+            la.c.status == LoanStatus.SUBMITTED,
+            la.c.claim_expires_at.is_not(None),
+        )
+        .values(claim_expires_at=_expires, updated_at=la.c.updated_at)
+        .returning(*CLAIM_COLUMNS)
+    )
+
+
+@lru_cache(maxsize=None)
+def release_statement():
+    return (
+        update(la)
+        .where(
+            la.c.id == _loan_id,
+            la.c.assigned_underwriter_id == _underwriter_id,
+            la.c.claim_expires_at.is_not(None),
+        )
+        .values(assigned_underwriter_id=None, claimed_at=None, claim_expires_at=None, updated_at=la.c.updated_at)
+    )
+
+
+def lease_params(lease_seconds: Optional[int] = None, **params) -> dict:
+    now = datetime.utcnow()
+    return {"now": now, "expires": now + timedelta(seconds=lease_seconds or CLAIM_LEASE_SECONDS), **params}
+
+
+# ----------------------------------------------------------------------------
+# Session API: each call is its own committed transaction
+# ----------------------------------------------------------------------------
+_sqlite_writes = asyncio.Lock()
+
+
+async def _commit_one(db, stmt, params: dict, fetch):
+    """Run one queue statement as its own transaction and commit it; the
+    session must not have a transaction in progress."""
+    if (await db.connection()).dialect.name != 'sqlite':
+        value = fetch(await db.execute(stmt, params))
+        await db.commit()
+        return value
+    async with _sqlite_writes:
+        try:
+            value = fetch(await db.execute(stmt, params))
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+    return value
+
+
+async def claim_next(db, underwriter_id, lease_seconds: Optional[int] = None):
+    """Claim one application for ``underwriter_id``; None when nothing is
+    claimable (or the user may not claim)."""
+    params = lease_params(lease_seconds, underwriter_id=underwriter_id)
+    return await _commit_one(db, claim_statement(), params, lambda result: result.one_or_none())
+
+
+async def renew_claim(db, loan_id, underwriter_id, lease_seconds: Optional[int] = None):
+    """Extend the lease; None when the claim is no longer held (reclaimed by
+    someone else, released, or decided). A lapsed lease nobody has taken
+    over yet is renewed."""
+    params = lease_params(lease_seconds, loan_id=loan_id, underwriter_id=underwriter_id)
+    return await _commit_one(db, renew_statement(), params, lambda result: result.one_or_none())
+
+
+async def release_claim(db, loan_id, underwriter_id) -> bool:
+    """Return a claimed application to the queue."""
+    params = {"loan_id": loan_id, "underwriter_id": underwriter_id}
+    return await _commit_one(db, release_statement(), params, lambda result: result.rowcount > 0)
+
+
+async def may_claim(db, underwriter_id) -> bool:
+    return bool((await db.execute(select(underwriter_check()), {"underwriter_id": underwriter_id})).scalar())
@@ -0,0 +1,318 @@
+"""
+Workflow steps for loan applications, with SLA (due date) tracking.
+
+Every new application gets the WORKFLOW_STEPS template as workflow_status
+rows, written for a whole batch of applications in one INSERT. The first
+step starts ``in_progress`` with its due date set; the others wait as
+``pending`` and get theirs when they start. ``advance`` completes the
+current step and starts the next in one transaction.
+
+Overdue detection keeps the due dates of open steps in memory instead of
+re-scanning workflow_status on every check:
+  * ``SLATracker`` is a min-heap of (due, step id) with lazy invalidation;
+    a tick pops only what has fallen due, O(log n) each, and costs nothing
+    when nothing has.
+  * It is loaded from the partial index on open steps
+    (idx_workflow_open_due, migrations/006_workflow_sla.sql), so a reload
+    reads the steps in progress, not the table's history.
+  * Steps that fall due are confirmed and marked ``overdue`` in one UPDATE
+    ... RETURNING, which drops steps completed elsewhere in the meantime
+    and keeps a restarted monitor from reporting the same breach twice.
+    Each confirmed breach is passed to the ``on_breach`` callbacks and
+    logged as an ``sla_breach`` event.
+Steps started by other processes are picked up at the next reload;
+``python db_utils.py workflow-monitor`` ticks every WORKFLOW_TICK_SECONDS
+and reloads every WORKFLOW_RELOAD_SECONDS.
+
+Settings:
+    WORKFLOW_STEPS             name:SLA hours, in order (default
+                               application_review:24,document_verification:72,
+                               underwriting:120,final_approval:48,closing:168)
+    WORKFLOW_TICK_SECONDS      monitor: overdue check interval (default 30)
+    WORKFLOW_RELOAD_SECONDS    monitor: reload from the index (default 300)
+    WORKFLOW_TIMER_MEMORY_MB   memory budget used to report timer capacity
+                               (default 64)
+"""
+import heapq
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, false, insert, select, update
+
+from database import WorkflowStatus
+
+IN_PROGRESS, PENDING, COMPLETED, OVERDUE = "in_progress", "pending", "completed", "overdue"
+DEFAULT_STEPS = "application_review:24,document_verification:72,underwriting:120,final_approval:48,closing:168"
+
+# Step ids per breach UPDATE, well under SQLite's bound-parameter limit
+BREACH_BATCH = 1000
+
+ws = WorkflowStatus.__table__
+logger = logging.getLogger("loan_api.workflow")
+
+
+class WorkflowError(Exception):
+    """The requested transition does not apply to the workflow's state."""
+
+
+def parse_steps(spec: str) -> List[Tuple[str, float]]:
+    steps = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, hours = item.partition(":")
+        name = name.strip()
+        if not name or any(name == existing for existing, _ in steps):
+            raise ValueError(f"bad or repeated workflow step {name!r}")
+        steps.append((name, max(0.0, float(hours or 0))))
+    if not steps:
+        raise ValueError("workflow template has no steps")
+    return steps
+
+
+TEMPLATE = parse_steps(os.getenv('WORKFLOW_STEPS', DEFAULT_STEPS))
+SLA_HOURS: Dict[str, float] = dict(TEMPLATE)
+
+
+def _timestamp(value: datetime) -> float:
+    # Naive datetimes are UTC here (datetime.utcnow), as in the rest of the app
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _due(step_name: str, now: datetime) -> Optional[datetime]:
+    hours = SLA_HOURS.get(step_name)
+    return now + timedelta(hours=hours) if hours else None
+
+
+# ----------------------------------------------------------------------------
+# Step rows
+# ----------------------------------------------------------------------------
+def template_rows(application_ids: Iterable[uuid.UUID], now: Optional[datetime] = None,
+                  template: Sequence[Tuple[str, float]] = TEMPLATE) -> List[dict]:
+    """workflow_status rows for each application: first step started."""
+    now = now or datetime.utcnow()
+    rows = []
+    for application_id in application_ids:
+        for order, (name, hours) in enumerate(template, 1):
+            first = order == 1
+            rows.append({
+                "id": uuid.uuid4(), "application_id": application_id, "step_name": name, "step_order": order,
+                "status": IN_PROGRESS if first else PENDING, "is_completed": False,
+                "due_date": now + timedelta(hours=hours) if first and hours else None,
+                "created_at": now, "updated_at": now,
+            })
+    return rows
+
+
+def _current_step():
+    return (
+        select(ws.c.id)
+        .where(ws.c.application_id == bindparam("workflow_application_id"), ws.c.is_completed == false())
+        .order_by(ws.c.step_order)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def complete_statement():
+    # Completing is the first statement, so the step is picked and written
+    # atomically (a row lock on Postgres, the write lock on SQLite); of two
+    # concurrent advances the second finds the step done and fails
+    return (
+        update(ws)
+        .where(ws.c.id == _current_step(), ws.c.is_completed == false())
+        .values(is_completed=True, status=COMPLETED, completed_at=bindparam("now"),
+                comments=bindparam("step_comments"), assigned_to=bindparam("completed_by"))
+        .returning(ws.c.id, ws.c.step_name, ws.c.step_order, ws.c.due_date)
+    )
+
+
+def next_step_select():
+    return (
+        select(ws.c.id, ws.c.step_name)
+        .where(ws.c.application_id == bindparam("workflow_application_id"), ws.c.is_completed == false())
+        .order_by(ws.c.step_order)
+        .limit(1)
+    )
+
+
+def open_timers_select():
+    """Due dates of started, unbreached steps: reads idx_workflow_open_due."""
+    return (
+        select(ws.c.id, ws.c.due_date)
+        .where(ws.c.is_completed == false(), ws.c.due_date.is_not(None), ws.c.status != OVERDUE)
+    )
+
+
+def breach_statement():
+    return (
+        update(ws)
+        .where(ws.c.id.in_(bindparam("ids", expanding=True)), ws.c.is_completed == false(), ws.c.status != OVERDUE)
+        .values(status=OVERDUE)
+        .returning(ws.c.id, ws.c.application_id, ws.c.step_name, ws.c.assigned_to, ws.c.due_date)
+    )
+
+
+async def start_workflows(db, application_ids: Iterable[uuid.UUID], now: Optional[datetime] = None,
+                          tracker: Optional["SLATracker"] = None) -> int:
+    """Insert the template for new applications in the session's current
+    transaction: one multi-row INSERT. Returns the number of steps."""
+    rows = template_rows(application_ids, now)
+    if rows:
+        await db.execute(insert(ws), rows)
+        if tracker is not None:
+            tracker.add_many((row["id"], row["due_date"]) for row in rows if row["due_date"] is not None)
+    return len(rows)
+
+
+async def advance(db, application_id: uuid.UUID, user_id: Optional[uuid.UUID] = None, comments: Optional[str] = None,
+                  tracker: Optional["SLATracker"] = None) -> dict:
+    """Complete the current step and start the next, in the session's
+    transaction (the caller commits). Raises WorkflowError when the
+    workflow is missing or already finished."""
+    now = datetime.utcnow()
+    params = {"workflow_application_id": application_id, "now": now, "completed_by": user_id, "step_comments": comments}
+    done = (await db.execute(complete_statement(), params)).one_or_none()
+    if done is None:
+        raise WorkflowError("no_open_step")
+    started = None
+    following = (await db.execute(next_step_select(), params)).one_or_none()
+    if following is not None:
+        due = _due(following.step_name, now)
+        await db.execute(update(ws).where(ws.c.id == following.id).values(status=IN_PROGRESS, due_date=due))
+        started = {"id": following.id, "step_name": following.step_name, "due_date": due}
+    if tracker is not None:
+        tracker.discard(done.id)
+        if started and started["due_date"]:
+            tracker.add(started["id"], started["due_date"])
+    return {
+        "completed": {"id": done.id, "step_name": done.step_name, "step_order": done.step_order,
+                      "due_date": done.due_date, "completed_at": now, "late": bool(done.due_date and _timestamp(done.due_date) < _timestamp(now))},
+        "started": started,
+    }
+
+
+# ----------------------------------------------------------------------------
+# Due-date timers
+# ----------------------------------------------------------------------------
+class SLATracker:
+    """Min-heap of (due timestamp, step id); ``_due`` holds the live timers.
+
+    Rescheduling or discarding a step only updates ``_due``; stale heap
+    entries are skipped when they reach the top, and compacted away once
+    they outnumber the live ones.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        self._heap: List[Tuple[float, uuid.UUID]] = []
+        self._due: Dict[uuid.UUID, float] = {}
+        self.memory_budget = int((memory_budget_mb or float(os.getenv('WORKFLOW_TIMER_MEMORY_MB', '64'))) * 1024 * 1024)
+        self.breaches = 0
+        self.on_breach: List[Callable[[dict], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def add(self, step_id: uuid.UUID, due: datetime):
+        ts = _timestamp(due)
+        self._due[step_id] = ts
+        heapq.heappush(self._heap, (ts, step_id))
+
+    def add_many(self, timers: Iterable[Tuple[uuid.UUID, datetime]]):
+        for step_id, due in timers:
+            self.add(step_id, due)
+
+    def discard(self, step_id: uuid.UUID):
+        if self._due.pop(step_id, None) is not None and len(self._heap) > 2 * len(self._due) + 1024:
+            self._compact()
+
+    def _compact(self):
+        self._heap = [(ts, step_id) for step_id, ts in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def load(self, conn) -> int:
+        """Replace the timers with the open steps' due dates."""
+        self._due = {step_id: _timestamp(due) for step_id, due in conn.execute(open_timers_select())}
+        self._compact()
+        return len(self._due)
+
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return datetime.fromtimestamp(self._heap[0][0], timezone.utc).replace(tzinfo=None) if self._heap else None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[uuid.UUID]:
+        """Steps whose due date has passed; they stop being tracked."""
+        limit = _timestamp(now or datetime.utcnow())
+        due = []
+        while self._heap and self._heap[0][0] <= limit:
+            ts, step_id = heapq.heappop(self._heap)
+            if self._due.get(step_id) == ts:
+                del self._due[step_id]
+                due.append(step_id)
+        return due
+
+    def check(self, engine, now: Optional[datetime] = None) -> List[dict]:
+        """Confirm and record breaches for the steps that fell due; each is
+        logged and handed to the ``on_breach`` callbacks."""
+        ids = self.pop_due(now)
+        if not ids:
+            return []
+        breached = []
+        with engine.begin() as conn:
+            for start in range(0, len(ids), BREACH_BATCH):
+                rows = conn.execute(breach_statement(), {"ids": ids[start:start + BREACH_BATCH]})
+                breached.extend(dict(row._mapping) for row in rows)
+        for event in breached:
+            logger.warning({"event": "sla_breach", "step_id": str(event["id"]),
+                            "application_id": str(event["application_id"]), "step": event["step_name"],
+                            "due_date": event["due_date"].isoformat() if event["due_date"] else None})
+            for callback in self.on_breach:
+                callback(event)
+        self.breaches += len(breached)
+        return breached
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint: heap list and entries, the dict, and the
+        step ids and timestamps (each shared between heap and dict)."""
+        sample_id = uuid.UUID(int=(1 << 127) + 1)
+        entry = sys.getsizeof((0.0, sample_id))
+        timer = sys.getsizeof(sample_id) + sys.getsizeof(sample_id.int) + sys.getsizeof(0.0)
+        return (sys.getsizeof(self._heap) + sys.getsizeof(self._due)
+                + len(self._heap) * entry + len(self._due) * timer)
+
+    def stats(self) -> dict:
+        used = self.memory_bytes()
+        per_timer = used / len(self._due) if self._due else None
+        return {
+            "timers": len(self._due),
+            "heap_entries": len(self._heap),
+            "memory_bytes": used,
+            "bytes_per_timer": round(per_timer, 1) if per_timer else None,
+            "capacity": int(self.memory_budget // per_timer) if per_timer else None,
+            "breaches": self.breaches,
+        }
+
+
+def run_monitor(engine, tracker: Optional[SLATracker] = None, tick: Optional[float] = None,
+                reload_every: Optional[float] = None, ticks: Optional[int] = None):
+    """Load the timers, then check for breaches every ``tick`` seconds,
+    reloading from the partial index every ``reload_every`` seconds."""
+    tracker = tracker or SLATracker()
+    tick = tick or float(os.getenv('WORKFLOW_TICK_SECONDS', '30'))
+    reload_every = reload_every or float(os.getenv('WORKFLOW_RELOAD_SECONDS', '300'))
+    loaded_at = None
+    count = 0
+    while ticks is None or count < ticks:
+        if loaded_at is None or time.monotonic() - loaded_at >= reload_every:
+            with engine.connect() as conn:
+                tracker.load(conn)
+            loaded_at = time.monotonic()
+        tracker.check(engine)
+        count += 1
+        if ticks is None or count < ticks:
+            time.sleep(tick)
+    return tracker